@@ -2,7 +2,6 @@ import random
 from enum import Enum
 
 import big_o_utils as bou
-import chevron
 import lxml.html
 import prairielearn as pl
 import prairielearn.sympy_utils as psu
@@ -45,8 +44,7 @@ BLANK_VALUE_DEFAULT = "1"
 BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-big-o-input.mustache"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -92,8 +90,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         data["correct_answers"][name] = a_true
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
     variables = psu.get_items_list(
@@ -124,10 +121,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "constants": constants,
     }
 
-    with open(BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
-
-    info = chevron.render(template, info_params).strip()
+    info = pl.render_template(BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME, info_params).strip()
 
     # First, prepare the parse error since this gets used in multiple panels
     parse_error: str | None = data["format_errors"].get(name)
@@ -148,8 +142,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         parse_error = None
     # Use the existing format text in the invalid popup and render it
     elif parse_error is not None:
-        parse_error += chevron.render(
-            template, {"format_error": True, "format_string": info}
+        parse_error += pl.render_template(
+            BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME,
+            {"format_error": True, "format_string": info},
         ).strip()
 
     # Next, get some attributes we will use in multiple places
@@ -179,7 +174,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         # No need to escape the raw_submitted_answer,
@@ -203,7 +200,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 data["partial_scores"].get(name, {}).get("feedback")
             )
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     # Display the correct answer.
     elif data["panel"] == "answer":
@@ -221,13 +220,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "type": bigo_type,
         }
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            BIG_O_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     variables = psu.get_items_list(
         pl.get_string_attrib(element, "variable", VARIABLES_DEFAULT)
@@ -255,8 +255,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         data["submitted_answers"][name] = None
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     variables = psu.get_items_list(
         pl.get_string_attrib(element, "variable", VARIABLES_DEFAULT)
@@ -275,11 +274,11 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         name,
         lambda a_sub: GRADE_FUNCTION_DICT[big_o_type](a_tru, a_sub, variables),
         weight=weight,
+        cache_key=[a_tru, dict(element.attrib)],
     )
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     result = data["test_type"]
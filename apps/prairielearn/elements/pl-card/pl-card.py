@@ -1,6 +1,5 @@
 from typing import Any
 
-import chevron
 import lxml.html
 import prairielearn as pl
 
@@ -15,8 +14,7 @@ IMG_BOTTOM_ALT_DEFAULT = ""
 WIDTH_DEFAULT = "auto"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = [
         "header",
@@ -32,9 +30,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     pl.check_attribs(element, required_attribs, optional_attribs)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
-
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     header = pl.get_string_attrib(element, "header", HEADER_DEFAULT)
     title = pl.get_string_attrib(element, "title", TITLE_DEFAULT)
     subtitle = pl.get_string_attrib(element, "subtitle", SUBTITLE_DEFAULT)
@@ -72,5 +68,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "title": title  # https://github.com/noahmorrison/chevron/issues/117
         }
 
-    with open("pl-card.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-card.mustache", html_params).strip()
@@ -1,7 +1,6 @@
 import math
 import random
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from typing_extensions import assert_never
@@ -22,9 +21,7 @@ MIN_SELECT_DEFAULT = 1
 FEEDBACK_DEFAULT = None
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
-
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -168,8 +165,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     data["correct_answers"][name] = correct_answer_list
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     partial_credit = pl.get_boolean_attrib(
         element, "partial-credit", PARTIAL_CREDIT_DEFAULT
@@ -348,8 +344,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
 
             info_params.update({"gradingtext": gradingtext})
 
-        with open("pl-checkbox.mustache", encoding="utf-8") as f:
-            info = chevron.render(f, info_params).strip()
+        info = pl.render_template("pl-checkbox.mustache", info_params).strip()
 
         html_params = {
             "question": True,
@@ -378,8 +373,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             except Exception as exc:
                 raise ValueError(f"invalid score: {score}") from exc
 
-        with open("pl-checkbox.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-checkbox.mustache", html_params).strip()
 
     elif data["panel"] == "submission":
         parse_error = data["format_errors"].get(name, None)
@@ -431,16 +425,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 except Exception as exc:
                     raise ValueError(f"invalid score: {score}") from exc
 
-            with open("pl-checkbox.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template("pl-checkbox.mustache", html_params).strip()
         else:
             html_params = {
                 "submission": True,
                 "parse_error": parse_error,
                 "inline": inline,
             }
-            with open("pl-checkbox.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template("pl-checkbox.mustache", html_params).strip()
 
     elif data["panel"] == "answer":
         if not pl.get_boolean_attrib(
@@ -457,8 +449,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                     element, "hide-letter-keys", HIDE_LETTER_KEYS_DEFAULT
                 ),
             }
-            with open("pl-checkbox.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template("pl-checkbox.mustache", html_params).strip()
         else:
             html = ""
 
@@ -468,8 +459,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     return html
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
 
     submitted_key = data["submitted_answers"].get(name, None)
@@ -510,8 +500,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         return
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     partial_credit = pl.get_boolean_attrib(
@@ -565,8 +554,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     }
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     partial_credit = pl.get_boolean_attrib(
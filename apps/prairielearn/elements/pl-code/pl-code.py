@@ -5,7 +5,6 @@ from html import escape, unescape
 from textwrap import dedent
 from typing import Any
 
-import chevron
 import lxml.html
 import prairielearn as pl
 import pygments
@@ -186,8 +185,7 @@ def get_formatter(
     )
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = [
         "language",
@@ -248,8 +246,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         raise ValueError("Could not parse highlight-lines attribute; check your syntax")
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     language = pl.get_string_attrib(element, "language", LANGUAGE_DEFAULT)
     style_name = pl.get_string_attrib(
         element,
@@ -339,5 +336,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         ),
     }
 
-    with open("pl-code.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-code.mustache", html_params).strip()
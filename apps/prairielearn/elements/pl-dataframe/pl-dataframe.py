@@ -1,7 +1,6 @@
 import pprint
 from enum import Enum
 
-import chevron
 import lxml.html
 import pandas as pd
 import prairielearn as pl
@@ -65,8 +64,7 @@ def using_default_index(df: pd.DataFrame) -> bool:
     )
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     pl.check_attribs(
         element,
         required_attribs=["params-name"],
@@ -85,9 +83,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     )
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
-
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     varname = pl.get_string_attrib(element, "params-name")
     show_index = pl.get_boolean_attrib(element, "show-index", SHOW_INDEX_DEFAULT)
     show_header = pl.get_boolean_attrib(element, "show-header", SHOW_HEADER_DEFAULT)
@@ -187,5 +183,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     if show_dimensions:
         html_params["num_rows"], html_params["num_cols"] = frame.shape
 
-    with open("pl-dataframe.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-dataframe.mustache", html_params).strip()
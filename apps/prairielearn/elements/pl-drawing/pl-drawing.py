@@ -4,13 +4,14 @@ import json
 import random
 import warnings
 
-import chevron
 import defaults
 import elements
 import lxml.etree
 import lxml.html
 import prairielearn as pl
 
+DRAWING_MUSTACHE_TEMPLATE_NAME = "pl-drawing.mustache"
+
 
 def union_drawing_items(e1: list[dict] | None, e2: list[dict] | None) -> list[dict]:
     # Union two sets of drawing items, prioritizing e2 in cases of duplicates.
@@ -57,8 +58,7 @@ def check_attributes_rec(element: lxml.html.HtmlElement) -> None:
         check_attributes_rec(child)
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     check_attributes_rec(element)
 
     w_button = None
@@ -164,13 +164,13 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             data["correct_answers"][name] = ans
 
 
-def render_controls(template: str, elem: lxml.html.HtmlElement) -> str:
+def render_controls(elem: lxml.html.HtmlElement) -> str:
     if elem.tag == "pl-controls":
         markup = ""
         for el in elem:
             if el.tag is lxml.etree.Comment:
                 continue
-            markup += render_controls(template, el) + "<br>\n"
+            markup += render_controls(el) + "<br>\n"
         return markup
     elif elem.tag == "pl-drawing-button":
         type_name = elem.attrib.get("type", None)
@@ -189,8 +189,8 @@ def render_controls(template: str, elem: lxml.html.HtmlElement) -> str:
                 opts["placed_by_user"] = True
             if "type" not in opts:
                 opts["type"] = type_name
-            return chevron.render(
-                template,
+            return pl.render_template(
+                DRAWING_MUSTACHE_TEMPLATE_NAME,
                 {
                     "render_button": True,
                     "button_class": elem.attrib.get("type", ""),
@@ -202,7 +202,7 @@ def render_controls(template: str, elem: lxml.html.HtmlElement) -> str:
         for child in elem:
             if child.tag is lxml.etree.Comment:
                 continue
-            markup += render_controls(template, child) + "\n"
+            markup += render_controls(child) + "\n"
         markup += "</p>\n"
         return markup
     else:
@@ -239,8 +239,7 @@ def render_drawing_items(elem, curid=0, defaults=None):
     return (objects, curid)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name", "")
     aria_label = pl.get_string_attrib(
         element, "aria-label", defaults.element_defaults["aria-label"]
@@ -251,9 +250,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     preview_mode = not pl.get_boolean_attrib(
         element, "gradable", defaults.element_defaults["gradable"]
     )
-    with open("pl-drawing.mustache") as f:
-        template = f.read()
-
     btn_markup = ""
     init = []
 
@@ -263,7 +259,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         if el.tag is lxml.etree.Comment:
             continue
         if el.tag == "pl-controls" and not preview_mode:
-            btn_markup = render_controls(template, el)
+            btn_markup = render_controls(el)
         elif el.tag == "pl-drawing-initial":
             init, _ = render_drawing_items(el)
             draw_error_box = pl.get_boolean_attrib(
@@ -369,11 +365,10 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         parse_error = data["format_errors"].get(name, None)
         html_params["parse_error"] = parse_error
 
-    return chevron.render(template, html_params).strip()
+    return pl.render_template(DRAWING_MUSTACHE_TEMPLATE_NAME, html_params).strip()
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(
         element, "answers-name", defaults.element_defaults["answers-name"]
     )
@@ -2,7 +2,6 @@ import base64
 import json
 from pathlib import Path
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from lxml.html import HtmlElement
@@ -47,8 +46,7 @@ def is_source_file_name_required(panel: str, gradable: bool, fresh: bool) -> boo
 # -----------------------------------------------------------------------------
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attrs = []
     optional_attrs = [
         ATTR_GRADABLE,
@@ -172,12 +170,10 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "show_widget": show_widget,
     }
 
-    with open("pl-excalidraw.mustache", encoding="utf-8") as template:
-        return chevron.render(template, render_data)
+    return pl.render_template("pl-excalidraw.mustache", render_data)
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     drawing_name = pl.get_string_attrib(element, ATTR_ANSWER_NAME, None)
 
     if drawing_name:
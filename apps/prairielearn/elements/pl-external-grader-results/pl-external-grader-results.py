@@ -1,7 +1,6 @@
 from typing import Any
 
 import ansi2html.style as ansi2html_style
-import chevron
 import lxml.html
 import prairielearn as pl
 from ansi2html import Ansi2HTMLConverter
@@ -43,8 +42,7 @@ def ansi_to_html(output: str | None) -> str | None:
         return f"[Error converting ANSI to HTML: {exc}]\n\n{output}"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs: list[str] = []
     optional_attribs: list[str] = []
     pl.check_attribs(element, required_attribs, optional_attribs)
@@ -185,5 +183,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     elif not grading_succeeded:
         html_params["message"] = ansi_to_html(feedback.get("message", None))
 
-    with open("pl-external-grader-results.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template(
+        "pl-external-grader-results.mustache", html_params
+    ).strip()
@@ -1,4 +1,3 @@
-import chevron
 import lxml.etree
 import lxml.html
 import prairielearn as pl
@@ -6,8 +5,7 @@ import prairielearn as pl
 EMPTY_DEFAULT = False
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     pl.check_attribs(element, ["params-name"], ["empty"])
 
     params_name = pl.get_string_attrib(element, "params-name")
@@ -63,9 +61,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         )
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
-
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     params_name = pl.get_string_attrib(element, "params-name")
 
     # Get final variables list
@@ -80,5 +76,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "names_user_description": names_user_description,
         "has_names_user_description": has_names_user_description,
     }
-    with open("pl-external-grader-variables.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template(
+        "pl-external-grader-variables.mustache", html_params
+    ).strip()
@@ -1,7 +1,6 @@
 import os
 from enum import Enum
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from typing_extensions import assert_never
@@ -29,8 +28,7 @@ DIRECTORY_PATH_DICT = {
 }
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     pl.check_attribs(
         element,
         required_attribs=["file-name"],
@@ -61,9 +59,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             )
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
-
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     # Get file name or raise exception if one does not exist
     file_name = pl.get_string_attrib(element, "file-name")
 
@@ -100,5 +96,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
 
     # Create and return html
     html_params = {"src": file_url, "width": width, "inline": inline, "alt": alt_text}
-    with open("pl-figure.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-figure.mustache", html_params).strip()
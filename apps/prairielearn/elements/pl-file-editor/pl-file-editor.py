@@ -2,7 +2,6 @@ import base64
 import hashlib
 import os
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from text_unidecode import unidecode
@@ -26,8 +25,7 @@ def get_answer_name(file_name: str) -> str:
     return "_file_editor_{}".format(hashlib.sha1(file_name.encode("utf-8")).hexdigest())
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["file-name"]
     optional_attribs = [
         "ace-mode",
@@ -146,12 +144,10 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     else:
         html_params["current_file_contents"] = html_params["original_file_contents"]
 
-    with open("pl-file-editor.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-file-editor.mustache", html_params).strip()
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     file_name = pl.get_string_attrib(element, "file-name", "")
     answer_name = get_answer_name(file_name)
     normalize_to_ascii = pl.get_boolean_attrib(
@@ -1,11 +1,9 @@
-import chevron
 import lxml.html
 import prairielearn as pl
 from prairielearn.colors import PLColor
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = []
     pl.check_attribs(element, required_attribs, optional_attribs)
@@ -37,5 +35,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         ],
     }
 
-    with open("pl-file-preview.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-file-preview.mustache", html_params).strip()
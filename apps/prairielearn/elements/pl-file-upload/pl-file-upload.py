@@ -3,7 +3,6 @@ import hashlib
 import json
 from io import StringIO
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from prairielearn.colors import PLColor
@@ -33,8 +32,7 @@ def add_format_error(data: pl.QuestionData, error_string: str) -> None:
     pl.add_files_format_error(data, error_string)
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["file-names"]
     optional_attribs = []
     pl.check_attribs(element, required_attribs, optional_attribs)
@@ -79,12 +77,10 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "check_icon_color": PLColor("correct_green"),
     }
 
-    with open("pl-file-upload.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-file-upload.mustache", html_params).strip()
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     raw_file_names = pl.get_string_attrib(element, "file-names", "")
     required_file_names = get_file_names_as_array(raw_file_names)
     answer_name = get_answer_name(raw_file_names)
@@ -1,6 +1,5 @@
 import math
 
-import chevron
 import lxml.etree
 import lxml.html
 import prairielearn as pl
@@ -11,8 +10,7 @@ PRIORITY_DEFAULT = -1
 HINT_NAME_DEFAULT = None
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     pl.check_attribs(element, [], [])
 
     # Parse hints from frontend
@@ -58,5 +56,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
 
             hints_to_display.append(hint_dict)
 
-    with open("pl-hidden-hints.mustache") as f:
-        return chevron.render(f, {"hints": hints_to_display}).strip()
+    return pl.render_template(
+        "pl-hidden-hints.mustache", {"hints": hints_to_display}
+    ).strip()
@@ -6,15 +6,13 @@ SUBMISSION_DEFAULT = False
 ANSWER_DEFAULT = False
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = ["question", "submission", "answer"]
     pl.check_attribs(element, required_attribs, optional_attribs)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     hide_in_question = pl.get_boolean_attrib(element, "question", QUESTION_DEFAULT)
     hide_in_submission = pl.get_boolean_attrib(
         element, "submission", SUBMISSION_DEFAULT
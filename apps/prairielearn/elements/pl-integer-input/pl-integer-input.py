@@ -2,7 +2,6 @@ import random
 from enum import Enum
 from typing import Any
 
-import chevron
 import lxml.html
 import numpy as np
 import prairielearn as pl
@@ -30,8 +29,7 @@ SHOW_SCORE_DEFAULT = True
 INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-integer-input.mustache"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -78,8 +76,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             ) from exc
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
     aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
@@ -94,9 +91,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     raw_submitted_answer = data["raw_submitted_answers"].get(name)
     score = data["partial_scores"].get(name, {"score": None}).get("score")
 
-    with open(INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
-
     if data["panel"] == "question":
         editable = data["editable"]
 
@@ -108,7 +102,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "zero_base": base == 0,
         }
 
-        info = chevron.render(template, info_params).strip()
+        info = pl.render_template(
+            INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, info_params
+        ).strip()
 
         if pl.has_attrib(element, "placeholder"):
             placeholder = pl.get_string_attrib(element, "placeholder")
@@ -140,7 +136,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         html_params = {
@@ -197,7 +195,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "missing_input", False
         )
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         a_tru = pl.from_json(data["correct_answers"].get(name))
@@ -215,13 +215,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "suffix": suffix,
         }
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     base = pl.get_integer_attrib(element, "base", BASE_DEFAULT)
 
@@ -235,9 +236,6 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
 
     a_sub = str(a_sub)
 
-    with open(INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
-
     if a_sub.strip() == "":
         if pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT):
             a_sub = str(
@@ -252,7 +250,9 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
                 "zero_base": base == 0,
             }
 
-            data["format_errors"][name] = chevron.render(template, opts).strip()
+            data["format_errors"][name] = pl.render_template(
+                INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, opts
+            ).strip()
             data["submitted_answers"][name] = None
             return
 
@@ -266,7 +266,9 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
             "zero_base": base == 0,
         }
 
-        data["format_errors"][name] = chevron.render(template, opts).strip()
+        data["format_errors"][name] = pl.render_template(
+            INTEGER_INPUT_MUSTACHE_TEMPLATE_NAME, opts
+        ).strip()
         data["submitted_answers"][name] = None
     elif not pl.is_int_json_serializable(a_sub_parsed):
         # The base used for the answer is ignored in this storage
@@ -276,8 +278,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         data["submitted_answers"][name] = a_sub_parsed
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     base = pl.get_integer_attrib(element, "base", BASE_DEFAULT)
 
@@ -307,8 +308,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     pl.grade_answer_parameterized(data, name, grade_function, weight=weight)
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     base = pl.get_integer_attrib(element, "base", BASE_DEFAULT)
@@ -3,7 +3,6 @@ from collections.abc import Callable
 from enum import Enum
 from typing import Any, TypeVar
 
-import chevron
 import lxml.html
 import prairielearn as pl
 
@@ -132,9 +131,7 @@ def categorize_matches(
     return list(options.values()), statements
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
-
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -272,8 +269,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     data["correct_answers"][name] = correct_matches
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
 
@@ -306,8 +302,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
             )
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     display_statements, display_options = data["params"].get(name, ([], []))
     options_placement = pl.get_enum_attrib(
@@ -384,8 +379,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        with open("pl-matching.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-matching.mustache", html_params).strip()
     elif data["panel"] == "submission":
         parse_error = data["format_errors"].get(name, None)
 
@@ -439,8 +433,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 score_type, score_value = pl.determine_score_params(score)
                 html_params[score_type] = score_value
 
-            with open("pl-matching.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template("pl-matching.mustache", html_params).strip()
     elif data["panel"] == "answer":
         if not pl.get_boolean_attrib(
             element, "hide-answer-panel", HIDE_ANSWER_PANEL_DEFAULT
@@ -474,14 +467,12 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 "counter_type": counter_type,
                 "no_counters": no_counters,
             }
-            with open("pl-matching.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template("pl-matching.mustache", html_params).strip()
 
     return html
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     partial_credit = pl.get_boolean_attrib(
@@ -511,8 +502,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     data["partial_scores"][name] = {"score": score, "weight": weight}
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
 
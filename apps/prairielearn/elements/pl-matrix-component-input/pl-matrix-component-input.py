@@ -4,7 +4,6 @@ from enum import Enum
 from html import escape
 from typing import Literal
 
-import chevron
 import lxml.html
 import numpy as np
 import prairielearn as pl
@@ -31,8 +30,7 @@ ALLOW_BLANK_DEFAULT = False
 BLANK_VALUE_DEFAULT = 0
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -74,8 +72,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             )
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     # get the name of the element, in this case, the name of the array
     name = pl.get_string_attrib(element, "answers-name")
     label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
@@ -164,12 +161,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             assert_never(comparison)
 
         info_params["allow_fractions"] = allow_fractions
-        with open("pl-matrix-component-input.mustache", encoding="utf-8") as f:
-            info = chevron.render(f, info_params).strip()
-        with open("pl-matrix-component-input.mustache", encoding="utf-8") as f:
-            info_params.pop("format", None)
-            info_params["shortformat"] = True
-            shortinfo = chevron.render(f, info_params).strip()
+        info = pl.render_template(
+            "pl-matrix-component-input.mustache", info_params
+        ).strip()
+        info_params.pop("format", None)
+        info_params["shortformat"] = True
+        shortinfo = pl.render_template(
+            "pl-matrix-component-input.mustache", info_params
+        ).strip()
 
         html_params: dict[str, bool | str | float | None] = {
             "question": True,
@@ -189,8 +188,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        with open("pl-matrix-component-input.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template(
+            "pl-matrix-component-input.mustache", html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         parse_error = data["format_errors"].get(name, None)
@@ -279,8 +279,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "missing_input", False
         )
 
-        with open("pl-matrix-component-input.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template(
+            "pl-matrix-component-input.mustache", html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         # Get true answer - do nothing if it does not exist
@@ -326,8 +327,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 "latex_data": latex_data,
             }
 
-            with open("pl-matrix-component-input.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template(
+                "pl-matrix-component-input.mustache", html_params
+            ).strip()
         else:
             html = ""
 
@@ -337,8 +339,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     return html
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     allow_fractions = pl.get_boolean_attrib(
         element, "allow-fractions", ALLOW_FRACTIONS_DEFAULT
@@ -384,17 +385,16 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
                 data["submitted_answers"][each_entry_name] = None
 
     if invalid_format:
-        with open("pl-matrix-component-input.mustache", encoding="utf-8") as f:
-            data["format_errors"][name] = chevron.render(
-                f, {"format_error": True, "allow_fractions": allow_fractions}
-            ).strip()
+        data["format_errors"][name] = pl.render_template(
+            "pl-matrix-component-input.mustache",
+            {"format_error": True, "allow_fractions": allow_fractions},
+        ).strip()
         data["submitted_answers"][name] = None
     else:
         data["submitted_answers"][name] = pl.to_json(matrix)
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     allow_partial_credit = pl.get_boolean_attrib(
         element, "allow-partial-credit", ALLOW_PARTIAL_CREDIT_DEFAULT
@@ -477,8 +477,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         }
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     allow_partial_credit = pl.get_boolean_attrib(
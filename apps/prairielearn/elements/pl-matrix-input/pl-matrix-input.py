@@ -1,6 +1,5 @@
 import random
 
-import chevron
 import lxml.html
 import numpy as np
 import prairielearn as pl
@@ -16,8 +15,7 @@ ALLOW_COMPLEX_DEFAULT = False
 SHOW_HELP_TEXT_DEFAULT = True
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -35,8 +33,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     pl.check_answers_names(data, name)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
     aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
@@ -94,12 +91,10 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         info_params["allow_complex"] = pl.get_boolean_attrib(
             element, "allow-complex", ALLOW_COMPLEX_DEFAULT
         )
-        with open("pl-matrix-input.mustache", encoding="utf-8") as f:
-            info = chevron.render(f, info_params).strip()
-        with open("pl-matrix-input.mustache", encoding="utf-8") as f:
-            info_params.pop("format", None)
-            info_params["shortformat"] = True
-            shortinfo = chevron.render(f, info_params).strip()
+        info = pl.render_template("pl-matrix-input.mustache", info_params).strip()
+        info_params.pop("format", None)
+        info_params["shortformat"] = True
+        shortinfo = pl.render_template("pl-matrix-input.mustache", info_params).strip()
 
         html_params: dict[str, bool | str | float | None] = {
             "question": True,
@@ -125,8 +120,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             html_params["raw_submitted_answer"] = pl.escape_unicode_string(
                 raw_submitted_answer
             )
-        with open("pl-matrix-input.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-matrix-input.mustache", html_params).strip()
 
     elif data["panel"] == "submission":
         parse_error = data["format_errors"].get(name, None)
@@ -173,8 +167,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "missing_input", False
         )
 
-        with open("pl-matrix-input.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-matrix-input.mustache", html_params).strip()
 
     elif data["panel"] == "answer":
         # Get true answer - do nothing if it does not exist
@@ -227,8 +220,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 html_params["default_is_matlab"] = True
             else:
                 html_params["default_is_python"] = True
-            with open("pl-matrix-input.mustache", encoding="utf-8") as f:
-                html = chevron.render(f, html_params).strip()
+            html = pl.render_template("pl-matrix-input.mustache", html_params).strip()
         else:
             html = ""
 
@@ -240,14 +232,12 @@ def render(element_html: str, data: pl.QuestionData) -> str:
 
 def get_format_string(message: str) -> str:
     params = {"format_error": True, "format_error_message": message}
-    with open("pl-matrix-input.mustache", encoding="utf-8") as f:
-        return chevron.render(f, params).strip()
+    return pl.render_template("pl-matrix-input.mustache", params).strip()
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     # By convention, this function returns at the first error found
 
-    element = lxml.html.fragment_fromstring(element_html)
     name = pl.get_string_attrib(element, "answers-name")
     allow_complex = pl.get_boolean_attrib(
         element, "allow-complex", ALLOW_COMPLEX_DEFAULT
@@ -276,8 +266,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
     data["submitted_answers"]["_pl_matrix_input_format"][name] = info["format_type"]
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
 
     # Get weight
@@ -333,8 +322,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         data["partial_scores"][name] = {"score": 0, "weight": weight}
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
 
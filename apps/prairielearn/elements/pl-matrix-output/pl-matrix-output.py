@@ -1,4 +1,3 @@
-import chevron
 import lxml.html
 import numpy as np
 import prairielearn as pl
@@ -6,13 +5,11 @@ import prairielearn as pl
 DIGITS_DEFAULT = 2
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     pl.check_attribs(element, required_attribs=[], optional_attribs=["digits"])
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
 
     matlab_data = ""
@@ -77,7 +74,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "uuid": pl.get_uuid(),
     }
 
-    with open("pl-matrix-output.mustache", encoding="utf-8") as f:
-        html = chevron.render(f, html_params).strip()
+    html = pl.render_template("pl-matrix-output.mustache", html_params).strip()
 
     return html
@@ -6,7 +6,6 @@ from collections import Counter
 from enum import Enum
 from typing import NamedTuple
 
-import chevron
 import lxml.etree
 import lxml.html
 import prairielearn as pl
@@ -380,8 +379,7 @@ def prepare_answers_to_display(
     return sampled_answers
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -481,8 +479,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     data["correct_answers"][name] = correct_answer
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
 
     hide_score_badge = pl.get_boolean_attrib(
@@ -556,8 +553,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        with open(MULTIPLE_CHOICE_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-            return chevron.render(f, html_params).strip()
+        return pl.render_template(
+            MULTIPLE_CHOICE_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         parse_error = data["format_errors"].get(name, None)
@@ -592,8 +590,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 html_params["display_feedback"] = True
                 html_params["feedback"] = feedback
 
-        with open(MULTIPLE_CHOICE_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-            return chevron.render(f, html_params).strip()
+        return pl.render_template(
+            MULTIPLE_CHOICE_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         correct_answer = data["correct_answers"].get(name, None)
@@ -612,14 +611,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 element, "hide-letter-keys", HIDE_LETTER_KEYS_DEFAULT
             ),
         }
-        with open(MULTIPLE_CHOICE_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-            return chevron.render(f, html_params).strip()
+        return pl.render_template(
+            MULTIPLE_CHOICE_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
 
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
@@ -637,8 +636,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         return
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
 
@@ -660,8 +658,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     pl.grade_answer_parameterized(data, name, grade_multiple_choice, weight)
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
 
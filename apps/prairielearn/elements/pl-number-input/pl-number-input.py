@@ -2,7 +2,6 @@ import random
 from enum import Enum
 from typing import Any
 
-import chevron
 import lxml.html
 import numpy as np
 import prairielearn as pl
@@ -45,8 +44,7 @@ ANSWER_INSUFFICIENT_PRECISION_WARNING = (
 NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-number-input.mustache"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -71,17 +69,17 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         "placeholder",
         "show-score",
     ]
-    pl.check_attribs(element, required_attribs, optional_attribs)
-    name = pl.get_string_attrib(element, "answers-name")
+    attribs = pl.get_attribs(element, required_attribs, optional_attribs)
+    name = attribs.get_string("answers-name")
     pl.check_answers_names(data, name)
 
-    correct_answer = pl.get_float_attrib(element, "correct-answer", None)
+    correct_answer = attribs.get_float("correct-answer", None)
     if correct_answer is not None:
         if name in data["correct_answers"]:
             raise ValueError(f"duplicate correct_answers variable name: {name}")
         data["correct_answers"][name] = correct_answer
 
-    custom_format = pl.get_string_attrib(element, "custom-format", None)
+    custom_format = attribs.get_string("custom-format", None)
     if custom_format is not None:
         try:
             _ = ("{:" + custom_format + "}").format(0)
@@ -90,15 +88,13 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
 
 
 def format_true_ans(
-    element: lxml.html.HtmlElement, data: pl.QuestionData, name: str
+    attribs: pl.ElementAttribs, data: pl.QuestionData, name: str
 ) -> str:
     correct_answer = pl.from_json(data["correct_answers"].get(name, None))
     if correct_answer is not None:
         # Get format and comparison parameters
-        custom_format = pl.get_string_attrib(element, "custom-format", None)
-        comparison = pl.get_enum_attrib(
-            element, "comparison", ComparisonType, COMPARISON_DEFAULT
-        )
+        custom_format = attribs.get_string("custom-format", None)
+        comparison = attribs.get_enum("comparison", ComparisonType, COMPARISON_DEFAULT)
 
         # Correct answers may be specified as strings, so we need to convert them
         # to numbers for formatting. See the note in `grade()` for why we cast to
@@ -114,10 +110,10 @@ def format_true_ans(
             # FIXME: render correctly with respect to rtol and atol
             correct_answer = f"{correct_answer:.12g}"
         elif comparison is ComparisonType.SIGFIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             correct_answer = pl.string_from_number_sigfig(correct_answer, digits=digits)
         elif comparison is ComparisonType.DECDIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             correct_answer = "{:.{ndigits}f}".format(correct_answer, ndigits=digits)
         else:
             assert_never(comparison)
@@ -149,31 +145,23 @@ def get_string_decimal_digits(number_string: str) -> int:
     return 0  # no decimal seperator means there are no decimal digits
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
-    name = pl.get_string_attrib(element, "answers-name")
-    label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
-    aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
-    suffix = pl.get_string_attrib(element, "suffix", None)
-    display = pl.get_enum_attrib(element, "display", DisplayType, DISPLAY_DEFAULT)
-    allow_fractions = pl.get_boolean_attrib(
-        element, "allow-fractions", ALLOW_FRACTIONS_DEFAULT
-    )
-    custom_format = pl.get_string_attrib(
-        element, "custom-format", CUSTOM_FORMAT_DEFAULT
-    )
-    show_score = pl.get_boolean_attrib(element, "show-score", SHOW_SCORE_DEFAULT)
-    show_correct_answer = pl.get_boolean_attrib(
-        element, "show-correct-answer", SHOW_CORRECT_ANSWER_DEFAULT
-    )
-    show_help_text = pl.get_boolean_attrib(
-        element, "show-help-text", SHOW_HELP_TEXT_DEFAULT
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
+    attribs = pl.get_attribs(element)
+    name = attribs.get_string("answers-name")
+    label = attribs.get_string("label", LABEL_DEFAULT)
+    aria_label = attribs.get_string("aria-label", ARIA_LABEL_DEFAULT)
+    suffix = attribs.get_string("suffix", None)
+    display = attribs.get_enum("display", DisplayType, DISPLAY_DEFAULT)
+    allow_fractions = attribs.get_boolean("allow-fractions", ALLOW_FRACTIONS_DEFAULT)
+    custom_format = attribs.get_string("custom-format", CUSTOM_FORMAT_DEFAULT)
+    show_score = attribs.get_boolean("show-score", SHOW_SCORE_DEFAULT)
+    show_correct_answer = attribs.get_boolean(
+        "show-correct-answer", SHOW_CORRECT_ANSWER_DEFAULT
     )
+    show_help_text = attribs.get_boolean("show-help-text", SHOW_HELP_TEXT_DEFAULT)
     raw_submitted_answer = data["raw_submitted_answers"].get(name)
     partial_score = data["partial_scores"].get(name, {"score": None})
     score = partial_score.get("score", None)
-    with open(NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
 
     if data["panel"] == "question":
         editable = data["editable"]
@@ -186,7 +174,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "aria_label": aria_label,
             "suffix": suffix,
             "editable": editable,
-            "size": pl.get_integer_attrib(element, "size", SIZE_DEFAULT),
+            "size": attribs.get_integer("size", SIZE_DEFAULT),
             "uuid": pl.get_uuid(),
             "show_score": show_score,
             "parse_error": parse_error,
@@ -199,13 +187,11 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             html_params[score_type] = score_value
 
         # Get comparison parameters and info strings
-        comparison = pl.get_enum_attrib(
-            element, "comparison", ComparisonType, COMPARISON_DEFAULT
-        )
+        comparison = attribs.get_enum("comparison", ComparisonType, COMPARISON_DEFAULT)
 
         if comparison is ComparisonType.RELABS:
-            rtol = pl.get_float_attrib(element, "rtol", RTOL_DEFAULT)
-            atol = pl.get_float_attrib(element, "atol", ATOL_DEFAULT)
+            rtol = attribs.get_float("rtol", RTOL_DEFAULT)
+            atol = attribs.get_float("atol", ATOL_DEFAULT)
             if rtol < 0:
                 raise ValueError(f"Attribute rtol = {rtol:g} must be non-negative")
             if atol < 0:
@@ -217,7 +203,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 "atol": f"{atol:g}",
             }
         elif comparison is ComparisonType.SIGFIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             if digits < 0:
                 raise ValueError(f"Attribute digits = {digits:d} must be non-negative")
             info_params = {
@@ -228,7 +214,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 "digits_plural": digits > 1,
             }
         elif comparison is ComparisonType.DECDIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             if digits < 0:
                 raise ValueError(f"Attribute digits = {digits:d} must be non-negative")
             info_params = {
@@ -242,31 +228,35 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             assert_never(comparison)
 
         # Update parameters for the info popup
-        info_params["allow_complex"] = pl.get_boolean_attrib(
-            element, "allow-complex", ALLOW_COMPLEX_DEFAULT
+        info_params["allow_complex"] = attribs.get_boolean(
+            "allow-complex", ALLOW_COMPLEX_DEFAULT
         )
         info_params["show_info"] = show_help_text
         info_params["allow_fractions"] = allow_fractions
 
         # Find the true answer to be able to display it in the info popup
         if show_correct_answer:
-            html_params["correct_answer"] = format_true_ans(element, data, name)
+            html_params["correct_answer"] = format_true_ans(attribs, data, name)
 
-        html_params["info"] = chevron.render(template, info_params).strip()
+        html_params["info"] = pl.render_template(
+            NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, info_params
+        ).strip()
 
         # Within mustache, the shortformat generates the placeholder that is used as a placeholder inside of the numeric entry.
         # Here we opt to not generate the value, hence the placeholder is empty.
         # The placeholder text may be overriden by setting the 'placeholder' attribute in the pl-number-input HTML tag
-        if pl.has_attrib(element, "placeholder"):
+        if attribs.has("placeholder"):
             # 'placeholder' attribute is set, override the placeholder text
-            html_params["placeholder"] = pl.get_string_attrib(element, "placeholder")
+            html_params["placeholder"] = attribs.get_string("placeholder")
         else:
             info_params.pop("format", None)
             # 'placeholder' attribute not set, use default shortformat as placeholder text
-            info_params["shortformat"] = pl.get_boolean_attrib(
-                element, "show-placeholder", SHOW_PLACEHOLDER_DEFAULT
+            info_params["shortformat"] = attribs.get_boolean(
+                "show-placeholder", SHOW_PLACEHOLDER_DEFAULT
             )
-            html_params["placeholder"] = chevron.render(template, info_params).strip()
+            html_params["placeholder"] = pl.render_template(
+                NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, info_params
+            ).strip()
 
         # Determine the title of the popup based on what information is being shown
         html_params["popup_title"] = "Number" if show_help_text else "Correct Answer"
@@ -275,7 +265,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         if show_help_text:
             html_params["show_info"] = True
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         parse_error = data["format_errors"].get(name, None)
@@ -306,7 +298,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             )
         # Add true answer to be able to display it in the submitted answer panel
         if show_correct_answer:
-            html_params["correct_answer"] = format_true_ans(element, data, name)
+            html_params["correct_answer"] = format_true_ans(attribs, data, name)
 
         if score is not None:
             score_type, score_value = pl.determine_score_params(score)
@@ -318,7 +310,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
 
         html_params["feedback"] = partial_score.get("feedback", None)
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         if show_correct_answer:
@@ -326,9 +320,11 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 "answer": True,
                 "label": label,
                 "suffix": suffix,
-                "correct_answer": format_true_ans(element, data, name),
+                "correct_answer": format_true_ans(attribs, data, name),
             }
-            return chevron.render(template, html_params).strip()
+            return pl.render_template(
+                NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+            ).strip()
         return ""
 
     assert_never(data["panel"])
@@ -345,21 +341,16 @@ def get_format_string(
         "allow_fractions": allow_fractions,
         "format_error_message": message,
     }
-    with open(NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        return chevron.render(f, params).strip()
+    return pl.render_template(NUMBER_INPUT_MUSTACHE_TEMPLATE_NAME, params).strip()
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
-    name = pl.get_string_attrib(element, "answers-name")
-    allow_complex = pl.get_boolean_attrib(
-        element, "allow-complex", ALLOW_COMPLEX_DEFAULT
-    )
-    allow_fractions = pl.get_boolean_attrib(
-        element, "allow-fractions", ALLOW_FRACTIONS_DEFAULT
-    )
-    allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
-    blank_value = pl.get_string_attrib(element, "blank-value", str(BLANK_VALUE_DEFAULT))
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
+    attribs = pl.get_attribs(element)
+    name = attribs.get_string("answers-name")
+    allow_complex = attribs.get_boolean("allow-complex", ALLOW_COMPLEX_DEFAULT)
+    allow_fractions = attribs.get_boolean("allow-fractions", ALLOW_FRACTIONS_DEFAULT)
+    allow_blank = attribs.get_boolean("allow-blank", ALLOW_BLANK_DEFAULT)
+    blank_value = attribs.get_string("blank-value", str(BLANK_VALUE_DEFAULT))
 
     submitted_answer = data["submitted_answers"].get(name, None)
     if allow_blank and submitted_answer is not None and submitted_answer.strip() == "":
@@ -379,12 +370,12 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         data["submitted_answers"][name] = None
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
-    name = pl.get_string_attrib(element, "answers-name")
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
+    attribs = pl.get_attribs(element)
+    name = attribs.get_string("answers-name")
 
     # Get weight
-    weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
+    weight = attribs.get_integer("weight", WEIGHT_DEFAULT)
 
     # Get true answer (if it does not exist, create no grade - leave it
     # up to the question code)
@@ -393,9 +384,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         return
 
     # Get method of comparison, with relabs as default
-    comparison = pl.get_enum_attrib(
-        element, "comparison", ComparisonType, COMPARISON_DEFAULT
-    )
+    comparison = attribs.get_enum("comparison", ComparisonType, COMPARISON_DEFAULT)
 
     def grade_function(
         submitted_answer: str | dict[str, Any],
@@ -434,8 +423,8 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
 
         # Compare submitted answer with true answer
         if comparison is ComparisonType.RELABS:
-            rtol = pl.get_float_attrib(element, "rtol", RTOL_DEFAULT)
-            atol = pl.get_float_attrib(element, "atol", ATOL_DEFAULT)
+            rtol = attribs.get_float("rtol", RTOL_DEFAULT)
+            atol = attribs.get_float("atol", ATOL_DEFAULT)
 
             submitted_answer_precision = get_string_precision(str(submitted_answer))
             is_correct = pl.is_correct_scalar_ra(
@@ -445,7 +434,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
                 feedback = ANSWER_INSUFFICIENT_PRECISION_WARNING
 
         elif comparison is ComparisonType.SIGFIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
 
             submitted_answer_precision = get_string_significant_digits(
                 str(submitted_answer)
@@ -456,7 +445,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
             if not is_correct and (submitted_answer_precision < digits):
                 feedback = ANSWER_INSUFFICIENT_PRECISION_WARNING
         elif comparison is ComparisonType.DECDIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             submitted_answer_precision = get_string_decimal_digits(
                 str(submitted_answer)
             )
@@ -468,8 +457,8 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
         else:
             assert_never(comparison)
 
-        if is_correct and pl.get_boolean_attrib(
-            element, "show-correct-answer", SHOW_CORRECT_ANSWER_DEFAULT
+        if is_correct and attribs.get_boolean(
+            "show-correct-answer", SHOW_CORRECT_ANSWER_DEFAULT
         ):
             feedback = (
                 f"The correct answer used for grading was {correct_answer_converted}"
@@ -479,18 +468,14 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     pl.grade_answer_parameterized(data, name, grade_function, weight=weight)
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
-    name = pl.get_string_attrib(element, "answers-name")
-    weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
-    allow_complex = pl.get_boolean_attrib(
-        element, "allow-complex", ALLOW_COMPLEX_DEFAULT
-    )
-    allow_fractions = pl.get_boolean_attrib(
-        element, "allow-fractions", ALLOW_FRACTIONS_DEFAULT
-    )
-    show_correct = pl.get_boolean_attrib(
-        element, "show-correct-answer", SHOW_CORRECT_ANSWER_DEFAULT
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
+    attribs = pl.get_attribs(element)
+    name = attribs.get_string("answers-name")
+    weight = attribs.get_integer("weight", WEIGHT_DEFAULT)
+    allow_complex = attribs.get_boolean("allow-complex", ALLOW_COMPLEX_DEFAULT)
+    allow_fractions = attribs.get_boolean("allow-fractions", ALLOW_FRACTIONS_DEFAULT)
+    show_correct = attribs.get_boolean(
+        "show-correct-answer", SHOW_CORRECT_ANSWER_DEFAULT
     )
     result = data["test_type"]
     correct_answer_converted = 0
@@ -524,9 +509,7 @@ def test(element_html: str, data: pl.ElementTestData) -> None:
             "weight": weight,
         }
         # Get method of comparison, with relabs as default
-        comparison = pl.get_enum_attrib(
-            element, "comparison", ComparisonType, COMPARISON_DEFAULT
-        )
+        comparison = attribs.get_enum("comparison", ComparisonType, COMPARISON_DEFAULT)
         feedback = None
 
         def formatted_answer(answer: float) -> str:
@@ -539,8 +522,8 @@ def test(element_html: str, data: pl.ElementTestData) -> None:
             )
 
         if comparison is ComparisonType.RELABS:
-            rtol = pl.get_float_attrib(element, "rtol", RTOL_DEFAULT)
-            atol = pl.get_float_attrib(element, "atol", ATOL_DEFAULT)
+            rtol = attribs.get_float("rtol", RTOL_DEFAULT)
+            atol = attribs.get_float("atol", ATOL_DEFAULT)
             # Get max error according to numpy.allclose()
             eps = np.absolute(correct_answer_converted) * rtol + atol
             # eps += random.uniform(1, 10)
@@ -552,7 +535,7 @@ def test(element_html: str, data: pl.ElementTestData) -> None:
                 else None
             )
         elif comparison is ComparisonType.SIGFIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             # Get max error according to pl.is_correct_scalar_sf()
             if correct_answer == 0:
                 n = digits - 1
@@ -573,7 +556,7 @@ def test(element_html: str, data: pl.ElementTestData) -> None:
                 else None
             )
         elif comparison is ComparisonType.DECDIG:
-            digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
+            digits = attribs.get_integer("digits", DIGITS_DEFAULT)
             # Get max error according to pl.is_correct_scalar_dd()
             eps = 0.51 * (10**-digits)
             eps += random.uniform(1, 10)
@@ -1,10 +1,27 @@
-import itertools
 from collections import Counter
-from collections.abc import Iterable, Mapping, Sequence
-from copy import deepcopy
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import NamedTuple
 
 import networkx as nx
 
+# The number of distinct problems whose compiled DAG is kept by `compile_dag`.
+COMPILED_DAG_CACHE_SIZE = 64
+
+
+class CompiledDag(NamedTuple):
+    """
+    The structures needed to grade submissions to a problem, which only depend on the problem.
+    These are shared between calls, so they must not be modified.
+    """
+
+    graph: nx.DiGraph
+    """The DAG returned by `dag_to_nx`."""
+    node_bits: dict[str, int]
+    """The bit assigned to each node in the bitsets of `reachable`."""
+    reachable: dict[str, int]
+    """For each node, a bitset of the nodes that must come after it in any correct solution."""
+
 
 def validate_grouping(
     graph: nx.DiGraph, group_belonging: Mapping[str, str | None]
@@ -143,7 +160,7 @@ def add_edges_for_groups(
 
     # if a node N depends on a group G, node N should depend on all blocks in G
     for node in graph.nodes():
-        for dependency, _ in deepcopy(graph.in_edges(node)):
+        for dependency, _ in list(graph.in_edges(node)):
             if dependency in groups:
                 graph.add_edges_from([(tag, node) for tag in groups[dependency]])
 
@@ -166,7 +183,7 @@ def grade_dag(
     :return: tuple containing length of list that meets both correctness conditions, starting from the beginning,
     and the length of any correct solution
     """
-    graph = dag_to_nx(depends_graph, group_belonging)
+    graph = compile_dag(depends_graph, group_belonging).graph
 
     top_sort_correctness = check_topological_sorting(submission, graph)
     grouping_correctness = check_grouping(submission, group_belonging)
@@ -174,13 +191,85 @@ def grade_dag(
     return min(top_sort_correctness, grouping_correctness), graph.number_of_nodes()
 
 
-def is_vertex_cover(G: nx.DiGraph, vertex_cover: Iterable[str]) -> bool:
+def reachability_masks(graph: nx.DiGraph) -> tuple[dict[str, int], dict[str, int]]:
+    """
+    Compute the transitive closure of a DAG as bitsets.
+    :param graph: the DAG
+    :return: a tuple of the bit index assigned to each node, and for each node, a bitset of the
+    nodes reachable from it (i.e. the nodes that must come after it in any correct solution)
+    """
+    index = {node: i for i, node in enumerate(graph.nodes())}
+    reachable: dict[str, int] = {}
+    for node in reversed(list(nx.topological_sort(graph))):
+        mask = 0
+        for successor in graph.successors(node):
+            mask |= (1 << index[successor]) | reachable[successor]
+        reachable[node] = mask
+    return index, reachable
+
+
+def compile_dag(
+    depends_graph: Mapping[str, list[str]], group_belonging: Mapping[str, str | None]
+) -> CompiledDag:
+    """
+    Build the DAG for a problem along with its transitive closure. The result is cached, since
+    every submission to a variant is graded against the same problem.
+    :param depends_graph: The dependency graph between blocks specified in the question
+    :param group_belonging: which pl-block-group each block belongs to, specified in the question
+    :return: the compiled DAG
     """
-    Taken from
-    https://docs.ocean.dwavesys.com/en/stable/docs_dnx/reference/algorithms/generated/dwave_networkx.algorithms.cover.is_vertex_cover.html
+    return _compile_dag_cached(
+        tuple((node, tuple(depends)) for node, depends in depends_graph.items()),
+        tuple(group_belonging.items()),
+    )
+
+
+@lru_cache(maxsize=COMPILED_DAG_CACHE_SIZE)
+def _compile_dag_cached(
+    depends_graph: tuple[tuple[str, tuple[str, ...]], ...],
+    group_belonging: tuple[tuple[str, str | None], ...],
+) -> CompiledDag:
+    graph = dag_to_nx(
+        {node: list(depends) for node, depends in depends_graph}, dict(group_belonging)
+    )
+    node_bits, reachable = reachability_masks(graph)
+    return CompiledDag(graph, node_bits, reachable)
+
+
+def max_bipartite_matching(
+    adjacency: Mapping[int, list[int]],
+    active: int,
+    initial: Mapping[int, int] | None = None,
+) -> dict[int, int]:
     """
-    cover = set(vertex_cover)
-    return all(u in cover or v in cover for u, v in G.edges)
+    Find a maximum matching with Kuhn's augmenting path algorithm.
+    :param adjacency: for each left vertex, the right vertices it is adjacent to
+    :param active: bitset of the vertices that may be used, on either side
+    :param initial: a matching to start from, as a mapping from right to left vertices; edges
+    with an inactive endpoint are dropped
+    :return: a maximum matching, as a mapping from right to left vertices
+    """
+    match_of_right = {
+        right: left
+        for right, left in (initial or {}).items()
+        if (active >> right) & 1 and (active >> left) & 1
+    }
+    matched_left = set(match_of_right.values())
+
+    def augment(left: int, visited: set[int]) -> bool:
+        for right in adjacency[left]:
+            if not (active >> right) & 1 or right in visited:
+                continue
+            visited.add(right)
+            if right not in match_of_right or augment(match_of_right[right], visited):
+                match_of_right[right] = left
+                return True
+        return False
+
+    for left in adjacency:
+        if (active >> left) & 1 and left not in matched_left:
+            augment(left, set())
+    return match_of_right
 
 
 def lcs_partial_credit(
@@ -194,13 +283,10 @@ def lcs_partial_credit(
     The naive solution would be to enumerate all topological sorts, then get the edit distance to each of them,
     but this would be too slow. Instead, our algorithm is as follows:
         1. Remove all distractors from the student solution
-        2. Construct the 'problematic subgraph'. We do this by finding the subset of nodes in the
-        graph that have some 'problematic' relation, meaning that there is a node before it in the
-        student solution that should be after it, or one after it that must be before, or nodes that
-        belong to the same pl-block-group are not contiguous with one another.
-        3. Find the minimum set of nodes to delete from the submission which will solve all problematic
-        relationships found in step 2.
-        4. Once we know the minimum required deletions, you may simply add nodes to the student
+        2. Find the minimum set of blocks to delete from the submission so that no remaining
+        block must occur before a block that precedes it in the submission, and so that the
+        remaining blocks of each pl-block-group are contiguous. See `min_deletions`.
+        3. Once we know the minimum required deletions, you may simply add nodes to the student
         solution until it is the correct solution, so you can directly calculate the edit distance.
     For more details, see the paper: https://arxiv.org/abs/2204.04196
     :param submission: the block ordering given by the student
@@ -208,66 +294,129 @@ def lcs_partial_credit(
     :param group_belonging: which pl-block-group each block belongs to, specified in the question
     :return: edit distance from the student submission to some correct solution
     """
-    graph = dag_to_nx(depends_graph, group_belonging)
-    trans_clos = nx.transitive_closure(graph)
+    dag = compile_dag(depends_graph, group_belonging)
     submission_no_distractors = [
         node for node in submission if node in depends_graph and node is not None
     ]
 
-    # if node1 must occur before node2 in any correct solution, but node2 occurs before
-    # node1 in the submission, add them both and an edge between them to the problematic subgraph
-    seen = set()
-    problematic_subgraph = nx.DiGraph()
-    for node1 in submission_no_distractors:
-        for node2 in seen:
-            if trans_clos.has_edge(node1, node2):
-                problematic_subgraph.add_edge(node1, node2)
-        seen.add(node1)
-
-    # if two nodes are in the same `pl-block-group`, but don't occur next to one another in the
-    # submission, add them and all nodes in between to the problematic subgraph
-    for i in range(len(submission_no_distractors)):
-        for j in range(i + 2, len(submission_no_distractors)):
-            node1, node2 = submission_no_distractors[i], submission_no_distractors[j]
-            if group_belonging.get(node1) is None or group_belonging.get(
-                node1
-            ) != group_belonging.get(node2):
-                continue
-            if not all(
-                group_belonging[x] == group_belonging[node1]
-                for x in submission_no_distractors[i : j + 1]
-            ):
-                problematic_subgraph.add_nodes_from(
-                    submission_no_distractors[i : j + 1]
-                )
-
-    if problematic_subgraph.number_of_nodes() == 0:
-        mvc_size = 0
-    else:
-        mvc_size = problematic_subgraph.number_of_nodes() - 1
-        for i in range(1, problematic_subgraph.number_of_nodes() - 1):
-            for subset in itertools.combinations(problematic_subgraph, i):
-                # make sure deleting subset will resolve blocks out of order
-                if not is_vertex_cover(problematic_subgraph, subset):
-                    continue
-
-                # make sure deleting subset will resolve a separated pl-block-group
-                edited_submission = [
-                    x for x in submission_no_distractors if x not in subset
-                ]
-                edited_group_belonging = {
-                    key: group_belonging.get(key) for key in edited_submission
-                }
-                if len(edited_submission) == check_grouping(
-                    edited_submission, edited_group_belonging
-                ):
-                    mvc_size = len(subset)
-                    break
-
-            if mvc_size < problematic_subgraph.number_of_nodes() - 1:
-                break
+    mvc_size = min_deletions(submission_no_distractors, dag, group_belonging)
 
     num_distractors = len(submission) - len(submission_no_distractors)
     deletions_needed = num_distractors + mvc_size
-    insertions_needed = graph.number_of_nodes() - (len(submission) - deletions_needed)
+    insertions_needed = dag.graph.number_of_nodes() - (
+        len(submission) - deletions_needed
+    )
     return deletions_needed + insertions_needed
+
+
+def min_deletions(
+    submission: Sequence[str],
+    dag: CompiledDag,
+    group_belonging: Mapping[str, str | None],
+) -> int:
+    """
+    Find the minimum number of blocks to delete from a submission (without distractors) so that
+    the remaining blocks are in a correct relative order and each pl-block-group is contiguous.
+
+    Call a pair of positions i < j an inversion if the block at j must occur before the block at i.
+    Inversions form a partial order on positions, so the kept blocks are an antichain of it, and
+    by Dilworth's theorem the minimum number of deletions that removes every inversion is the size
+    of a maximum matching between the positions on either side of an inversion.
+
+    Blocks in a pl-block-group relate to every block outside it in the same way, so the only
+    extra constraint that groups add is that no other kept block lies between two kept blocks of
+    the group. For each group that is not already contiguous in the submission, we choose the
+    window of positions its kept blocks may span: group blocks outside the window and other
+    blocks inside it are deleted, and the remaining blocks are solved as above. The windows are
+    searched with branch and bound, using the matching without the remaining groups' constraints
+    as a lower bound. This is only exponential in the number of non-contiguous groups, which is
+    small in practice.
+    :param submission: the block ordering given by the student, without distractors
+    :param dag: the DAG returned by `compile_dag`
+    :param group_belonging: which pl-block-group each block belongs to
+    :return: the minimum number of blocks that must be deleted
+    """
+    index, reachable = dag.node_bits, dag.reachable
+
+    # An edge i -> j means positions i < j form an inversion
+    inversions: dict[int, list[int]] = {
+        i: [
+            j
+            for j in range(i + 1, len(submission))
+            if (reachable[submission[j]] >> index[submission[i]]) & 1
+        ]
+        for i in range(len(submission))
+    }
+
+    positions_by_group: dict[str, list[int]] = {}
+    for i, node in enumerate(submission):
+        group_tag = group_belonging.get(node)
+        if group_tag is not None:
+            positions_by_group.setdefault(group_tag, []).append(i)
+
+    # For each group that isn't contiguous, the bitsets of positions that must be deleted for
+    # each choice of window. Groups that are already contiguous stay contiguous after any
+    # deletions. Deleting more blocks never helps, so a window only needs to start at the
+    # beginning of a run of consecutive group blocks and end at the end of one, and deleting the
+    # whole group is never better than keeping a single run.
+    window_choices: list[list[int]] = []
+    for positions in positions_by_group.values():
+        if positions[-1] - positions[0] + 1 == len(positions):
+            continue
+        group_mask = sum(1 << i for i in positions)
+        runs: list[tuple[int, int]] = []
+        for i in positions:
+            if runs and runs[-1][1] == i - 1:
+                runs[-1] = (runs[-1][0], i)
+            else:
+                runs.append((i, i))
+        choices = []
+        for a, (left, _) in enumerate(runs):
+            for _, right in runs[a:]:
+                window = ((1 << (right + 1)) - 1) & ~((1 << left) - 1)
+                choices.append((group_mask & ~window) | (window & ~group_mask))
+        window_choices.append(choices)
+
+    all_positions = (1 << len(submission)) - 1
+    best = len(submission)
+    bounds: dict[int, tuple[int, dict[int, int]]] = {}
+
+    def lower_bound(
+        deleted: int, matching: Mapping[int, int]
+    ) -> tuple[int, dict[int, int]]:
+        if deleted not in bounds:
+            new_matching = max_bipartite_matching(
+                inversions, all_positions & ~deleted, matching
+            )
+            bounds[deleted] = (deleted.bit_count() + len(new_matching), new_matching)
+        return bounds[deleted]
+
+    def search(
+        remaining: frozenset[int], deleted: int, matching: Mapping[int, int]
+    ) -> None:
+        nonlocal best
+        if not remaining:
+            best = min(best, lower_bound(deleted, matching)[0])
+            return
+
+        # Every remaining group has to be made contiguous, so the cheapest window of each group
+        # gives a lower bound for this branch. Branch on the group with the largest such bound,
+        # trying its most promising windows first.
+        branches = {
+            group_index: sorted(
+                (
+                    (*lower_bound(deleted | forced, matching), deleted | forced)
+                    for forced in window_choices[group_index]
+                ),
+                key=lambda child: child[0],
+            )
+            for group_index in remaining
+        }
+        group_index = max(branches, key=lambda index: branches[index][0][0])
+        for bound, child_matching, child_deleted in branches[group_index]:
+            if bound >= best:
+                break
+            search(remaining - {group_index}, child_deleted, child_matching)
+
+    search(frozenset(range(len(window_choices))), 0, lower_bound(0, {})[1])
+    return best
@@ -1,5 +1,17 @@
+import itertools
+import random
+
+import networkx as nx
 import pytest
-from dag_checker import dag_to_nx, grade_dag, lcs_partial_credit, solve_dag
+from dag_checker import (
+    check_grouping,
+    compile_dag,
+    dag_to_nx,
+    grade_dag,
+    lcs_partial_credit,
+    min_deletions,
+    solve_dag,
+)
 
 problem_1_dag = {
     "1": [],
@@ -160,3 +172,81 @@ def test_solve_dag() -> None:
     for depends_graph, group_belonging in problems:
         solution = solve_dag(depends_graph, group_belonging)
         assert len(solution) == grade_dag(solution, depends_graph, group_belonging)[0]
+
+
+def brute_force_min_deletions(
+    submission: list[str],
+    depends_graph: dict[str, list[str]],
+    groups: dict[str, str | None],
+) -> int:
+    graph = dag_to_nx(depends_graph, groups)
+    trans_clos = nx.transitive_closure(graph)
+    for num_deleted in range(len(submission) + 1):
+        for kept in itertools.combinations(submission, len(submission) - num_deleted):
+            in_order = not any(
+                trans_clos.has_edge(kept[j], kept[i])
+                for i in range(len(kept))
+                for j in range(i + 1, len(kept))
+            )
+            kept_groups = {node: groups.get(node) for node in kept}
+            if in_order and check_grouping(kept, kept_groups) == len(kept):
+                return num_deleted
+    raise AssertionError("unreachable")
+
+
+def random_problem(
+    rng: random.Random, num_blocks: int
+) -> tuple[dict[str, list[str]], dict[str, str | None]]:
+    """Generate a random problem in which blocks are numbered in a correct order."""
+    groups: dict[str, str | None] = {}
+    i = 0
+    while i < num_blocks:
+        size = rng.choice([1, 1, 2, 3])
+        for j in range(i, min(i + size, num_blocks)):
+            groups[str(j)] = f"g{i}" if size > 1 else None
+        i += size
+
+    depends_graph: dict[str, list[str]] = {
+        tag: [] for tag in set(groups.values()) if tag
+    }
+    for j in range(num_blocks):
+        node = str(j)
+        depends_graph[node] = []
+        for k in range(j):
+            if rng.random() > 0.3:
+                continue
+            # Blocks in a group may only depend on blocks in the same group, and blocks
+            # outside of a group depend on the group as a whole
+            node_group, dependency_group = groups[node], groups[str(k)]
+            if node_group is not None and node_group == dependency_group:
+                depends_graph[node].append(str(k))
+            elif node_group is None:
+                depends_graph[node].append(dependency_group or str(k))
+            elif dependency_group is None:
+                depends_graph[node_group].append(str(k))
+    return depends_graph, groups
+
+
+def test_min_deletions_matches_brute_force() -> None:
+    rng = random.Random(0)
+    for _ in range(300):
+        num_blocks = rng.randint(2, 8)
+        depends_graph, groups = random_problem(rng, num_blocks)
+        submission = [str(i) for i in range(num_blocks)]
+        rng.shuffle(submission)
+        submission = submission[: rng.randint(1, num_blocks)]
+
+        dag = compile_dag(depends_graph, groups)
+        assert min_deletions(submission, dag, groups) == brute_force_min_deletions(
+            submission, depends_graph, groups
+        )
+
+
+def test_compile_dag_is_cached() -> None:
+    dag = compile_dag(problem_2_dag, problem_2_groups)
+    assert compile_dag(dict(problem_2_dag), dict(problem_2_groups)) is dag
+    assert compile_dag(problem_2_dag_no_groups, {}) is not dag
+    assert dag.graph.number_of_nodes() == 7
+    assert dag.reachable["1"] == sum(
+        1 << dag.node_bits[node] for node in ["2", "3", "7"]
+    )
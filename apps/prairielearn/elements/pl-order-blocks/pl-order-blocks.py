@@ -7,7 +7,6 @@ from copy import deepcopy
 from enum import Enum
 from typing import TypedDict
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from dag_checker import grade_dag, lcs_partial_credit, solve_dag
@@ -449,7 +448,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     data_copy = deepcopy(data)
     data_copy["submitted_answers"] = {answer_name: deepcopy(correct_answers)}
     data_copy["partial_scores"] = {}
-    grade(element_html, data_copy)
+    grade(element, data_copy)
     if data_copy["partial_scores"][answer_name]["score"] != 1:
         data["correct_answers"][answer_name] = solve_problem(
             correct_answers, grading_method
@@ -466,8 +465,7 @@ def get_distractors(
     ]
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     answer_name = pl.get_string_attrib(element, "answers-name")
     format_type = pl.get_enum_attrib(element, "format", FormatType, FormatType.DEFAULT)
     inline = pl.get_boolean_attrib(element, "inline", INLINE_DEFAULT)
@@ -566,8 +564,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "block_layout": "pl-order-blocks-horizontal" if inline else "",
         }
 
-        with open("pl-order-blocks.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params)
+        html = pl.render_template("pl-order-blocks.mustache", html_params)
         return html
 
     elif data["panel"] == "submission":
@@ -623,8 +620,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                     f"invalid score: {data['partial_scores'][answer_name].get('score', 0)}"
                 ) from exc
 
-        with open("pl-order-blocks.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params)
+        html = pl.render_template("pl-order-blocks.mustache", html_params)
         return html
 
     elif data["panel"] == "answer":
@@ -685,16 +681,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 else "pl-order-blocks-right"
             ),
         }
-        with open("pl-order-blocks.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params)
+        html = pl.render_template("pl-order-blocks.mustache", html_params)
         return html
 
     else:
         assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     answer_name = pl.get_string_attrib(element, "answers-name")
     allow_blank_submission = pl.get_boolean_attrib(
         element, "allow-blank", ALLOW_BLANK_DEFAULT
@@ -802,8 +796,7 @@ def construct_feedback(
         return feedback
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     answer_name = pl.get_string_attrib(element, "answers-name")
     student_answer = data["submitted_answers"][answer_name]
     grading_method = pl.get_enum_attrib(
@@ -961,8 +954,7 @@ def get_default_partial_credit_type(
     )
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     grading_method = pl.get_enum_attrib(
         element, "grading-method", GradingMethodType, GRADING_METHOD_DEFAULT
     )
@@ -1,6 +1,5 @@
 import os
 
-import chevron
 import lxml.html
 import prairielearn as pl
 
@@ -9,15 +8,13 @@ WIDTH_DEFAULT = "500"
 HEIGHT_DEFAULT = "300"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["script-name"]
     optional_attribs = ["param-names", "width", "height"]
     pl.check_attribs(element, required_attribs, optional_attribs)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     script_name = pl.get_string_attrib(element, "script-name", None)
 
     with open(os.path.join(data["options"]["question_path"], script_name)) as f:
@@ -41,7 +38,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "uuid": pl.get_uuid(),
     }
 
-    with open("pl-prairiedraw-figure.mustache") as f:
-        html = chevron.render(f, html_params).strip()
+    html = pl.render_template("pl-prairiedraw-figure.mustache", html_params).strip()
 
     return html
@@ -2,8 +2,7 @@ import lxml.html
 import prairielearn as pl
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     pl.check_attribs(element, required_attribs=[], optional_attribs=[])
 
 
@@ -4,7 +4,6 @@ import json
 import os
 from enum import Enum
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from typing_extensions import assert_never
@@ -43,8 +42,7 @@ def element_inner_html(element: lxml.html.HtmlElement) -> str:
     ])
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = [
         "file-name",
@@ -193,14 +191,12 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             ).decode()
 
         html_params["question"] = data["panel"] == "question"
-        with open("pl-rich-text-editor.mustache", encoding="utf-8") as f:
-            return chevron.render(f, html_params).strip()
+        return pl.render_template("pl-rich-text-editor.mustache", html_params).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
     file_name = pl.get_string_attrib(element, "file-name", FILE_NAME_DEFAULT)
     answer_name = get_answer_name(file_name)
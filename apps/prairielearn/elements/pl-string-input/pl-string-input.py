@@ -3,7 +3,6 @@ import random
 from enum import Enum
 from typing import Any
 
-import chevron
 import lxml.html
 import prairielearn as pl
 from typing_extensions import assert_never
@@ -45,8 +44,7 @@ MULTILINE_DEFAULT = False
 STRING_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-string-input.mustache"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -82,8 +80,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         data["correct_answers"][name] = correct_answer
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
     aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
@@ -115,10 +112,6 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         element, "remove-leading-trailing", multiline or REMOVE_LEADING_TRAILING_DEFAULT
     )
 
-    # Get template
-    with open(STRING_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
-
     if data["panel"] == "question":
         editable = data["editable"]
 
@@ -151,7 +144,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            STRING_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         html_params = {
@@ -184,7 +179,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            STRING_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         a_tru = pl.from_json(data["correct_answers"].get(name, None))
@@ -203,13 +200,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "escaped_correct_answer": html.escape(pl.escape_unicode_string(str(a_tru))),
         }
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            STRING_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     # Get allow-blank option
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
@@ -256,8 +254,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         data["submitted_answers"][name] = pl.to_json(a_sub)
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
 
     # Get weight
@@ -315,8 +312,7 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     pl.grade_answer_parameterized(data, name, grade_function, weight=weight)
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
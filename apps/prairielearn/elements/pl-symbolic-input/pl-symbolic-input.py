@@ -1,7 +1,6 @@
 import random
 from enum import Enum
 
-import chevron
 import lxml.html
 import prairielearn as pl
 import prairielearn.sympy_utils as psu
@@ -33,8 +32,7 @@ SHOW_SCORE_DEFAULT = True
 SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME = "pl-symbolic-input.mustache"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -99,8 +97,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         raise ValueError("imaginary-unit-for-display must be either i or j")
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
     aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
@@ -144,10 +141,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "allow_complex": allow_complex,
     }
 
-    with open(SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
-
-    info = chevron.render(template, info_params).strip()
+    info = pl.render_template(
+        SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME, info_params
+    ).strip()
 
     parse_error: str | None = data["format_errors"].get(name)
     missing_input = False
@@ -177,8 +173,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         parse_error = None
     # Use the existing format text in the invalid popup and render it
     elif parse_error is not None:
-        parse_error += chevron.render(
-            template, {"format_error": True, "format_string": info}
+        parse_error += pl.render_template(
+            SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME,
+            {"format_error": True, "format_string": info},
         ).strip()
 
     # Next, get some attributes we will use in multiple places
@@ -210,7 +207,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         html_params = {
@@ -230,7 +229,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         a_tru = data["correct_answers"].get(name)
@@ -258,13 +259,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "suffix": suffix,
             "a_tru": sympy.latex(a_tru),
         }
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            SYMBOLIC_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     variables = psu.get_items_list(
         pl.get_string_attrib(element, "variables", VARIABLES_DEFAULT)
@@ -339,8 +341,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         data["submitted_answers"][name] = None
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     variables = psu.get_items_list(
         pl.get_string_attrib(element, "variables", VARIABLES_DEFAULT)
@@ -392,13 +393,18 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
                 a_sub, allow_complex=allow_complex, allow_trig_functions=allow_trig
             )
 
-        return a_tru_sympy.equals(a_sub_sympy) is True, None
+        return psu.is_equivalent(a_tru_sympy, a_sub_sympy), None
 
-    pl.grade_answer_parameterized(data, name, grade_function, weight=weight)
+    pl.grade_answer_parameterized(
+        data,
+        name,
+        grade_function,
+        weight=weight,
+        cache_key=[a_tru, dict(element.attrib)],
+    )
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     variables = psu.get_items_list(
         pl.get_string_attrib(element, "variables", VARIABLES_DEFAULT)
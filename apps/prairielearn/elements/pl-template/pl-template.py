@@ -81,8 +81,7 @@ def get_file_path(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     return os.path.join(file_directory, file_name)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     required_attribs = ["file-name"]
     optional_attribs = [
         "directory",
@@ -144,8 +143,11 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         element, "log-tag-warnings", LOG_TAG_WARNINGS_DEFAULT
     )
 
-    with open(get_file_path(element, data)) as f:
-        res = chevron.render(f, variable_dict, warn=log_variable_warnings)
+    res = chevron.render(
+        pl.load_template(get_file_path(element, data)),
+        variable_dict,
+        warn=log_variable_warnings,
+    )
 
     if log_tag_warnings:
         check_tags(res)
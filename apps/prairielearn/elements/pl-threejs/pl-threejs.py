@@ -3,7 +3,6 @@ import json
 import math
 import os
 
-import chevron
 import lxml.html
 import numpy as np
 import prairielearn as pl
@@ -25,8 +24,7 @@ TOL_ROTATION_DEFAULT = 5
 GRADE_DEFAULT = True
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = [
         "answer-name",  # key for 'submitted_answers' and 'true_answers'
     ]
@@ -158,8 +156,7 @@ def get_objects(element, data):
     return obj_list
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     answer_name = pl.get_string_attrib(element, "answer-name")
 
     uuid = pl.get_uuid()
@@ -250,8 +247,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "options": json.dumps(options, allow_nan=False),
         }
 
-        with open("pl-threejs.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-threejs.mustache", html_params).strip()
     elif data["panel"] == "submission":
         will_be_graded = pl.get_boolean_attrib(element, "grade", GRADE_DEFAULT)
         if not will_be_graded:
@@ -311,8 +307,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
                 except Exception as exc:
                     raise ValueError(f"invalid score: {score}") from exc
 
-        with open("pl-threejs.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-threejs.mustache", html_params).strip()
     elif data["panel"] == "answer":
         will_be_graded = pl.get_boolean_attrib(element, "grade", GRADE_DEFAULT)
         if not will_be_graded:
@@ -373,16 +368,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "options": json.dumps(options, allow_nan=False),
         }
 
-        with open("pl-threejs.mustache", encoding="utf-8") as f:
-            html = chevron.render(f, html_params).strip()
+        html = pl.render_template("pl-threejs.mustache", html_params).strip()
     else:
         raise ValueError("Invalid panel type: {}".format(data["panel"]))
 
     return html
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answer-name")
 
     # Get submitted answer or return parse_error if it does not exist
@@ -405,8 +398,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
     data["submitted_answers"][name] = a_sub
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     answer_name = pl.get_string_attrib(element, "answer-name")
 
     # Check if this element is intended to produce a grade
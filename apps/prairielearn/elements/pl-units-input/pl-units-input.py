@@ -2,7 +2,6 @@ from enum import Enum
 from random import choice
 from typing import Any
 
-import chevron
 import lxml.html
 import prairielearn as pl
 import unit_utils as uu
@@ -52,13 +51,12 @@ def get_with_units_atol(
 
     name = pl.get_string_attrib(element, "answers-name")
     correct_answer = data["correct_answers"].get(name)
-    correct_answer_units = str(ureg.Quantity(correct_answer).units)
+    correct_answer_units = str(uu.parse_quantity(ureg, correct_answer).units)
 
     return f"{ATOL_DEFAULT} {correct_answer_units}"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = ["answers-name"]
     optional_attribs = [
         "weight",
@@ -118,7 +116,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
 
     # In with-units mode, absolute tolerance must have units. Otherwise just a float
     if grading_mode is GradingMode.WITH_UNITS:
-        parsed_atol = ureg.Quantity(get_with_units_atol(element, data, ureg))
+        parsed_atol = pl.parse_quantity(get_with_units_atol(element, data, ureg))
         if parsed_atol.dimensionless:
             atol = pl.get_string_attrib(element, "atol")
             raise ValueError(
@@ -139,7 +137,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
                 f'"magnitude-partial-credit" must be in the range [0.0, 1.0], not {partial_credit}'
             )
 
-        correct_answer_parsed = ureg.Quantity(correct_answer)
+        correct_answer_parsed = pl.parse_quantity(correct_answer)
 
         if not correct_answer_parsed.check(parsed_atol.dimensionality):
             raise ValueError(
@@ -148,15 +146,14 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
             )
     else:
         atol = pl.get_string_attrib(element, "atol", ATOL_DEFAULT)
-        parsed_atol = ureg.Quantity(atol)
+        parsed_atol = pl.parse_quantity(atol)
         if not parsed_atol.dimensionless:
             raise ValueError(
                 f'"atol" attribute "{atol}" may only have units in with-units grading.'
             )
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     name = pl.get_string_attrib(element, "answers-name")
     label = pl.get_string_attrib(element, "label", LABEL_DEFAULT)
     aria_label = pl.get_string_attrib(element, "aria-label", ARIA_LABEL_DEFAULT)
@@ -184,15 +181,12 @@ def render(element_html: str, data: pl.QuestionData) -> str:
     parse_error = data["format_errors"].get(name)
     ureg = pl.get_unit_registry()
 
-    with open(UNITS_INPUT_MUSTACHE_TEMPLATE_NAME, encoding="utf-8") as f:
-        template = f.read()
-
     if data["panel"] == "question":
         editable = data["editable"]
 
         # Get info strings
-        info = chevron.render(
-            template,
+        info = pl.render_template(
+            UNITS_INPUT_MUSTACHE_TEMPLATE_NAME,
             {"format": True, "only_units": grading_mode is GradingMode.ONLY_UNITS},
         ).strip()
 
@@ -244,7 +238,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             score_type, score_value = pl.determine_score_params(score)
             html_params[score_type] = score_value
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            UNITS_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "submission":
         html_params = {
@@ -259,7 +255,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             if a_sub is None:
                 raise ValueError("submitted answer is None")
 
-            a_sub_parsed = ureg.Quantity(a_sub)
+            a_sub_parsed = pl.parse_quantity(a_sub)
             html_params["a_sub"] = prepare_display_string(
                 a_sub_parsed, custom_format, grading_mode
             )
@@ -290,7 +286,9 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "missing_input", False
         )
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            UNITS_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     elif data["panel"] == "answer":
         a_tru = data["correct_answers"].get(name, None)
@@ -298,7 +296,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         if a_tru is None:
             return ""
 
-        a_tru_parsed = ureg.Quantity(a_tru)
+        a_tru_parsed = pl.parse_quantity(a_tru)
 
         html_params = {
             "answer": True,
@@ -307,13 +305,14 @@ def render(element_html: str, data: pl.QuestionData) -> str:
             "suffix": suffix,
         }
 
-        return chevron.render(template, html_params).strip()
+        return pl.render_template(
+            UNITS_INPUT_MUSTACHE_TEMPLATE_NAME, html_params
+        ).strip()
 
     assert_never(data["panel"])
 
 
-def parse(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def parse(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     allow_blank = pl.get_boolean_attrib(element, "allow-blank", ALLOW_BLANK_DEFAULT)
 
@@ -343,11 +342,9 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
 
         return
 
-    ureg = pl.get_unit_registry()
-
     # checks for invalids by parsing as a dimensionful quantity
     try:
-        a_sub_parsed = ureg.Quantity(a_sub)
+        a_sub_parsed = pl.parse_quantity(a_sub)
     except errors.UndefinedUnitError:  # incorrect units
         data["format_errors"][name] = "Invalid unit."
         return
@@ -387,8 +384,7 @@ def parse(element_html: str, data: pl.QuestionData) -> None:
         data["submitted_answers"][name] = str(a_sub_parsed)
 
 
-def grade(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def grade(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     grading_mode = pl.get_enum_attrib(
@@ -399,8 +395,8 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     if a_tru is None:
         return
 
-    # Store cache on system. Needed to prevent slow grading / parsing times
-    # due to object creation
+    # The registry is shared by the whole process, so this doesn't construct
+    # a new one.
     ureg = pl.get_unit_registry()
 
     if grading_mode is GradingMode.ONLY_UNITS:
@@ -429,11 +425,12 @@ def grade(element_html: str, data: pl.QuestionData) -> None:
     else:
         assert_never(grading_mode)
 
-    pl.grade_answer_parameterized(data, name, grading_fn, weight)
+    pl.grade_answer_parameterized(
+        data, name, grading_fn, weight, cache_key=[a_tru, dict(element.attrib)]
+    )
 
 
-def test(element_html: str, data: pl.ElementTestData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def test(element: lxml.html.HtmlElement, data: pl.ElementTestData) -> None:
     name = pl.get_string_attrib(element, "answers-name")
     weight = pl.get_integer_attrib(element, "weight", WEIGHT_DEFAULT)
     result = data["test_type"]
@@ -452,18 +449,18 @@ def test(element_html: str, data: pl.ElementTestData) -> None:
     ureg = pl.get_unit_registry()
     if result == "correct":
         if grading_mode is GradingMode.ONLY_UNITS:
-            data["raw_submitted_answers"][name] = str(ureg.Quantity(a_tru).units)
+            data["raw_submitted_answers"][name] = str(pl.parse_quantity(a_tru).units)
         else:
             data["raw_submitted_answers"][name] = a_tru
 
         data["partial_scores"][name] = {"score": 1, "weight": weight}
     elif result == "incorrect":
         if grading_mode is GradingMode.ONLY_UNITS:
-            answer = str((ureg.Quantity(a_tru) * ureg.meters).units)
+            answer = str((pl.parse_quantity(a_tru) * ureg.meters).units)
             partial_score = 0.0
             feedback = uu.INCORRECT_FEEDBACK
         elif grading_mode is GradingMode.EXACT_UNITS:
-            answer = ureg.Quantity(a_tru) * 2
+            answer = pl.parse_quantity(a_tru) * 2
 
             partial_credit = pl.get_float_attrib(
                 element, "magnitude-partial-credit", MAGNITUDE_PARTIAL_CREDIT_DEFAULT
@@ -472,7 +469,7 @@ def test(element_html: str, data: pl.ElementTestData) -> None:
             partial_score = 1.0 - partial_credit if partial_credit is not None else 0.0
             feedback = uu.CORRECT_UNITS_INCORRECT_MAGNITUDE_FEEDBACK
         elif grading_mode is GradingMode.WITH_UNITS:
-            answer = ureg.Quantity(a_tru) * 2
+            answer = pl.parse_quantity(a_tru) * 2
             partial_score = 0.0
             feedback = uu.INCORRECT_FEEDBACK
         else:
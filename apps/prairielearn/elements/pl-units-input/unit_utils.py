@@ -19,6 +19,13 @@ INCORRECT_UNITS_AND_MAGNITUDE_FEEDBACK = (
 INCORRECT_FEEDBACK = "Your answer is incorrect."
 
 
+def parse_quantity(ureg: UnitRegistry, value: Any) -> Any:
+    """Parse a quantity with the given registry, using `pl.parse_quantity` if it is the shared registry."""
+    if ureg is pl.get_unit_registry():
+        return pl.parse_quantity(value)
+    return ureg.Quantity(value)
+
+
 class ComparisonType(Enum):
     RELABS = "relabs"
     SIGFIG = "sigfig"
@@ -30,10 +37,10 @@ def get_only_units_grading_fn(
     *, ureg: UnitRegistry, correct_ans: str
 ) -> Callable[[str], tuple[bool, str | None]]:
     """Return the grading function used for units only grading mode."""
-    parsed_correct_ans = ureg.Quantity(correct_ans)
+    parsed_correct_ans = parse_quantity(ureg, correct_ans)
 
     def grade_only_units(submitted_ans: str) -> tuple[bool, str | None]:
-        parsed_submission = ureg.Quantity(submitted_ans)
+        parsed_submission = parse_quantity(ureg, submitted_ans)
         if parsed_correct_ans.units == parsed_submission.units:
             return True, None
 
@@ -52,8 +59,8 @@ def get_exact_units_grading_fn(
     rtol: float,
     atol: str,
 ) -> Callable[[str], tuple[float, str | None]]:
-    parsed_correct_ans = ureg.Quantity(correct_ans)
-    parsed_atol = ureg.Quantity(atol)
+    parsed_correct_ans = parse_quantity(ureg, correct_ans)
+    parsed_atol = parse_quantity(ureg, atol)
 
     def magnitude_comparison_fn(
         submitted_magnitude: float, correct_magnitude: float
@@ -97,7 +104,7 @@ def get_exact_units_grading_fn(
 
     def grade_exact_units(submitted_ans: str) -> tuple[float, str | None]:
         # will return no error, assuming parse() catches all of them
-        parsed_submission = ureg.Quantity(submitted_ans)
+        parsed_submission = parse_quantity(ureg, submitted_ans)
         magnitudes_match = magnitude_comparison_fn(
             parsed_submission.magnitude, parsed_correct_ans.magnitude
         )
@@ -119,12 +126,12 @@ def get_with_units_grading_fn(
     *, ureg: UnitRegistry, correct_ans: str, rtol: float, atol: str
 ) -> Callable[[str], tuple[bool, str | None]]:
     # Assume atol and correct answer have same dimensionality, checked in prepare method
-    correct_ans_base_unit = ureg.Quantity(correct_ans).to_base_units()
-    parsed_atol = ureg.Quantity(atol).to_base_units()
+    correct_ans_base_unit = parse_quantity(ureg, correct_ans).to_base_units()
+    parsed_atol = parse_quantity(ureg, atol).to_base_units()
 
     def grade_with_units(submitted_ans: str) -> tuple[bool, str | None]:
         # will return no error, assuming parse() catches all of them
-        parsed_sub_base_unit = ureg.Quantity(submitted_ans).to_base_units()
+        parsed_sub_base_unit = parse_quantity(ureg, submitted_ans).to_base_units()
 
         if not correct_ans_base_unit.check(parsed_sub_base_unit.dimensionality):
             return False, (
@@ -1,6 +1,5 @@
 from enum import Enum
 
-import chevron
 import lxml.etree
 import lxml.html
 import numpy as np
@@ -24,8 +23,7 @@ SHOW_SYMPY_DEFAULT = True
 DEFAULT_TAB_DEFAULT = TabType.MATLAB
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = [
         "digits",
@@ -39,8 +37,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
     pl.check_attribs(element, required_attribs, optional_attribs)
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     digits = pl.get_integer_attrib(element, "digits", DIGITS_DEFAULT)
     show_matlab = pl.get_boolean_attrib(element, "show-matlab", SHOW_MATLAB_DEFAULT)
     show_mathematica = pl.get_boolean_attrib(
@@ -207,5 +204,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "uuid": pl.get_uuid(),
     }
 
-    with open("pl-variable-output.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-variable-output.mustache", html_params).strip()
@@ -1,4 +1,3 @@
-import chevron
 import prairielearn as pl
 
 
@@ -16,8 +15,7 @@ def render(element_html: str, data: pl.QuestionData) -> str:
 
     # Create and return html
     html_params = {"workspace_url": workspace_url}
-    with open("pl-workspace.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-workspace.mustache", html_params).strip()
 
 
 def parse(element_html: str, data: pl.QuestionData) -> None:
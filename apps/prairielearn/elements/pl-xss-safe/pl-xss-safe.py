@@ -1,7 +1,6 @@
 import base64
 import os
 
-import chevron
 import lxml.html
 import prairielearn as pl
 
@@ -11,8 +10,7 @@ CONTENTS_DEFAULT = None
 LANGUAGE_DEFAULT = "html"
 
 
-def prepare(element_html: str, data: pl.QuestionData) -> None:
-    element = lxml.html.fragment_fromstring(element_html)
+def prepare(element: lxml.html.HtmlElement, data: pl.QuestionData) -> None:
     required_attribs = []
     optional_attribs = [
         "source-file-name",
@@ -43,8 +41,7 @@ def prepare(element_html: str, data: pl.QuestionData) -> None:
         raise ValueError('Attribute "language" must be either "html" or "markdown".')
 
 
-def render(element_html: str, data: pl.QuestionData) -> str:
-    element = lxml.html.fragment_fromstring(element_html)
+def render(element: lxml.html.HtmlElement, data: pl.QuestionData) -> str:
     source_file_name = pl.get_string_attrib(
         element, "source-file-name", SOURCE_FILE_NAME_DEFAULT
     )
@@ -82,5 +79,4 @@ def render(element_html: str, data: pl.QuestionData) -> str:
         "uuid": pl.get_uuid(),
     }
 
-    with open("pl-xss-safe.mustache", encoding="utf-8") as f:
-        return chevron.render(f, html_params).strip()
+    return pl.render_template("pl-xss-safe.mustache", html_params).strip()
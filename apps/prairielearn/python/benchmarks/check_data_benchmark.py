@@ -0,0 +1,74 @@
+"""
+Benchmark the cost of validating `data` across all elements of a question.
+
+This compares the previous approach (deep-copying all of `data` up front) with
+`snapshot_data`, which only copies the props that the phase isn't allowed to
+modify. Each configuration simulates a question with `num_elements` elements,
+each of which triggers one `check_data` call.
+
+Run from `apps/prairielearn/python` with:
+
+    PYTHONPATH=. python benchmarks/check_data_benchmark.py
+"""
+
+import copy
+import timeit
+from typing import Any
+
+from prairielearn.internal.check_data import Phase, check_data, snapshot_data
+
+
+def make_data(params_size: int) -> dict[str, Any]:
+    return {
+        "params": {
+            "matrix": [[float(i * j) for j in range(100)] for i in range(params_size)],
+            "names": [f"name_{i}" for i in range(params_size)],
+        },
+        "correct_answers": {f"ans_{i}": i for i in range(params_size)},
+        "submitted_answers": {f"ans_{i}": i for i in range(params_size)},
+        "raw_submitted_answers": {f"ans_{i}": str(i) for i in range(params_size)},
+        "format_errors": {},
+        "partial_scores": {},
+        "score": 0.0,
+        "feedback": {},
+        "variant_seed": 1,
+        "options": {"question_url": "/q"},
+        "gradable": True,
+        "extensions": {},
+    }
+
+
+def run_full_copy(data: dict[str, Any], phase: Phase, num_elements: int) -> None:
+    original_data = copy.deepcopy(data)
+    for _ in range(num_elements):
+        check_data(original_data, data, phase)
+
+
+def run_snapshot(data: dict[str, Any], phase: Phase, num_elements: int) -> None:
+    original_data = snapshot_data(data, phase)
+    for _ in range(num_elements):
+        check_data(original_data, data, phase)
+
+
+def main() -> None:
+    print(
+        f"{'phase':<8}{'params':>8}{'elements':>10}"
+        f"{'full copy (ms)':>16}{'snapshot (ms)':>16}{'speedup':>9}"
+    )
+    for phase in ("parse", "grade"):
+        for params_size in (10, 100, 1000):
+            data = make_data(params_size)
+            for num_elements in (1, 10, 30, 50):
+                number = 20
+                args = (data, phase, num_elements)
+                full = timeit.timeit(lambda: run_full_copy(*args), number=number)  # noqa: B023
+                snapshot = timeit.timeit(lambda: run_snapshot(*args), number=number)  # noqa: B023
+                print(
+                    f"{phase:<8}{params_size:>8}{num_elements:>10}"
+                    f"{full / number * 1000:>16.3f}{snapshot / number * 1000:>16.3f}"
+                    f"{full / snapshot:>8.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
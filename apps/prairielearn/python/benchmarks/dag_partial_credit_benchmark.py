@@ -0,0 +1,82 @@
+"""
+Benchmark LCS partial credit grading for `pl-order-blocks` DAG questions.
+
+For each block count, this generates random problems (with and without
+`pl-block-group`s) and times `lcs_partial_credit` on fully scrambled
+submissions, which are the worst case for grading.
+
+Run from `apps/prairielearn/python` with:
+
+    PYTHONPATH=. python benchmarks/dag_partial_credit_benchmark.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(
+    0, str(Path(__file__).resolve().parents[2] / "elements" / "pl-order-blocks")
+)
+
+from dag_checker import lcs_partial_credit  # pyright: ignore[reportMissingImports]
+
+BLOCK_COUNTS = (5, 10, 15, 20, 30, 40, 50, 60)
+TRIALS = 20
+
+
+def random_problem(
+    rng: random.Random, num_blocks: int, *, with_groups: bool
+) -> tuple[dict[str, list[str]], dict[str, str | None]]:
+    """Generate a random problem in which blocks are numbered in a correct order."""
+    groups: dict[str, str | None] = {}
+    i = 0
+    while i < num_blocks:
+        size = rng.choice([1, 1, 1, 3, 4]) if with_groups else 1
+        for j in range(i, min(i + size, num_blocks)):
+            groups[str(j)] = f"g{i}" if size > 1 else None
+        i += size
+
+    depends_graph: dict[str, list[str]] = {
+        tag: [] for tag in set(groups.values()) if tag is not None
+    }
+    for j in range(num_blocks):
+        node = str(j)
+        depends_graph.setdefault(node, [])
+        # Depend on a few recent blocks, so that there are many correct orderings
+        for k in range(max(0, j - 4), j):
+            if rng.random() > 0.4:
+                continue
+            if groups[node] is not None and groups[node] == groups[str(k)]:
+                depends_graph[node].append(str(k))
+            elif groups[node] is None:
+                depends_graph[node].append(groups[str(k)] or str(k))
+            elif groups[str(k)] is None:
+                depends_graph[groups[node] or node].append(str(k))
+    return depends_graph, groups
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'blocks':>6}{'groups':>8}{'mean (ms)':>12}{'max (ms)':>11}")
+    for with_groups in (False, True):
+        for num_blocks in BLOCK_COUNTS:
+            times = []
+            for _ in range(TRIALS):
+                depends_graph, groups = random_problem(
+                    rng, num_blocks, with_groups=with_groups
+                )
+                submission: list[str | None] = [str(i) for i in range(num_blocks)]
+                rng.shuffle(submission)
+
+                start = time.perf_counter()
+                lcs_partial_credit(submission, depends_graph, groups)
+                times.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{num_blocks:>6}{'yes' if with_groups else 'no':>8}"
+                f"{sum(times) / len(times):>12.2f}{max(times):>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark reading element attributes in a question with 50 `pl-number-input`s.
+
+This compares reading the attributes that `pl-number-input` uses in each phase
+with the `get_*_attrib` functions and with the cached view returned by
+`get_attribs`. Element functions are passed a new copy of the element in every
+phase, so each phase starts with a new view. For context, it also reports the
+time taken by each phase for the whole question.
+
+Run from `apps/prairielearn/python` with:
+
+    PYTHONPATH=. python benchmarks/element_attribs_benchmark.py
+"""
+
+import copy
+import os
+import time
+from collections.abc import Callable
+from enum import Enum
+from typing import Any
+
+import lxml.html
+import prairielearn as pl
+from prairielearn.internal import question_phases
+
+NUM_INPUTS = 50
+REPEATS = 20
+
+
+class ComparisonType(Enum):
+    RELABS = 1
+    SIGFIG = 2
+    DECDIG = 3
+
+
+REQUIRED_ATTRIBS = ["answers-name"]
+OPTIONAL_ATTRIBS = [
+    "weight",
+    "correct-answer",
+    "label",
+    "aria-label",
+    "suffix",
+    "display",
+    "comparison",
+    "rtol",
+    "atol",
+    "digits",
+    "allow-complex",
+    "show-help-text",
+    "size",
+    "show-correct-answer",
+    "show-placeholder",
+    "allow-fractions",
+    "allow-blank",
+    "blank-value",
+    "custom-format",
+    "placeholder",
+    "show-score",
+]
+
+# The attributes read by `pl-number-input` in each phase, including the reads
+# made by helper functions.
+READS: dict[str, list[tuple[str, str, tuple[Any, ...]]]] = {
+    "prepare": [
+        ("string", "answers-name", ()),
+        ("float", "correct-answer", (None,)),
+        ("string", "custom-format", (None,)),
+    ],
+    "render": [
+        ("string", "answers-name", ()),
+        ("string", "label", (None,)),
+        ("string", "aria-label", (None,)),
+        ("string", "suffix", (None,)),
+        ("boolean", "allow-fractions", (True,)),
+        ("string", "custom-format", (None,)),
+        ("boolean", "show-score", (True,)),
+        ("boolean", "show-correct-answer", (True,)),
+        ("boolean", "show-help-text", (True,)),
+        ("integer", "size", (35,)),
+        ("enum", "comparison", (ComparisonType.RELABS,)),
+        ("float", "rtol", (1e-2,)),
+        ("float", "atol", (1e-8,)),
+        ("boolean", "allow-complex", (False,)),
+        ("boolean", "show-placeholder", (True,)),
+        ("string", "custom-format", (None,)),
+        ("enum", "comparison", (ComparisonType.RELABS,)),
+    ],
+    "parse": [
+        ("string", "answers-name", ()),
+        ("boolean", "allow-complex", (False,)),
+        ("boolean", "allow-fractions", (True,)),
+        ("boolean", "allow-blank", (False,)),
+        ("string", "blank-value", ("0",)),
+    ],
+    "grade": [
+        ("string", "answers-name", ()),
+        ("integer", "weight", (1,)),
+        ("enum", "comparison", (ComparisonType.RELABS,)),
+        ("float", "rtol", (1e-2,)),
+        ("float", "atol", (1e-8,)),
+        ("boolean", "show-correct-answer", (True,)),
+    ],
+}
+
+FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "string": pl.get_string_attrib,
+    "boolean": pl.get_boolean_attrib,
+    "integer": pl.get_integer_attrib,
+    "float": pl.get_float_attrib,
+}
+
+
+def read_with_functions(element: lxml.html.HtmlElement, phase: str) -> None:
+    if phase == "prepare":
+        pl.check_attribs(element, REQUIRED_ATTRIBS, OPTIONAL_ATTRIBS)
+    for kind, name, args in READS[phase]:
+        if kind == "enum":
+            pl.get_enum_attrib(element, name, ComparisonType, *args)
+        else:
+            FUNCTIONS[kind](element, name, *args)
+
+
+def read_with_view(element: lxml.html.HtmlElement, phase: str) -> None:
+    attribs = (
+        pl.get_attribs(element, REQUIRED_ATTRIBS, OPTIONAL_ATTRIBS)
+        if phase == "prepare"
+        else pl.get_attribs(element)
+    )
+    for kind, name, args in READS[phase]:
+        if kind == "enum":
+            attribs.get_enum(name, ComparisonType, *args)
+        else:
+            getattr(attribs, f"get_{kind}")(name, *args)
+
+
+def time_reads(
+    elements: list[lxml.html.HtmlElement],
+    phase: str,
+    read: Callable[[lxml.html.HtmlElement, str], None],
+) -> float:
+    total = 0.0
+    for _ in range(REPEATS):
+        copies = [copy.deepcopy(element) for element in elements]
+        start = time.perf_counter()
+        for element in copies:
+            read(element, phase)
+        total += time.perf_counter() - start
+    return total / REPEATS * 1000
+
+
+def question_html() -> str:
+    return "\n".join(
+        f'<pl-number-input answers-name="x{i}" correct-answer="{i}.5" '
+        f'label="$x_{{{i}}} =$" rtol="0.001" show-help-text="false" size="10">'
+        "</pl-number-input>"
+        for i in range(NUM_INPUTS)
+    )
+
+
+def time_phases() -> dict[str, float]:
+    context: question_phases.RenderContext = {
+        "html": question_html(),
+        "elements": {
+            "pl-number-input": {
+                "name": "pl-number-input",
+                "controller": "pl-number-input.py",
+                "type": "core",
+            }
+        },
+        "element_extensions": {},
+        "course_path": os.getcwd(),
+    }
+    data: dict[str, Any] = {
+        "params": {},
+        "correct_answers": {},
+        "submitted_answers": {},
+        "raw_submitted_answers": {f"x{i}": f"{i}.5" for i in range(NUM_INPUTS)},
+        "format_errors": {},
+        "partial_scores": {},
+        "score": 0,
+        "feedback": {},
+        "variant_seed": 1,
+        "options": {
+            "course_element_files_url": "/elements",
+            "course_element_extension_files_url": "/extensions",
+        },
+        "answers_names": {},
+        "editable": True,
+        "panel": "question",
+        "num_valid_submissions": 0,
+        "manual_grading": False,
+        "ai_grading": False,
+        "extensions": {},
+    }
+    cwd = os.getcwd()
+    times = {}
+    for phase in ("prepare", "render", "parse", "grade"):
+        # Each phase starts from the data produced by the previous phase.
+        phase_data = data
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            phase_data = copy.deepcopy(data)
+            question_phases.process(phase, phase_data, context)
+        times[phase] = (time.perf_counter() - start) / REPEATS * 1000
+        os.chdir(cwd)
+        data = phase_data
+    return times
+
+
+def main() -> None:
+    elements = [
+        lxml.html.fragment_fromstring(html) for html in question_html().split("\n")
+    ]
+    phase_times = time_phases()
+
+    print(f"{NUM_INPUTS} pl-number-input elements, times in ms per phase")
+    print(f"{'phase':<10}{'functions':>11}{'view':>8}{'speedup':>9}{'phase':>8}")
+    for phase in READS:
+        functions_ms = time_reads(elements, phase, read_with_functions)
+        view_ms = time_reads(elements, phase, read_with_view)
+        print(
+            f"{phase:<10}{functions_ms:>11.3f}{view_ms:>8.3f}"
+            f"{functions_ms / view_ms:>9.2f}{phase_times[phase]:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
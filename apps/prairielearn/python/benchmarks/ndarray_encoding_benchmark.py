@@ -0,0 +1,73 @@
+"""
+Benchmark serializing ndarrays with `to_json` / `from_json`.
+
+This compares the list-based encoding used by `np_encoding_version=2` (which
+encodes arrays the same way as version 1) with the base64 buffer encoding used
+by `np_encoding_version=3`. Each round trip includes `json.dumps` /
+`json.loads`, as happens when `data` is passed between the question server and
+Node.
+
+Run from `apps/prairielearn/python` with:
+
+    PYTHONPATH=. python benchmarks/ndarray_encoding_benchmark.py
+"""
+
+import json
+import timeit
+from typing import Literal
+
+import numpy as np
+import numpy.typing as npt
+from prairielearn.conversion_utils import from_json, to_json
+
+
+def round_trip(
+    array: npt.NDArray[np.generic], np_encoding_version: Literal[1, 2, 3]
+) -> None:
+    encoded = json.dumps(to_json(array, np_encoding_version=np_encoding_version))
+    from_json(json.loads(encoded))
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(
+        f"{'array':<22}{'version':>8}{'encode (ms)':>13}{'round trip (ms)':>17}"
+        f"{'size (KB)':>11}"
+    )
+    for size in (10, 100, 1000):
+        arrays = {
+            f"float64 {size}x{size}": rng.standard_normal((size, size)),
+            f"int32 {size}x{size}": rng.integers(0, 100, (size, size), dtype=np.int32),
+            f"complex128 {size}x{size}": rng.standard_normal((size, size))
+            + 1j * rng.standard_normal((size, size)),
+        }
+        number = max(1, 10_000 // (size * size))
+        for name, array in arrays.items():
+            for version in (2, 3):
+                encoded = json.dumps(to_json(array, np_encoding_version=version))
+                encode_ms = (
+                    timeit.timeit(
+                        lambda array=array, version=version: json.dumps(
+                            to_json(array, np_encoding_version=version)
+                        ),
+                        number=number,
+                    )
+                    / number
+                    * 1000
+                )
+                round_trip_ms = (
+                    timeit.timeit(
+                        lambda array=array, version=version: round_trip(array, version),
+                        number=number,
+                    )
+                    / number
+                    * 1000
+                )
+                print(
+                    f"{name:<22}{version:>8}{encode_ms:>13.3f}{round_trip_ms:>17.3f}"
+                    f"{len(encoded) / 1024:>11.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
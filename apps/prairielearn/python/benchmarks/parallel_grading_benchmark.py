@@ -0,0 +1,87 @@
+"""
+Benchmark grading many submissions with `grade_jobs_in_parallel`.
+
+This grades the same batch of `pl-symbolic-input` submissions (spread over a
+few variants) with an increasing number of processes, and reports the
+throughput and the speedup over a single process. Ideally, the speedup is
+close to the number of processes, up to the number of available cores.
+
+Run from `apps/prairielearn/python` with:
+
+    PYTHONPATH=. python benchmarks/parallel_grading_benchmark.py
+"""
+
+import os
+import time
+from typing import Any
+
+from prairielearn.internal import question_phases
+
+NUM_VARIANTS = 8
+NUM_SUBMISSIONS = 400
+
+CONTEXT: question_phases.RenderContext = {
+    "html": '<pl-symbolic-input answers-name="f" variables="x, y"></pl-symbolic-input>',
+    "elements": {
+        "pl-symbolic-input": {
+            "name": "pl-symbolic-input",
+            "controller": "pl-symbolic-input.py",
+            "type": "core",
+        }
+    },
+    "element_extensions": {},
+    "course_path": os.getcwd(),
+}
+
+
+def variant_data(seed: int) -> dict[str, Any]:
+    return {
+        "params": {},
+        "correct_answers": {"f": f"(x + {seed})^3 - y*sin(x)^2"},
+        "submitted_answers": {},
+        "raw_submitted_answers": {},
+        "format_errors": {},
+        "partial_scores": {},
+        "score": 0,
+        "feedback": {},
+        "variant_seed": seed,
+        "options": {},
+        "answers_names": {},
+    }
+
+
+def main() -> None:
+    variants = [variant_data(seed) for seed in range(NUM_VARIANTS)]
+    jobs: list[question_phases.GradingJob] = [
+        {
+            "context": CONTEXT,
+            "data": variants[index * NUM_VARIANTS // NUM_SUBMISSIONS],
+            # Every submission is different, so no results are cached.
+            "submission": {
+                "submitted_answers": {"f": f"x^3 + {index}*x^2 - y*(1 - cos(x)^2)"}
+            },
+        }
+        for index in range(NUM_SUBMISSIONS)
+    ]
+
+    cpu_count = os.cpu_count() or 1
+    process_counts = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+    print(f"{cpu_count} cores available")
+    print(f"{'processes':>9}{'time (s)':>10}{'submissions/s':>15}{'speedup':>9}")
+    baseline = None
+    for processes in process_counts:
+        start = time.perf_counter()
+        results = dict(
+            question_phases.grade_jobs_in_parallel(jobs, processes=processes)
+        )
+        elapsed = time.perf_counter() - start
+        assert len(results) == NUM_SUBMISSIONS
+        baseline = baseline or elapsed
+        print(
+            f"{processes:>9}{elapsed:>10.2f}{NUM_SUBMISSIONS / elapsed:>15.1f}"
+            f"{baseline / elapsed:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark symbolic answer comparison as done by `pl-symbolic-input`.
+
+This compares SymPy's `equals` (the previous grading path) with
+`is_equivalent`, which uses the result of a numeric probe whenever it is
+conclusive and only uses `equals` for the others. Correct answers gain the
+most, since `equals` has to simplify their difference all the way down to
+zero. Each row is a (correct answer, submitted answer) pair, parsed the same
+way the element parses them, and the totals are split by whether the
+submitted answer is equivalent. SymPy's cache is cleared before each call, so
+neither path benefits from the other's work.
+
+Run from `apps/prairielearn/python` with:
+
+    PYTHONPATH=. python benchmarks/symbolic_equivalence_benchmark.py
+"""
+
+import time
+
+import sympy
+from prairielearn.sympy_utils import convert_string_to_sympy, is_equivalent
+from sympy.core.cache import clear_cache
+
+VARIABLES = ["x", "y", "t"]
+
+PAIRS = [
+    ("(x + 1)^2", "x^2 + 2*x + 1"),
+    ("(x + 1)^2", "x^2 + 2*x + 2"),
+    ("sin(x)^2 + cos(x)^2", "1"),
+    ("sin(2*x)", "2*sin(x)*cos(x)"),
+    ("sin(2*x)", "sin(x)*cos(x)"),
+    ("exp(x + y)", "exp(x)*exp(y)"),
+    ("sqrt(x^2)", "x"),
+    ("log(x*y)", "log(x) + log(y)"),
+    ("(x^3 - y^3)/(x - y)", "x^2 + x*y + y^2"),
+    ("(x^3 - y^3)/(x - y)", "x^2 - x*y + y^2"),
+    ("tan(x)/(1 + tan(x)^2)", "sin(x)*cos(x)"),
+    ("(t + 1)^8 - (t - 1)^8", "16*t^7 + 112*t^5 + 112*t^3 + 16*t"),
+    ("(t + 1)^8 - (t - 1)^8", "16*t^7 + 112*t^5 + 112*t^3 + 15*t"),
+    ("atan(x) + atan(1/x)", "pi/2"),
+    ("acos(cos(x))", "x"),
+]
+
+
+def time_call(a: sympy.Expr, b: sympy.Expr, *, numeric: bool) -> tuple[bool, float]:
+    clear_cache()
+    start = time.perf_counter()
+    result = is_equivalent(a, b) if numeric else a.equals(b) is True
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    print(f"{'correct':<26}{'submitted':<36}{'equals (ms)':>12}{'probe (ms)':>12}")
+    # Indexed by whether the answer is equivalent according to `equals`
+    totals = {True: [0.0, 0.0], False: [0.0, 0.0]}
+    for correct, submitted in PAIRS:
+        a = convert_string_to_sympy(correct, VARIABLES, allow_hidden=True)
+        b = convert_string_to_sympy(submitted, VARIABLES, allow_hidden=True)
+        symbolic, symbolic_ms = time_call(a, b, numeric=False)
+        numeric, numeric_ms = time_call(a, b, numeric=True)
+        totals[symbolic][0] += symbolic_ms
+        totals[symbolic][1] += numeric_ms
+        flag = (
+            "" if symbolic == numeric else f"  (equals: {symbolic}, probe: {numeric})"
+        )
+        print(
+            f"{correct:<26}{submitted:<36}{symbolic_ms:>12.1f}{numeric_ms:>12.1f}{flag}"
+        )
+    for equivalent, label in ((True, "equivalent"), (False, "not equivalent")):
+        symbolic_ms, numeric_ms = totals[equivalent]
+        print(f"{'total (' + label + ')':<62}{symbolic_ms:>12.1f}{numeric_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from prairielearn import ...
 ```
 """
 
+import base64
 import json
 import numbers
 import re
@@ -43,6 +44,7 @@ class _JSONSerializedGeneric(TypedDict):
         "ndarray",
         "np_scalar",
         "complex_ndarray",
+        "ndarray_buffer",
     ]
     _value: Any
 
@@ -59,6 +61,11 @@ class _JSONSerializedComplexNdarray(_JSONSerializedGeneric, total=False):
     _dtype: str
 
 
+class _JSONSerializedNdarrayBuffer(_JSONSerializedGeneric):
+    _dtype: str
+    _shape: list[int]
+
+
 class _JSONSerializedSympyMatrix(_JSONSerializedGeneric):
     _variables: list[str]
     _shape: tuple[int, int]
@@ -70,6 +77,7 @@ _JSONSerializedType = (
     | _JSONSerializedNumpyScalar
     | _JSONSerializedNdarray
     | _JSONSerializedComplexNdarray
+    | _JSONSerializedNdarrayBuffer
     | _JSONSerializedSympyMatrix
 )
 
@@ -109,7 +117,7 @@ def to_json(
     v: _JSONPythonType,
     *,
     df_encoding_version: Literal[1, 2] = 1,
-    np_encoding_version: Literal[1, 2] = 1,
+    np_encoding_version: Literal[1, 2, 3] = 1,
 ) -> _JSONSerializedType: ...
 
 
@@ -118,7 +126,7 @@ def to_json(
     v: Any,
     *,
     df_encoding_version: Literal[1, 2] = 1,
-    np_encoding_version: Literal[1, 2] = 1,
+    np_encoding_version: Literal[1, 2, 3] = 1,
 ) -> Any: ...
 
 
@@ -126,7 +134,7 @@ def to_json(
     v: Any | _JSONPythonType,
     *,
     df_encoding_version: Literal[1, 2] = 1,
-    np_encoding_version: Literal[1, 2] = 1,
+    np_encoding_version: Literal[1, 2, 3] = 1,
 ) -> Any | _JSONSerializedType:
     """
     Convert a value to a JSON serializable format.
@@ -146,7 +154,8 @@ def to_json(
     | `pandas.DataFrame` | `dataframe` | `df_encoding_version=1` |
     | `pandas.DataFrame` | `dataframe_v2` | `df_encoding_version=2` |
     | networkx graph type | `networkx_graph` |
-    | numpy scalar | `np_scalar` | `np_encoding_version=2` |
+    | numpy scalar | `np_scalar` | `np_encoding_version=2` or `3` |
+    | ndarray | `ndarray_buffer` | `np_encoding_version=3`, except for object and structured dtypes |
     | any | `v` | if v can be json serialized |
 
     !!! note
@@ -156,6 +165,11 @@ def to_json(
 
     If `np_encoding_version` is set to 2, then numpy scalars serialize using `'_type': 'np_scalar'`.
 
+    If `np_encoding_version` is set to 3, then numpy scalars are serialized as in version 2, and
+    ndarrays serialize using `'_type': 'ndarray_buffer'`. This stores the array's raw little-endian
+    data as a base64 string along with its dtype and shape, which is much faster to encode and
+    decode and much smaller than a list of numbers for large arrays.
+
     If `df_encoding_version` is set to 2, then pandas DataFrames serialize using `'_type': 'dataframe_v2'`.
 
     See [from_json][prairielearn.conversion_utils.from_json] for details about the differences between encodings.
@@ -172,10 +186,12 @@ def to_json(
     Raises:
         ValueError: If `np_encoding_version` or `df_encoding_version` is invalid.
     """
-    if np_encoding_version not in {1, 2}:
-        raise ValueError(f"Invaild np_encoding {np_encoding_version}, must be 1 or 2.")
+    if np_encoding_version not in {1, 2, 3}:
+        raise ValueError(
+            f"Invaild np_encoding {np_encoding_version}, must be 1, 2, or 3."
+        )
 
-    if np_encoding_version == 2 and isinstance(v, np.number):
+    if np_encoding_version >= 2 and isinstance(v, np.number):
         return {
             "_type": "np_scalar",
             "_concrete_type": type(v).__name__,
@@ -185,6 +201,14 @@ def to_json(
     if np.isscalar(v) and np.iscomplexobj(v):  # pyright:ignore[reportArgumentType]
         return {"_type": "complex", "_value": {"real": v.real, "imag": v.imag}}  # pyright:ignore[reportAttributeAccessIssue]
     elif isinstance(v, np.ndarray):
+        if np_encoding_version == 3 and v.dtype.kind not in {"O", "V"}:
+            little_endian = np.ascontiguousarray(v, dtype=v.dtype.newbyteorder("<"))
+            return {
+                "_type": "ndarray_buffer",
+                "_value": base64.b64encode(little_endian.tobytes()).decode("ascii"),
+                "_dtype": little_endian.dtype.str,
+                "_shape": list(v.shape),
+            }
         if np.isrealobj(v):
             return {"_type": "ndarray", "_value": v.tolist(), "_dtype": str(v.dtype)}
         elif np.iscomplexobj(v):
@@ -272,6 +296,7 @@ def from_json(v: _JSONSerializedType | Any) -> Any:
     | `np_scalar` | numpy scalar defined by `_concrete_type` |
     | `ndarray` | non-complex `ndarray` |
     | `complex_ndarray` | complex `ndarray` |
+    | `ndarray_buffer` | `ndarray` with the dtype and shape given by `_dtype` and `_shape` |
     | `sympy` | `sympy.Expr` |
     | `sympy_matrix` | `sympy.Matrix` |
     | `dataframe` | `pandas.DataFrame` |
@@ -331,6 +356,18 @@ def from_json(v: _JSONSerializedType | Any) -> Any:
                 raise ValueError(
                     "variable of type complex_ndarray should have value with real and imaginary pair"
                 )
+        elif v_json["_type"] == "ndarray_buffer":
+            if "_value" in v_json and "_dtype" in v_json and "_shape" in v_json:
+                # `frombuffer` doesn't copy, so decode into a mutable buffer to
+                # get a writeable array.
+                buffer = bytearray(base64.b64decode(v_json["_value"]))
+                return np.frombuffer(buffer, dtype=np.dtype(v_json["_dtype"])).reshape(
+                    v_json["_shape"]
+                )
+            else:
+                raise ValueError(
+                    "variable of type ndarray_buffer should have value, dtype, and shape"
+                )
         elif v_json["_type"] == "sympy":
             if not is_sympy_json(v_json):
                 raise ValueError(
@@ -5,9 +5,12 @@ from prairielearn import ...
 ```
 """
 
+import hashlib
+import json
 import math
+from collections import OrderedDict
 from collections.abc import Callable
-from typing import Any, Literal
+from typing import Any, Literal, NamedTuple
 
 import numpy as np
 import numpy.typing as npt
@@ -165,11 +168,115 @@ def check_answers_names(data: QuestionData, name: str) -> None:
     data["answers_names"][name] = True
 
 
+# Results of recent calls to `grade_answer_parameterized` that opted in to
+# caching with `cache_key`. The `prairielearn` package is imported by the
+# zygote before workers are forked, so this lives for as long as the worker
+# does and is shared by every question and variant that the worker grades.
+GRADE_CACHE_SIZE = 4096
+
+
+class GradeCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class _GradeCache:
+    def __init__(self) -> None:
+        self.results: OrderedDict[bytes, tuple[bool | float, str | None]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self.results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def grade(
+        self,
+        grade_function: Callable[[Any], tuple[bool | float, str | None]],
+        cache_key: object,
+        submitted_answer: object,
+    ) -> tuple[bool | float, str | None]:
+        key = _grade_cache_key(grade_function, cache_key, submitted_answer)
+        if key is None:
+            return grade_function(submitted_answer)
+
+        cached = self.results.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        result = grade_function(submitted_answer)
+        self.results[key] = result
+        if len(self.results) > GRADE_CACHE_SIZE:
+            self.results.popitem(last=False)
+        return result
+
+
+_grade_cache = _GradeCache()
+
+
+def grade_cache_info() -> GradeCacheInfo:
+    """Return statistics about the cache used by `grade_answer_parameterized`.
+
+    Returns:
+        The number of cache hits and misses, and the current and maximum number of cached results.
+    """
+    return GradeCacheInfo(
+        _grade_cache.hits,
+        _grade_cache.misses,
+        len(_grade_cache.results),
+        GRADE_CACHE_SIZE,
+    )
+
+
+def clear_grade_cache() -> None:
+    """Clear the cache used by `grade_answer_parameterized` and reset its statistics."""
+    _grade_cache.clear()
+
+
+def _grade_cache_key(
+    grade_function: Callable[..., Any], cache_key: object, submitted_answer: object
+) -> bytes | None:
+    """Compute a stable key for a call to `grade_answer_parameterized`.
+
+    Returns:
+        A hash of the grading function's source location, the cache key and the
+        submitted answer, or `None` if the inputs can't be serialized to JSON.
+    """
+    code = getattr(grade_function, "__code__", None)
+    if code is None:
+        return None
+    try:
+        encoded = json.dumps(
+            [
+                code.co_filename,
+                code.co_firstlineno,
+                grade_function.__qualname__,
+                cache_key,
+                submitted_answer,
+            ],
+            sort_keys=True,
+            allow_nan=False,
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(encoded.encode("utf-8", "surrogatepass")).digest()
+
+
 def grade_answer_parameterized(
     data: QuestionData,
     name: str,
     grade_function: Callable[[Any], tuple[bool | float, str | None]],
     weight: int = 1,
+    *,
+    cache_key: object = None,
 ) -> None:
     """
     Grade the answer for the input `name` using the provided `grade_function`.
@@ -188,6 +295,14 @@ def grade_answer_parameterized(
     - a string containing feedback
     - `None`, if there is no feedback (usually this should only occur if the answer is correct)
 
+    If `cache_key` is given, the result of `grade_function` is cached, so that a
+    submitted answer that was already graded in this process isn't graded again.
+    `cache_key` must be JSON-serializable and must capture everything that
+    `grade_function` depends on other than the submitted answer, typically the
+    correct answer and the element's attributes. Only use this when
+    `grade_function` has no side effects. Use `grade_cache_info` to inspect the
+    cache.
+
     Examples:
         >>> def grading_function(submitted_answer):
         ...     if submitted_answer == "foo":
@@ -215,7 +330,12 @@ def grade_answer_parameterized(
     submitted_answer = data["submitted_answers"][name]
 
     # Run passed-in grading function
-    result, feedback_content = grade_function(submitted_answer)
+    if cache_key is None:
+        result, feedback_content = grade_function(submitted_answer)
+    else:
+        result, feedback_content = _grade_cache.grade(
+            grade_function, cache_key, submitted_answer
+        )
 
     # Try converting partial score
     if isinstance(result, bool):
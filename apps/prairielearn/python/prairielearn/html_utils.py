@@ -5,18 +5,30 @@ from prairielearn import ...
 ```
 """
 
+import functools
 import html
+import os
 import re
+from collections import OrderedDict
+from collections.abc import Callable
 from enum import Enum
 from typing import Any, TypeVar, overload
 
+import chevron
 import lxml.html
+from chevron.tokenizer import tokenize
 
 from prairielearn.colors import PLColor
 from prairielearn.misc_utils import escape_unicode_string
 
 EnumT = TypeVar("EnumT", bound=Enum)
 
+# Tokenized Mustache templates, keyed by absolute path. Each entry also records
+# the `st_mtime_ns` of the file it was tokenized from, so that changes to the
+# file are picked up.
+TEMPLATE_CACHE_SIZE = 256
+_template_cache: OrderedDict[str, tuple[int, list[tuple[str, str]]]] = OrderedDict()
+
 # From https://gitlab.gnome.org/GNOME/libxml2/-/blob/4aa08c80b711ab296f6e6ecab24df8cf6d0be5fc/HTMLtree.c#L305-309
 LIBXML_BOOLEAN_ATTRIBUTES = frozenset({
     "checked",
@@ -34,6 +46,35 @@ LIBXML_BOOLEAN_ATTRIBUTES = frozenset({
     "selected",
 })
 
+BOOLEAN_TRUE_VALUES = frozenset({
+    "true",
+    "t",
+    "1",
+    "True",
+    "T",
+    "TRUE",
+    "yes",
+    "y",
+    "Yes",
+    "Y",
+    "YES",
+})
+BOOLEAN_FALSE_VALUES = frozenset({
+    "false",
+    "f",
+    "0",
+    "False",
+    "F",
+    "FALSE",
+    "no",
+    "n",
+    "No",
+    "N",
+    "NO",
+})
+
+COLOR_REGEX = re.compile(r"^#(?:[0-9a-fA-F]{1,2}){3}$")
+
 
 def get_enum_attrib(
     element: lxml.html.HtmlElement,
@@ -71,17 +112,57 @@ def get_enum_attrib(
             f'Value "{enum_val}" assigned to "{name}" cannot have uppercase characters.'
         )
 
-    upper_enum_str = enum_val.upper()
-    accepted_names = {member.name.replace("_", "-") for member in enum_type}
-
-    if upper_enum_str not in accepted_names:
+    enum_member = _parse_enum(enum_val, enum_type)
+    if enum_member is None:
         raise ValueError(
             f"{enum_val} is not a valid type, must be one of: {', '.join(member.name.lower().replace('_', '-') for member in enum_type)}."
         )
 
+    return enum_member
+
+
+@functools.cache
+def _enum_attrib_names(enum_type: type[Enum]) -> frozenset[str]:
+    return frozenset(member.name.replace("_", "-") for member in enum_type)
+
+
+def _parse_enum(val: str, enum_type: type[EnumT]) -> EnumT | None:
+    upper_enum_str = val.upper()
+    if val != val.lower() or upper_enum_str not in _enum_attrib_names(enum_type):
+        return None
     return enum_type[upper_enum_str.replace("-", "_")]
 
 
+def _parse_boolean(val: str) -> bool | None:
+    if val in BOOLEAN_TRUE_VALUES:
+        return True
+    if val in BOOLEAN_FALSE_VALUES:
+        return False
+    return None
+
+
+def _parse_integer(val: str) -> int | None:
+    try:
+        return int(val)
+    except ValueError:
+        return None
+
+
+def _parse_float(val: str) -> float | None:
+    try:
+        return float(val)
+    except ValueError:
+        return None
+
+
+def _parse_color(val: str) -> str | None:
+    if COLOR_REGEX.match(val):
+        return val
+    if PLColor.match(val) is not None:
+        return PLColor(val).to_string(hex=True)
+    return None
+
+
 def _compat_array(arr: list[str]) -> list[str]:
     new_arr = []
     for i in arr:
@@ -89,6 +170,13 @@ def _compat_array(arr: list[str]) -> list[str]:
     return new_arr
 
 
+@functools.lru_cache(maxsize=1024)
+def _allowed_attribs(
+    required_attribs: tuple[str, ...], optional_attribs: tuple[str, ...]
+) -> frozenset[str]:
+    return frozenset(_compat_array([*required_attribs, *optional_attribs]))
+
+
 def check_attribs(
     element: lxml.html.HtmlElement,
     required_attribs: list[str],
@@ -98,13 +186,10 @@ def check_attribs(
     for name in required_attribs:
         if not has_attrib(element, name):
             raise ValueError(f'Required attribute "{name}" missing')
-    extra_attribs = list(
-        set(element.attrib)
-        - set(_compat_array(required_attribs))
-        - set(_compat_array(optional_attribs))
-    )
-    for name in extra_attribs:
-        raise ValueError(f'Unknown attribute "{name}"')
+    allowed_attribs = _allowed_attribs(tuple(required_attribs), tuple(optional_attribs))
+    for name in element.attrib:
+        if name not in allowed_attribs:
+            raise ValueError(f'Unknown attribute "{name}"')
 
 
 def _get_attrib(
@@ -244,27 +329,10 @@ def get_boolean_attrib(
     if is_default:
         return val
 
-    true_values = ["true", "t", "1", "True", "T", "TRUE", "yes", "y", "Yes", "Y", "YES"]
-    false_values = [
-        "false",
-        "f",
-        "0",
-        "False",
-        "F",
-        "FALSE",
-        "no",
-        "n",
-        "No",
-        "N",
-        "NO",
-    ]
-
-    if val in true_values:
-        return True
-    elif val in false_values:
-        return False
-    else:
+    bool_val = _parse_boolean(val)
+    if bool_val is None:
         raise ValueError(f'Attribute "{name}" must be a boolean value: {val}')
+    return bool_val
 
 
 # Order here matters, as we want to override the case where the args is omitted
@@ -302,12 +370,9 @@ def get_integer_attrib(
     (val, is_default) = _get_attrib(element, name, *args)
     if is_default:
         return val
-    try:
-        int_val = int(val)
-    except ValueError:
-        int_val = None
+    int_val = _parse_integer(val)
     if int_val is None:
-        # can't raise this exception directly in the above except
+        # can't raise this exception directly in an except
         # handler because it gives an overly complex displayed error
         raise ValueError(f'Attribute "{name}" must be an integer: {val}')
     return int_val
@@ -351,12 +416,9 @@ def get_float_attrib(
     (val, is_default) = _get_attrib(element, name, *args)
     if is_default:
         return val
-    try:
-        float_val = float(val)
-    except ValueError:
-        float_val = None
+    float_val = _parse_float(val)
     if float_val is None:
-        # can't raise this exception directly in the above except
+        # can't raise this exception directly in an except
         # handler because it gives an overly complex displayed error
         raise ValueError(f'Attribute "{name}" must be a number: {val}')
     return float_val
@@ -399,13 +461,192 @@ def get_color_attrib(
         else:
             return val
 
-    match = re.search(r"^#(?:[0-9a-fA-F]{1,2}){3}$", val)
-    if match:
-        return val
-    elif PLColor.match(val) is not None:
-        return PLColor(val).to_string(hex=True)
-    else:
+    color = _parse_color(val)
+    if color is None:
         raise ValueError(f'Attribute "{name}" must be a CSS-style RGB string: {val}')
+    return color
+
+
+class ElementAttribs:
+    """A typed view of the attributes of an HTML element.
+
+    The methods behave like the corresponding `get_*_attrib` functions, but the
+    parsed value of each attribute is cached, so that reading it again (for
+    example, from a helper function) is cheap. Errors are the same as the ones
+    raised by the functions.
+
+    Use [`get_attribs`][prairielearn.html_utils.get_attribs] to get the view
+    for an element. Changes made to an attribute after it was read are not
+    reflected in the view.
+    """
+
+    def __init__(self, element: lxml.html.HtmlElement) -> None:
+        self._element = element
+        # Parsed values of attributes that are present, keyed by name and type.
+        self._values: dict[tuple[str, object], Any] = {}
+
+    def _get(
+        self,
+        name: str,
+        kind: object,
+        parse: Callable[[str], Any],
+        get_attrib: Callable[..., Any],
+        args: tuple[Any, ...],
+    ) -> Any:
+        key = (name, kind)
+        values = self._values
+        if key in values:
+            return values[key]
+
+        element = self._element
+        if len(args) < 2 and name.lower() not in LIBXML_BOOLEAN_ATTRIBUTES:
+            val = element.get(name)
+            if val is None:
+                val = element.get(name.replace("-", "_"))
+            if val is not None:
+                parsed = parse(val)
+                if parsed is not None:
+                    values[key] = parsed
+                    return parsed
+            elif args and kind is not PLColor:
+                return args[0]
+
+        # Let the function handle everything else, including raising errors.
+        return get_attrib(element, name, *args)
+
+    def has(self, name: str) -> bool:
+        """If the element has an attribute `name` set.
+
+        Returns:
+            `True` if the element has an attribute of that name, `False` otherwise.
+        """
+        return has_attrib(self._element, name)
+
+    @overload
+    def get_string(self, name: str) -> str: ...
+
+    @overload
+    def get_string(self, name: str, *args: str) -> str: ...
+
+    @overload
+    def get_string(self, name: str, *args: None) -> str | None: ...
+
+    def get_string(self, name: str, *args: str | None) -> str | None:
+        """Return the named attribute, as in [`get_string_attrib`][prairielearn.html_utils.get_string_attrib].
+
+        Returns:
+            The string value of attribute `name`.
+        """
+        return self._get(name, str, str, get_string_attrib, args)
+
+    @overload
+    def get_boolean(self, name: str) -> bool: ...
+
+    @overload
+    def get_boolean(self, name: str, *args: bool) -> bool: ...
+
+    @overload
+    def get_boolean(self, name: str, *args: None) -> bool | None: ...
+
+    def get_boolean(self, name: str, *args: bool | None) -> bool | None:
+        """Return the named attribute, as in [`get_boolean_attrib`][prairielearn.html_utils.get_boolean_attrib].
+
+        Returns:
+            The boolean value of attribute `name`.
+        """
+        return self._get(name, bool, _parse_boolean, get_boolean_attrib, args)
+
+    @overload
+    def get_integer(self, name: str) -> int: ...
+
+    @overload
+    def get_integer(self, name: str, *args: int) -> int: ...
+
+    @overload
+    def get_integer(self, name: str, *args: None) -> int | None: ...
+
+    def get_integer(self, name: str, *args: int | None) -> int | None:
+        """Return the named attribute, as in [`get_integer_attrib`][prairielearn.html_utils.get_integer_attrib].
+
+        Returns:
+            The int value of attribute `name`.
+        """
+        return self._get(name, int, _parse_integer, get_integer_attrib, args)
+
+    @overload
+    def get_float(self, name: str) -> float: ...
+
+    @overload
+    def get_float(self, name: str, *args: float) -> float: ...
+
+    @overload
+    def get_float(self, name: str, *args: None) -> float | None: ...
+
+    def get_float(self, name: str, *args: float | None) -> float | None:
+        """Return the named attribute, as in [`get_float_attrib`][prairielearn.html_utils.get_float_attrib].
+
+        Returns:
+            The float value of attribute `name`.
+        """
+        return self._get(name, float, _parse_float, get_float_attrib, args)
+
+    @overload
+    def get_color(self, name: str, *args: str) -> str: ...
+
+    @overload
+    def get_color(self, name: str, *args: None) -> str | None: ...
+
+    def get_color(self, name: str, *args: str | None) -> str | None:
+        """Return the named attribute, as in [`get_color_attrib`][prairielearn.html_utils.get_color_attrib].
+
+        Returns:
+            A CSS color string.
+        """
+        return self._get(name, PLColor, _parse_color, get_color_attrib, args)
+
+    def get_enum(
+        self, name: str, enum_type: type[EnumT], default: EnumT | None = None
+    ) -> EnumT:
+        """Return the named attribute, as in [`get_enum_attrib`][prairielearn.html_utils.get_enum_attrib].
+
+        Returns:
+            The value of attribute `name`, as part of the enum.
+        """
+        return self._get(
+            name,
+            enum_type,
+            lambda val: _parse_enum(val, enum_type),
+            lambda element, name, *args: get_enum_attrib(
+                element, name, enum_type, *args
+            ),
+            () if default is None else (default,),
+        )
+
+
+def get_attribs(
+    element: lxml.html.HtmlElement,
+    required_attribs: list[str] | None = None,
+    optional_attribs: list[str] | None = None,
+) -> ElementAttribs:
+    """Get a typed view of the attributes of an HTML element.
+
+    Element functions should get the view once per phase, and pass it to any
+    helper functions that read attributes, so that each attribute is only read
+    and parsed once. If `required_attribs` or `optional_attribs` are given, the
+    attributes are first checked as in
+    [`check_attribs`][prairielearn.html_utils.check_attribs].
+
+    Returns:
+        An [`ElementAttribs`][prairielearn.html_utils.ElementAttribs] view of the element's attributes.
+
+    Examples:
+        >>> attribs = get_attribs(element, ["answers-name"], ["weight"])
+        >>> attribs.get_integer("weight", 1)
+        1
+    """
+    if required_attribs is not None or optional_attribs is not None:
+        check_attribs(element, required_attribs or [], optional_attribs or [])
+    return ElementAttribs(element)
 
 
 def inner_html(element: lxml.html.HtmlElement) -> str:
@@ -430,3 +671,44 @@ def escape_invalid_string(string: str) -> str:
         The sanitized user input wrapped in a code block.
     """
     return f'<code class="user-output-invalid">{html.escape(escape_unicode_string(string))}</code>'
+
+
+def load_template(path: str | os.PathLike[str]) -> list[tuple[str, str]]:
+    """Load and tokenize the Mustache template at the given path, reusing the tokens from a previous call if the file hasn't changed.
+
+    Returns:
+        The template's tokens, which can be passed to `chevron.render` in place of the template. They must not be modified.
+    """
+    abs_path = os.path.abspath(path)
+    mtime_ns = os.stat(abs_path).st_mtime_ns
+
+    cached = _template_cache.get(abs_path)
+    if cached is not None and cached[0] == mtime_ns:
+        _template_cache.move_to_end(abs_path)
+        return cached[1]
+
+    with open(abs_path, encoding="utf-8") as f:
+        tokens = list(tokenize(f.read()))
+    _template_cache[abs_path] = (mtime_ns, tokens)
+    _template_cache.move_to_end(abs_path)
+    if len(_template_cache) > TEMPLATE_CACHE_SIZE:
+        _template_cache.popitem(last=False)
+    return tokens
+
+
+def render_template(path: str | os.PathLike[str], data: dict[str, Any]) -> str:
+    """Render the Mustache template at the given path with `chevron`.
+
+    The template is only read and tokenized the first time it is rendered (and
+    again if the file is modified), rather than on every call. Relative paths
+    are resolved against the current working directory, which is the element's
+    directory while an element function is running.
+
+    Examples:
+        >>> render_template("pl-my-element.mustache", {"name": "x"})
+        '<span>x</span>'
+
+    Returns:
+        The rendered template.
+    """
+    return chevron.render(load_template(path), data)
@@ -1,3 +1,4 @@
+import copy
 from typing import Any, Literal, TypedDict
 
 Phase = Literal["generate", "prepare", "render", "parse", "grade", "test", "file"]
@@ -125,6 +126,42 @@ PROPS: dict[str, PropInfo] = {
 }
 
 
+# Phases in which `check_data` is never run; see `question_phases.process`.
+UNCHECKED_PHASES: frozenset[Phase] = frozenset({"render", "file"})
+
+
+def is_comparison_needed(prop: str, phase: Phase) -> bool:
+    """
+    Returns:
+        Whether `check_data` will compare the old and new values of the prop
+        in the given phase. Unknown props are always compared.
+    """
+    prop_info = PROPS.get(prop)
+    if prop_info is None:
+        return True
+    return (
+        phase in prop_info["present_phases"] and phase not in prop_info["edit_phases"]
+    )
+
+
+def snapshot_data(data: dict[Any, Any], phase: Phase) -> dict[Any, Any]:
+    """
+    Make a copy of `data` that is suitable for use as `old_data` in `check_data`.
+
+    Only the props that `check_data` actually compares in the given phase are
+    deep-copied. Every other prop (most notably `params` and `correct_answers`
+    in phases that may modify them, which tend to be the largest) is only
+    recorded as present, since its old value is never looked at.
+
+    Returns:
+        A dict with the same keys as `data`.
+    """
+    return {
+        key: copy.deepcopy(value) if is_comparison_needed(key, phase) else None
+        for key, value in data.items()
+    }
+
+
 def check_prop(
     prop: str,
     old_value: Any,
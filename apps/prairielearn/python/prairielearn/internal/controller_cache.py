@@ -0,0 +1,133 @@
+import copy
+import json
+import os
+import pathlib
+import sys
+from typing import Any
+
+PYTHON_PATH = pathlib.Path(__file__).parent.parent.parent.resolve()
+CORE_ELEMENTS_PATH = (PYTHON_PATH.parent / "elements").resolve()
+
+ControllerModule = dict[str, Any]
+
+# Controllers that live for the lifetime of the process, keyed by path. Each
+# entry also records the `st_mtime_ns` of the file it was compiled from, so
+# that a controller that changes on disk (e.g. during local development) is
+# transparently reloaded.
+#
+# The zygote populates this cache with all core element controllers before it
+# forks any workers, so each worker inherits the already-executed modules via
+# copy-on-write instead of re-reading, re-compiling, and re-executing them for
+# every request.
+_persistent_cache: dict[pathlib.Path, tuple[int, ControllerModule]] = {}
+
+
+def exec_controller(path: pathlib.Path | str) -> ControllerModule:
+    """Read, compile, and execute the Python file at the given path, returning its globals."""
+    mod: ControllerModule = {}
+
+    with open(path, encoding="utf-8") as inf:
+        # Use `compile` to associate filename with code object, so the
+        # filename appears in the traceback if there is an error:
+        # https://stackoverflow.com/a/437857
+        code = compile(inf.read(), path, "exec")
+
+    exec(code, mod)
+    return mod
+
+
+def is_core_controller(path: pathlib.Path | str) -> bool:
+    return pathlib.Path(path).is_relative_to(CORE_ELEMENTS_PATH)
+
+
+def load_controller(
+    path: pathlib.Path | str, local_cache: dict[Any, ControllerModule]
+) -> ControllerModule:
+    """
+    Load the controller at the given path.
+
+    Core element controllers are stored in a process-wide cache that is keyed by
+    path and modification time. All other controllers (e.g. course elements or
+    `server.py` files) are only cached in `local_cache`, which is owned by the
+    caller and typically lives for a single request or worker.
+
+    Returns:
+        The globals of the executed controller.
+    """
+    if not is_core_controller(path):
+        mod = local_cache.get(path)
+        if mod is None:
+            mod = exec_controller(path)
+            local_cache[path] = mod
+        return mod
+
+    controller_path = pathlib.Path(path)
+    mtime = os.stat(controller_path).st_mtime_ns
+    cached = _persistent_cache.get(controller_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    mod = exec_controller(controller_path)
+    _persistent_cache[controller_path] = (mtime, mod)
+    return mod
+
+
+def preload_core_elements() -> list[pathlib.Path]:
+    """
+    Compile and execute the controllers of all core elements.
+
+    This is intended to be called by the zygote before it forks any workers.
+    Each controller is executed with the same working directory and `sys.path`
+    that it would see during question processing. Controllers that fail to
+    load (for instance, because of a missing optional dependency) are skipped;
+    they'll be loaded again on demand so that the error surfaces in the
+    request that actually uses the element.
+
+    Modules that controllers import from their own element directories (such
+    as pl-drawing's `elements` and `defaults`) are removed from `sys.modules`
+    afterwards. Their names are generic, and workers would otherwise import
+    them in place of a question's or course's own modules with the same
+    names. The controllers keep their references to them.
+
+    Returns:
+        The paths of the controllers that were successfully loaded.
+    """
+    saved_cwd = os.getcwd()
+    saved_path = copy.copy(sys.path)
+    saved_modules = set(sys.modules)
+
+    loaded: list[pathlib.Path] = []
+    try:
+        for info_path in sorted(CORE_ELEMENTS_PATH.glob("*/info.json")):
+            element_path = info_path.parent
+            try:
+                with open(info_path, encoding="utf-8") as f:
+                    controller = json.load(f).get("controller")
+                if not controller:
+                    continue
+
+                controller_path = element_path / controller
+                os.chdir(element_path)
+                sys.path = copy.copy(saved_path)
+                sys.path.insert(0, str(PYTHON_PATH))
+                sys.path.insert(0, str(element_path))
+
+                load_controller(controller_path, {})
+                loaded.append(controller_path)
+            except Exception:
+                continue
+    finally:
+        os.chdir(saved_cwd)
+        sys.path = saved_path
+        for name in set(sys.modules) - saved_modules:
+            module_file = getattr(sys.modules[name], "__file__", None)
+            if module_file is not None and is_core_controller(
+                pathlib.Path(module_file).resolve()
+            ):
+                del sys.modules[name]
+
+    return loaded
+
+
+def clear_persistent_cache() -> None:
+    _persistent_cache.clear()
@@ -0,0 +1,269 @@
+import fcntl
+import importlib
+import json
+import os
+import sys
+import time
+from collections.abc import Callable, Container, Iterable
+from typing import Literal, TypedDict
+
+import psutil
+
+from prairielearn.internal import controller_cache
+
+PreloadPolicy = Literal["eager", "lazy", "histogram"]
+
+# Modules that are commonly used by questions and elements. Modules that the
+# `prairielearn` package itself depends on (e.g. numpy, sympy, pandas, pint,
+# lxml) are always loaded by the zygote and don't need to be listed here;
+# `pint` is listed so that its unit registry is built up front.
+DEFAULT_PRELOAD_MODULES = ("chevron", "matplotlib", "nltk", "sklearn", "pint")
+
+
+class PreloadManifest(TypedDict):
+    policy: PreloadPolicy
+    """
+    `eager` preloads all `modules`, `lazy` preloads none of them, and
+    `histogram` preloads the modules whose recorded usage is at least
+    `min_usage`.
+    """
+
+    modules: list[str]
+    """The candidate modules to preload."""
+
+    elements: bool
+    """Whether to preload all core element controllers."""
+
+    histogram: str | None
+    """
+    Path to a JSON file in which workers record which candidate modules they
+    used. Required for the `histogram` policy; optional otherwise.
+    """
+
+    min_usage: float
+    """The fraction of workers that must have used a module for it to be preloaded."""
+
+
+class ModuleProfile(TypedDict):
+    name: str
+    import_ms: float
+    rss_kb: int
+
+
+class ModuleUsage(TypedDict):
+    used: int
+    observed: int
+
+
+DEFAULT_MANIFEST: PreloadManifest = {
+    "policy": "eager",
+    "modules": list(DEFAULT_PRELOAD_MODULES),
+    "elements": True,
+    "histogram": None,
+    "min_usage": 0.05,
+}
+
+
+def _warm_pint() -> None:
+    import prairielearn
+
+    # Construct the shared unit registry, so that workers inherit it.
+    prairielearn.get_unit_registry()
+
+
+def _warm_matplotlib() -> None:
+    import matplotlib as mpl
+
+    mpl.use("PDF")
+
+
+# Work to do after a module is preloaded, so that workers don't have to do
+# it either.
+POST_IMPORT_HOOKS: dict[str, Callable[[], None]] = {
+    "matplotlib": _warm_matplotlib,
+    "pint": _warm_pint,
+}
+
+
+def load_manifest(path: str | None) -> PreloadManifest:
+    """
+    Load a preload manifest from a JSON file. Any keys that are missing from
+    the file take their values from `DEFAULT_MANIFEST`.
+
+    Returns:
+        The manifest, or the default manifest if `path` is empty.
+
+    Raises:
+        ValueError: If the manifest is invalid.
+    """
+    manifest = DEFAULT_MANIFEST.copy()
+    if not path:
+        return manifest
+
+    with open(path, encoding="utf-8") as f:
+        manifest.update(json.load(f))
+
+    if manifest["policy"] not in ("eager", "lazy", "histogram"):
+        raise ValueError(f"Invalid preload policy: {manifest['policy']}")
+    if manifest["policy"] == "histogram" and not manifest["histogram"]:
+        raise ValueError('The "histogram" preload policy requires a histogram path')
+
+    return manifest
+
+
+def parse_usage_histogram(text: str) -> dict[str, ModuleUsage]:
+    """
+    Parse a module usage histogram. Entries that are not well formed are
+    ignored, since the file may have been damaged.
+
+    Returns:
+        The usage of each module, or an empty histogram if `text` is not a JSON object.
+    """
+    try:
+        histogram = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(histogram, dict):
+        return {}
+
+    valid: dict[str, ModuleUsage] = {}
+    for name, usage in histogram.items():
+        if not isinstance(usage, dict):
+            continue
+        used, observed = usage.get("used"), usage.get("observed")
+        if type(used) is int and type(observed) is int and 0 <= used <= observed:
+            valid[name] = {"used": used, "observed": observed}
+    return valid
+
+
+def read_usage_histogram(path: str) -> dict[str, ModuleUsage]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return parse_usage_histogram(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def select_modules(manifest: PreloadManifest) -> list[str]:
+    """
+    Returns:
+        The modules that should be preloaded according to the manifest's policy.
+    """
+    policy = manifest["policy"]
+    if policy == "eager":
+        return list(manifest["modules"])
+    if policy == "lazy":
+        return []
+
+    assert manifest["histogram"] is not None
+    histogram = read_usage_histogram(manifest["histogram"])
+    selected = []
+    for name in manifest["modules"]:
+        usage = histogram.get(name)
+        # Modules that we've never observed are preloaded; we have no evidence
+        # that they aren't used.
+        if (
+            usage is None
+            or usage["observed"] == 0
+            or usage["used"] / usage["observed"] >= manifest["min_usage"]
+        ):
+            selected.append(name)
+    return selected
+
+
+def preload_modules(
+    modules: Iterable[str], *, elements: bool = True
+) -> list[ModuleProfile]:
+    """
+    Import the given modules (and run their post-import hooks), and optionally
+    preload all core element controllers.
+
+    The cost of each module is measured incrementally, so dependencies that are
+    shared between modules are attributed to whichever module loads them first.
+
+    Returns:
+        The import time and RSS growth for each module, in the order loaded.
+        Element controllers are reported under the name `elements`.
+    """
+    process = psutil.Process()
+    profiles: list[ModuleProfile] = []
+
+    def measure(name: str, fn: Callable[[], object]) -> None:
+        rss_before = process.memory_info().rss
+        start = time.perf_counter()
+        fn()
+        profiles.append({
+            "name": name,
+            "import_ms": round((time.perf_counter() - start) * 1000, 3),
+            "rss_kb": (process.memory_info().rss - rss_before) // 1024,
+        })
+
+    def load(name: str) -> None:
+        importlib.import_module(name)
+        hook = POST_IMPORT_HOOKS.get(name)
+        if hook is not None:
+            hook()
+
+    for name in modules:
+        measure(name, lambda name=name: load(name))
+
+    if elements:
+        measure("elements", controller_cache.preload_core_elements)
+
+    return profiles
+
+
+def write_profile_report(path: str, profiles: list[ModuleProfile]) -> None:
+    report = {
+        "modules": sorted(profiles, key=lambda p: p["import_ms"], reverse=True),
+        "total_import_ms": round(sum(p["import_ms"] for p in profiles), 3),
+        "total_rss_kb": sum(p["rss_kb"] for p in profiles),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def imported_modules(candidates: Iterable[str]) -> list[str]:
+    """
+    Returns:
+        The candidate modules that have been imported by this process.
+    """
+    return [name for name in candidates if name in sys.modules]
+
+
+def record_module_usage(
+    path: str,
+    candidates: Iterable[str],
+    preloaded: Iterable[str],
+    used: Container[str],
+) -> None:
+    """
+    Record which candidate modules were `used` by a worker.
+
+    Modules that were preloaded are skipped, since we can't tell whether
+    they were actually used. Note that modules that the zygote always loads
+    (such as `pint`) will always be counted as used. The histogram file is
+    locked while it is updated, in case multiple zygotes share it.
+
+    This must only be called by the zygote, and not by workers, since they run
+    untrusted code that could then damage the histogram.
+    """
+    preloaded_set = set(preloaded)
+    observed = [name for name in candidates if name not in preloaded_set]
+    if not observed:
+        return
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "r+", encoding="utf-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        histogram = parse_usage_histogram(f.read() or "{}")
+
+        for name in observed:
+            usage = histogram.setdefault(name, {"used": 0, "observed": 0})
+            usage["observed"] += 1
+            if name in used:
+                usage["used"] += 1
+
+        f.seek(0)
+        f.truncate()
+        json.dump(histogram, f)
@@ -1,20 +1,39 @@
 import base64
 import copy
 import io
+import itertools
+import multiprocessing
 import os
 import pathlib
+import random
 import sys
+from collections.abc import Callable, Container, Iterable, Iterator, Sequence
 from inspect import signature
 from typing import Any, Literal, TypedDict
 
 import lxml.html
-from typing_extensions import assert_never
+from typing_extensions import NotRequired, assert_never
+
+import prairielearn.internal.zygote_utils as zu
+from prairielearn.internal.check_data import (
+    UNCHECKED_PHASES,
+    Phase,
+    check_data,
+    snapshot_data,
+)
+from prairielearn.internal.controller_cache import (
+    CORE_ELEMENTS_PATH,
+    PYTHON_PATH,
+    load_controller,
+)
+from prairielearn.internal.traverse import (
+    ElementReplacement,
+    chunk_html,
+    parse_fragments,
+    replace_fragments,
+    traverse_and_execute,
+)
 
-from prairielearn.internal.check_data import Phase, check_data
-from prairielearn.internal.traverse import traverse_and_execute, traverse_and_replace
-
-PYTHON_PATH = pathlib.Path(__file__).parent.parent.parent.resolve()
-CORE_ELEMENTS_PATH = (PYTHON_PATH.parent / "elements").resolve()
 SAVED_PATH = copy.copy(sys.path)
 
 
@@ -38,7 +57,65 @@ class RenderContext(TypedDict):
     """The path to the course directory."""
 
 
-def filelike_to_string(filelike: Any) -> str:
+# The props of `data` that are specific to a submission, rather than to a variant.
+SUBMISSION_PROPS = frozenset({
+    "submitted_answers",
+    "raw_submitted_answers",
+    "format_errors",
+    "partial_scores",
+    "score",
+    "feedback",
+    "gradable",
+})
+
+
+class GradingResult(TypedDict):
+    """The result of grading one submission with `grade_submissions`."""
+
+    submitted_answers: dict[str, Any]
+    format_errors: dict[str, Any]
+    partial_scores: dict[str, Any]
+    score: float
+    feedback: dict[str, Any]
+    gradable: bool
+
+
+class Submission(TypedDict):
+    """
+    A submission to grade with `grade_submissions`.
+
+    Other than `submitted_answers`, each prop is taken from the submission as
+    the question server would for a `grade` call. A missing prop has the value
+    that a new submission to the variant would have.
+    """
+
+    submitted_answers: dict[str, Any]
+    raw_submitted_answers: NotRequired[dict[str, Any]]
+    """Defaults to a copy of `submitted_answers`."""
+
+    format_errors: NotRequired[dict[str, Any]]
+    feedback: NotRequired[dict[str, Any]]
+    gradable: NotRequired[bool]
+    params: NotRequired[dict[str, Any]]
+    """Defaults to the variant's `params`."""
+
+    correct_answers: NotRequired[dict[str, Any]]
+    """Defaults to the variant's `correct_answers`."""
+
+
+class GradingJob(TypedDict):
+    """A submission to grade with `grade_jobs_in_parallel`."""
+
+    context: RenderContext
+    """The context for the submission's variant."""
+
+    data: dict[str, Any]
+    """The data for the submission's variant."""
+
+    submission: Submission
+
+
+def filelike_to_bytes(filelike: Any) -> bytes:
     # if val is None, replace it with empty string
     if filelike is None:
         filelike = ""
@@ -54,15 +131,48 @@ def filelike_to_string(filelike: Any) -> str:
 
     # if this next call does not work, it will throw an error, because
     # the thing returned by file() does not have the correct format
-    return base64.b64encode(filelike).decode()
+    if not isinstance(filelike, bytes):
+        filelike = memoryview(filelike).tobytes()
+    return filelike
+
+
+def filelike_to_string(filelike: Any) -> str:
+    return base64.b64encode(filelike_to_bytes(filelike)).decode()
 
 
 def process(
-    phase: Phase, data: dict[str, Any], context: RenderContext
-) -> tuple[str | None, set[str]]:
+    phase: Phase,
+    data: dict[str, Any],
+    context: RenderContext,
+    *,
+    raw_file: bool = False,
+    write_chunk: Callable[[str], None] | None = None,
+    processes: int | None = None,
+) -> tuple[str | bytes | None, set[str]]:
+    """
+    Run the given phase for every element in the question.
+
+    If `raw_file` is true, the result of the `file` phase is returned as raw
+    bytes instead of a base64-encoded string. If `write_chunk` is given, the
+    HTML rendered by the `render` phase is passed to it in chunks as soon as
+    they are ready (see `iter_traverse_and_replace`), instead of being
+    returned. If an element raises an exception after some chunks have been
+    passed to `write_chunk`, the exception is raised as usual, and the caller
+    must discard those chunks, which are only the start of the HTML.
+
+    If `processes` is greater than 1, the `render` phase renders top-level
+    subtrees of the question in up to that many forked processes (see
+    `render_fragments_in_parallel`). Elements must then not rely on changes
+    that other elements make to `data` or to global state while rendering,
+    which they shouldn't do in any case. The question server doesn't use
+    this yet; it's enabled per call by the zygote's `"processes"` input.
+
+    Returns:
+        A tuple of the rendered HTML or file contents (if any) and the set of
+        elements that were processed.
+    """
     html = context["html"]
     elements = context["elements"]
-    course_path = context["course_path"]
 
     # This will track which elements have been processed.
     processed_elements: set[str] = set()
@@ -73,17 +183,24 @@ def process(
     result = None
 
     # Copying data is potentially expensive, and most of it won't change as we
-    # process all the elements, so we'll make a deep copy of the data once and
-    # use that for future comparisons. For the few pieces of data that do
+    # process all the elements, so we'll make a copy of the data once and use
+    # that for future comparisons. Only the props that this phase isn't allowed
+    # to modify are actually copied, and in phases where we don't validate
+    # `data` at all, nothing is copied. For the few pieces of data that do
     # change based on the element, we'll add and then delete them from
     # `original_data` as needed.
-    original_data = copy.deepcopy(data)
+    original_data = (
+        snapshot_data(data, phase) if phase not in UNCHECKED_PHASES else None
+    )
 
     # We'll cache instantiated modules for two reasons:
     # - This allows us to avoid re-reading/compiling/executing them if the same
     #   element is used multiple times.
     # - This allows element code to maintain state across multiple calls. This is useful
     #   specifically for elements that want to maintain a cache of expensive-to-compute data.
+    #
+    # Core element controllers are additionally cached for the lifetime of the
+    # process (see `controller_cache`); this cache only holds course elements.
     mod_cache: dict[pathlib.Path, dict[str, Any]] = {}
 
     def process_element(
@@ -100,83 +217,9 @@ def process(
         try:
             processed_elements.add(element.tag)
 
-            element_info = elements[element.tag]
-            element_type = element_info["type"]
-            element_name = element_info["name"]
-            if element_type == "core":
-                element_path = CORE_ELEMENTS_PATH / element_name
-            elif element_type == "course":
-                element_path = pathlib.Path(course_path) / "elements" / element_name
-            else:
-                assert_never(element_type)
-            element_controller = element_info["controller"]
-            element_controller_path = element_path / element_controller
-
-            # Set the element directory as the current working directory.
-            os.chdir(element_path)
-
-            # Update the path to include the appropriate directories.
-            sys.path = copy.copy(SAVED_PATH)
-            sys.path.insert(0, str(PYTHON_PATH))
-            if element_info["type"] == "course":
-                sys.path.insert(0, str(pathlib.Path(course_path) / "serverFilesCourse"))
-            sys.path.insert(0, str(element_path))
-
-            mod = mod_cache.get(element_controller_path)
-            if mod is None:
-                mod = {}
-
-                with open(element_controller_path, encoding="utf-8") as inf:
-                    # Use `compile` to associate filename with code object, so the
-                    # filename appears in the traceback if there is an error:
-                    # https://stackoverflow.com/a/437857
-                    code = compile(inf.read(), element_controller_path, "exec")
-
-                exec(code, mod)
-                mod_cache[element_controller_path] = mod
-
-            if phase not in mod:
-                return None
-
-            # Add element-specific or phase-specific information to the data.
-            prepare_data(phase, data, context, element.tag)
-            prepare_data(phase, original_data, context, element.tag)
-
-            # Temporarily strip tail text from the element; the `parse_fragment`
-            # function will choke on it.
-            temp_tail = element.tail
-            element.tail = None
-
-            args: list[Any] = [lxml.html.tostring(element), data]
-
-            # We need to support legacy element functions, which take three arguments.
-            # The second argument is `element_index`; we'll pass `None`. This is
-            # consistent with the same backwards-compatibility logic in `zygote.py`.
-            arg_names = list(signature(mod[phase]).parameters.keys())
-            if arg_names == ["element_html", "element_index", "data"]:
-                args.insert(1, None)
-
-            element_value = mod[phase](*args)
-
-            # Restore the tail text.
-            element.tail = temp_tail
-
-            if phase not in ("render", "file"):
-                # For legacy reasons, we don't validate `data` during the,
-                # `render` or `file` phases, since the old question processor
-                # didn't either. These phases will never produce new data
-                # that's stored anywhere, so this should technically be fine,
-                # though the lack of an error could mislead instructors into
-                # thinking that any changed data will be persisted.
-                #
-                # TODO: Once we have a system for reporting warnings to instructors,
-                # we should restore this check and emit a warning if it fails.
-                # See https://github.com/PrairieLearn/PrairieLearn/issues/7337
-                check_data(original_data, data, phase)
-
-            # Clean up changes to `data` and `original_data` for the next iteration.
-            restore_data(data)
-            restore_data(original_data)
+            element_value = call_element(
+                phase, element, data, original_data, context, mod_cache
+            )
 
             if phase == "render":
                 # TODO: validate that return value was a string?
@@ -188,6 +231,7 @@ def process(
             elif element_value is not None and element_value is not data:
                 # TODO: Once this has been running in production for a while,
                 # change this to raise an exception.
+                element_controller = elements[element.tag]["controller"]
                 sys.stderr.write(
                     f"Function {phase}() in {element_controller} returned a data object other than the one that was passed in.\n\n"
                     + "There is no need to return a value, as the data object is mutable and can be modified in place.\n\n"
@@ -201,16 +245,466 @@ def process(
         process_element(element)
 
     if phase == "render":
-        result = traverse_and_replace(html, process_element)
+        fragments = parse_fragments(html)
+        pieces = (
+            render_fragments_in_parallel(
+                fragments,
+                process_element,
+                processed_elements,
+                elements,
+                processes=processes,
+            )
+            if processes is not None and processes > 1
+            else replace_fragments(fragments, process_element)
+        )
+        if write_chunk is None:
+            result = "".join(pieces)
+        else:
+            for chunk in chunk_html(pieces):
+                write_chunk(chunk)
     else:
         traverse_and_execute(html, process_element_return_none)
 
     if phase == "file":
-        result = filelike_to_string(result)
+        result = filelike_to_bytes(result) if raw_file else filelike_to_string(result)
 
     return result, processed_elements
 
 
+# The arguments of the current `render_fragments_in_parallel` call, which are
+# inherited by the processes that it forks.
+_render_fragments: list[str | lxml.html.HtmlElement] = []
+_render_replace: Callable[[lxml.html.HtmlElement], ElementReplacement] | None = None
+_render_processed_elements: set[str] = set()
+_render_seeds: dict[int, int] = {}
+
+
+def _render_fragment(index: int) -> tuple[str, set[str]]:
+    assert _render_replace is not None
+    zu.seed_prngs(_render_seeds[index])
+    html = "".join(replace_fragments([_render_fragments[index]], _render_replace))
+    return html, _render_processed_elements
+
+
+def render_fragments_in_parallel(
+    fragments: list[str | lxml.html.HtmlElement],
+    replace: Callable[[lxml.html.HtmlElement], ElementReplacement],
+    processed_elements: set[str],
+    elements: Container[str],
+    *,
+    processes: int,
+) -> Iterator[str]:
+    """
+    Like `replace_fragments`, but replace independent top-level fragments in parallel.
+
+    Top-level fragments are replaced independently of each other, so each one
+    that contains any of the given `elements` is replaced in a pool of up to
+    `processes` forked processes, while the others are replaced in this
+    process. Each forked process has its own working directory and `sys.path`,
+    so elements can't interfere with each other by changing them. `replace`
+    is expected to add the tags of the elements it processes to
+    `processed_elements`; the tags processed by other processes are added to
+    it as their results arrive.
+
+    The PRNGs are seeded for each forked fragment with a seed drawn from a copy
+    of this process's `random` state, so the numbers that elements draw while
+    rendering differ between fragments and don't depend on which process
+    renders which fragment. They are not the numbers that a serial render
+    would draw, so elements that draw random numbers while rendering produce
+    different (but still deterministic) HTML than they would serially.
+
+    Yields:
+        The resulting HTML of each fragment, in document order.
+    """
+    global _render_fragments, _render_replace, _render_processed_elements, _render_seeds  # noqa: PLW0603
+
+    parallel_indices = [
+        index
+        for index, fragment in enumerate(fragments)
+        if not isinstance(fragment, str)
+        and any(element.tag in elements for element in fragment.iter())
+    ]
+    # Forking isn't worth it if there's nothing to run concurrently.
+    if len(parallel_indices) < 2:
+        yield from replace_fragments(fragments, replace)
+        return
+
+    _render_fragments = fragments
+    _render_replace = replace
+    _render_processed_elements = processed_elements
+    # Without reseeding, every forked process would draw the same numbers.
+    # The seeds come from a copy of the state, so that this process draws the
+    # same numbers afterwards as it would have without forking.
+    seed_source = random.Random()
+    seed_source.setstate(random.getstate())
+    _render_seeds = {index: seed_source.getrandbits(32) for index in parallel_indices}
+    try:
+        with multiprocessing.get_context("fork").Pool(
+            min(processes, len(parallel_indices))
+        ) as pool:
+            results = pool.imap(_render_fragment, parallel_indices)
+            parallel_index_set = set(parallel_indices)
+            for index, fragment in enumerate(fragments):
+                if index in parallel_index_set:
+                    html, fragment_elements = next(results)
+                    processed_elements |= fragment_elements
+                    yield html
+                else:
+                    yield from replace_fragments([fragment], replace)
+    finally:
+        _render_fragments = []
+        _render_replace = None
+        _render_processed_elements = set()
+        _render_seeds = {}
+
+
+def grade_submissions(
+    data: dict[str, Any],
+    submissions: Iterable[Submission],
+    context: RenderContext,
+    *,
+    parse: bool = False,
+    partial_credit: bool = True,
+    server_parse: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    server_grade: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> Iterator[GradingResult]:
+    """
+    Run the `grade` phase for many submissions to a single variant.
+
+    This is equivalent to calling `process("grade", ...)` once per submission,
+    but `question.html` is only parsed once, and each element's controller is
+    only loaded once. Since `context["html"]` is shared by all submissions,
+    `question.html` must not use submission data in its Mustache templating.
+
+    Each submission is graded with the data that the question server would use
+    to grade it: a copy of `data` with the props of the submission, and PRNGs
+    seeded with the variant's seed. It is scored the same way that the question
+    server scores a submission. If `parse` is true, each submission is first
+    parsed as the question server parses a new submission when it is saved.
+    As in the question server, a submission that isn't gradable (e.g. one
+    that has format errors) isn't graded, and gets a score of 0.
+
+    If `server_parse` or `server_grade` is given, it is called with the data for
+    each submission after the elements have parsed or graded it (i.e. it should
+    call the question's `server.py` `parse()` or `grade()` function), and
+    returns the new data.
+
+    As with `process`, an exception raised by an element is re-raised as a
+    `RuntimeError` that names the element.
+
+    Yields:
+        The grading result for each submission, in order, as soon as it has
+        been graded.
+    """
+    elements = context["elements"]
+
+    # The `parse` and `grade` phases never modify the element tree, so all
+    # submissions can share a single parse of it.
+    question_elements = [
+        element
+        for fragment in parse_fragments(context["html"])
+        if not isinstance(fragment, str)
+        for element in fragment.iter()
+        if isinstance(element.tag, str) and element.tag in elements
+    ]
+
+    # The submission-specific props are replaced for each submission, so
+    # there's no need to copy them.
+    base_data = copy.deepcopy({
+        key: value for key, value in data.items() if key not in SUBMISSION_PROPS
+    })
+
+    mod_cache: dict[pathlib.Path, dict[str, Any]] = {}
+
+    def process_element(
+        phase: Literal["parse", "grade"],
+        element: lxml.html.HtmlElement,
+        submission_data: dict[str, Any],
+        original_data: dict[str, Any],
+    ) -> None:
+        try:
+            call_element(
+                phase, element, submission_data, original_data, context, mod_cache
+            )
+        except Exception as exc:
+            raise RuntimeError(f"Error processing element {element.tag}") from exc
+
+    def run_phase(
+        phase: Literal["parse", "grade"],
+        submission_data: dict[str, Any],
+        server_function: Callable[[dict[str, Any]], dict[str, Any]] | None,
+    ) -> dict[str, Any]:
+        original_data = snapshot_data(submission_data, phase)
+
+        # Run every phase with freshly seeded PRNGs, as it would be if the
+        # submission were processed on its own.
+        zu.seed_prngs(submission_data.get("variant_seed"))
+
+        for element in question_elements:
+            process_element(phase, element, submission_data, original_data)
+
+        if phase == "grade":
+            submission_data["score"] = compute_score(
+                submission_data["partial_scores"], partial_credit=partial_credit
+            )
+
+        if server_function is not None:
+            submission_data = server_function(submission_data)
+
+        if submission_data["format_errors"]:
+            submission_data["gradable"] = False
+        return submission_data
+
+    for submission in submissions:
+        submission_data = copy.deepcopy(base_data)
+        # Each prop is copied separately, so that the default raw answers
+        # aren't the same object as the submitted answers.
+        submission_data.update({
+            "submitted_answers": copy.deepcopy(submission["submitted_answers"]),
+            "raw_submitted_answers": copy.deepcopy(
+                submission.get("raw_submitted_answers", submission["submitted_answers"])
+            ),
+            "format_errors": copy.deepcopy(submission.get("format_errors", {})),
+            "feedback": copy.deepcopy(submission.get("feedback", {})),
+            "gradable": submission.get("gradable", True),
+        })
+        if "params" in submission:
+            submission_data["params"] = copy.deepcopy(submission["params"])
+        if "correct_answers" in submission:
+            submission_data["correct_answers"] = copy.deepcopy(
+                submission["correct_answers"]
+            )
+
+        if parse:
+            submission_data = run_phase("parse", submission_data, server_parse)
+
+        submission_data.update({"partial_scores": {}, "score": 0})
+        if submission_data["gradable"]:
+            submission_data = run_phase("grade", submission_data, server_grade)
+
+        yield {
+            "submitted_answers": submission_data["submitted_answers"],
+            "format_errors": submission_data["format_errors"],
+            "partial_scores": submission_data["partial_scores"],
+            "score": submission_data["score"],
+            "feedback": submission_data["feedback"],
+            "gradable": submission_data["gradable"],
+        }
+
+
+# The arguments of the current `grade_jobs_in_parallel` call. Pool processes
+# are forked after these are set, so they inherit them instead of having to
+# receive them as pickled arguments.
+_parallel_jobs: Sequence[GradingJob] = ()
+_parallel_options: dict[str, Any] = {}
+
+
+def _grade_job_range(bounds: tuple[int, int]) -> list[tuple[int, GradingResult]]:
+    start, end = bounds
+    results: list[tuple[int, GradingResult]] = []
+    while start < end:
+        # Consecutive jobs for the same variant are graded together, so that
+        # the variant's HTML is only parsed once.
+        variant_end = start + 1
+        while (
+            variant_end < end
+            and _parallel_jobs[variant_end]["context"]
+            is _parallel_jobs[start]["context"]
+            and _parallel_jobs[variant_end]["data"] is _parallel_jobs[start]["data"]
+        ):
+            variant_end += 1
+
+        variant_jobs = _parallel_jobs[start:variant_end]
+        variant_results = grade_submissions(
+            variant_jobs[0]["data"],
+            [job["submission"] for job in variant_jobs],
+            variant_jobs[0]["context"],
+            **_parallel_options,
+        )
+        results.extend(enumerate(variant_results, start))
+        start = variant_end
+    return results
+
+
+def grade_jobs_in_parallel(
+    jobs: Sequence[GradingJob],
+    *,
+    processes: int | None = None,
+    parse: bool = False,
+    partial_credit: bool = True,
+    server_parse: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    server_grade: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> Iterator[tuple[int, GradingResult]]:
+    """
+    Grade submissions to any number of variants using a pool of forked processes.
+
+    Each job is graded as `grade_submissions` would grade it, including seeding
+    the PRNGs with its variant's seed, so the results don't depend on which
+    process grades which job. Jobs for the same variant should use the same
+    `context` and `data` objects and be adjacent in `jobs`, so that they can
+    be graded together.
+
+    The pool is forked from the current process, so controllers and modules
+    that are already loaded (e.g. those preloaded by the zygote) are shared
+    with it, and `server_parse` and `server_grade` don't need to be picklable.
+
+    Yields:
+        The index of each job in `jobs` and its grading result, in the order
+        in which they finish.
+    """
+    global _parallel_jobs, _parallel_options  # noqa: PLW0603
+
+    # There's nothing to split into ranges, and no reason to start a pool.
+    if not jobs:
+        return
+
+    processes = processes or os.cpu_count() or 1
+    # Use a few ranges per process, so that an expensive range doesn't leave
+    # the other processes idle at the end.
+    num_ranges = min(len(jobs), processes * 4)
+    boundaries = [len(jobs) * i // num_ranges for i in range(num_ranges + 1)]
+
+    _parallel_jobs = jobs
+    _parallel_options = {
+        "parse": parse,
+        "partial_credit": partial_credit,
+        "server_parse": server_parse,
+        "server_grade": server_grade,
+    }
+    try:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            for results in pool.imap_unordered(
+                _grade_job_range, itertools.pairwise(boundaries)
+            ):
+                yield from results
+    finally:
+        _parallel_jobs = ()
+        _parallel_options = {}
+
+
+def compute_score(partial_scores: dict[str, Any], *, partial_credit: bool) -> float:
+    """
+    Compute the score for a submission from its partial scores, the same way
+    that the question server does.
+
+    Returns:
+        The weighted average of the partial scores if `partial_credit` is true.
+        Otherwise, 1 if every partial score is at least 1, and 0 if not.
+    """
+
+    def number_or(value: Any, default: float) -> float:
+        if isinstance(value, int | float) and not isinstance(value, bool):
+            return value
+        return default
+
+    values = [
+        (number_or(value.get("score"), 0), number_or(value.get("weight"), 1))
+        if isinstance(value, dict)
+        else (0, 1)
+        for value in partial_scores.values()
+    ]
+
+    if partial_credit:
+        total_weight = sum(weight for _, weight in values)
+        return sum(score * weight for score, weight in values) / (total_weight or 1)
+    return 1 if values and all(score >= 1 for score, _ in values) else 0
+
+
+def call_element(
+    phase: Phase,
+    element: lxml.html.HtmlElement,
+    data: dict[str, Any],
+    original_data: dict[str, Any] | None,
+    context: RenderContext,
+    mod_cache: dict[pathlib.Path, dict[str, Any]],
+) -> Any:
+    """
+    Run the given phase for a single element whose tag is in `context["elements"]`.
+
+    If `original_data` is given, `data` is validated against it afterwards.
+
+    Returns:
+        The return value of the element's function, or `None` if the element's
+        controller doesn't define the phase.
+    """
+    element_info = context["elements"][element.tag]
+    element_type = element_info["type"]
+    element_name = element_info["name"]
+    course_path = context["course_path"]
+    if element_type == "core":
+        element_path = CORE_ELEMENTS_PATH / element_name
+    elif element_type == "course":
+        element_path = pathlib.Path(course_path) / "elements" / element_name
+    else:
+        assert_never(element_type)
+    element_controller_path = element_path / element_info["controller"]
+
+    # Set the element directory as the current working directory.
+    os.chdir(element_path)
+
+    # Update the path to include the appropriate directories.
+    sys.path = copy.copy(SAVED_PATH)
+    sys.path.insert(0, str(PYTHON_PATH))
+    if element_type == "course":
+        sys.path.insert(0, str(pathlib.Path(course_path) / "serverFilesCourse"))
+    sys.path.insert(0, str(element_path))
+
+    mod = load_controller(element_controller_path, mod_cache)
+
+    if phase not in mod:
+        return None
+
+    # Add element-specific or phase-specific information to the data.
+    prepare_data(phase, data, context, element.tag)
+    if original_data is not None:
+        prepare_data(phase, original_data, context, element.tag)
+
+    # Temporarily strip tail text from the element; the `parse_fragment`
+    # function will choke on it.
+    temp_tail = element.tail
+    element.tail = None
+
+    # Element functions whose first parameter is named `element` get a
+    # copy of the already-parsed element. Everything else gets the
+    # serialized HTML of the element, which it will typically parse again.
+    arg_names = list(signature(mod[phase]).parameters.keys())
+    if arg_names[:1] == ["element"]:
+        args: list[Any] = [copy.deepcopy(element), data]
+    else:
+        args = [lxml.html.tostring(element), data]
+
+    # We need to support legacy element functions, which take three arguments.
+    # The second argument is `element_index`; we'll pass `None`. This is
+    # consistent with the same backwards-compatibility logic in `zygote.py`.
+    if arg_names == ["element_html", "element_index", "data"]:
+        args.insert(1, None)
+
+    element_value = mod[phase](*args)
+
+    # Restore the tail text.
+    element.tail = temp_tail
+
+    if original_data is not None:
+        # For legacy reasons, we don't validate `data` during the,
+        # `render` or `file` phases, since the old question processor
+        # didn't either. These phases will never produce new data
+        # that's stored anywhere, so this should technically be fine,
+        # though the lack of an error could mislead instructors into
+        # thinking that any changed data will be persisted.
+        #
+        # TODO: Once we have a system for reporting warnings to instructors,
+        # we should restore this check and emit a warning if it fails.
+        # See https://github.com/PrairieLearn/PrairieLearn/issues/7337
+        check_data(original_data, data, phase)
+
+    # Clean up changes to `data` and `original_data` for the next element.
+    restore_data(data)
+    if original_data is not None:
+        restore_data(original_data)
+
+    return element_value
+
+
 def prepare_data(
     phase: Phase, data: dict[str, Any], context: RenderContext, element_tag: str
 ) -> None:
@@ -1,5 +1,7 @@
-from collections import deque
-from collections.abc import Callable
+import copy
+import hashlib
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
 from html import escape as html_escape
 from html import unescape as html_unescape
 from itertools import chain
@@ -27,11 +29,50 @@ VOID_ELEMENTS = frozenset({
 
 UNESCAPED_ELEMENTS = frozenset({"script", "style"})
 
+# The minimum size (in characters) of the chunks produced by
+# `iter_traverse_and_replace`, except for the last one.
+RENDER_CHUNK_SIZE = 64 * 1024
+
+# Parsed fragments of recently-seen HTML, keyed by a hash of the HTML. A
+# question's (Mustache-rendered) HTML is usually identical across phases and
+# often across variants, so this lets us skip re-parsing it. Callers always
+# receive a copy of the cached fragments, which is much cheaper than parsing
+# and means that the cached trees can never be modified.
+PARSED_FRAGMENTS_CACHE_SIZE = 32
+_parsed_fragments_cache: OrderedDict[bytes, list[str | lxml.html.HtmlElement]] = (
+    OrderedDict()
+)
+
+
+def parse_fragments(html: str) -> list[str | lxml.html.HtmlElement]:
+    """
+    Parse the given HTML into a list of fragments, like `lxml.html.fragments_fromstring`.
+
+    Returns:
+        A list of fragments that the caller is free to modify. If there is
+        leading text, the first entry will be a string.
+    """
+    key = hashlib.sha256(html.encode("utf-8", "surrogatepass")).digest()
+
+    fragments = _parsed_fragments_cache.get(key)
+    if fragments is None:
+        fragments = lxml.html.fragments_fromstring(html)
+        _parsed_fragments_cache[key] = fragments
+        if len(_parsed_fragments_cache) > PARSED_FRAGMENTS_CACHE_SIZE:
+            _parsed_fragments_cache.popitem(last=False)
+    else:
+        _parsed_fragments_cache.move_to_end(key)
+
+    return [
+        fragment if isinstance(fragment, str) else copy.deepcopy(fragment)
+        for fragment in fragments
+    ]
+
 
 def traverse_and_execute(
     html: str, fn: Callable[[lxml.html.HtmlElement], None]
 ) -> None:
-    elements = lxml.html.fragments_fromstring(html)
+    elements = parse_fragments(html)
 
     for e in chain.from_iterable(
         element.iter()
@@ -76,28 +117,80 @@ def traverse_and_replace(
 ) -> str:
     """
     Perform traversal and element replacement on HTML with the given replace function.
+
+    Returns:
+        The resulting HTML.
+    """
+    return "".join(replace_fragments(parse_fragments(html), replace))
+
+
+def iter_traverse_and_replace(
+    html: str,
+    replace: Callable[[lxml.html.HtmlElement], ElementReplacement],
+    *,
+    chunk_size: int = RENDER_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Like `traverse_and_replace`, but yield the resulting HTML in chunks.
+
+    A chunk is yielded as soon as at least `chunk_size` characters of output
+    are ready, so the start of the HTML can be sent on while the rest of the
+    elements are still being replaced, and the whole HTML never has to be held
+    in memory at once. Joining the chunks gives the same result as
+    `traverse_and_replace`.
+    """
+    return chunk_html(replace_fragments(parse_fragments(html), replace), chunk_size)
+
+
+def chunk_html(
+    pieces: Iterable[str], chunk_size: int = RENDER_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Group the given pieces of HTML into chunks of at least `chunk_size` characters.
+
+    Each chunk is yielded as soon as it is full, and the last chunk may be
+    shorter. Nothing is yielded if there are no pieces.
+    """
+    chunk: list[str] = []
+    size = 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk.clear()
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def replace_fragments(
+    fragments: list[str | lxml.html.HtmlElement],
+    replace: Callable[[lxml.html.HtmlElement], ElementReplacement],
+) -> Iterator[str]:
+    """
+    Perform traversal and element replacement on parsed fragments (see `parse_fragments`), yielding the resulting HTML piece by piece.
+    The fragments are processed in order and independently of each other, so the
+    result for a list of fragments is the concatenation of the results for each one.
     In short, uses stacks to track what has been parsed already and what still needs to be parsed.
     The count_stack tracks how many children each unclosed tag (contained in the tail_stack) has.
-    The top entry in count_stack is decremented every time something is moved onto result,
-    and when an entry hits zero, the corresponding tag from tail_stack is moved onto result as well.
+    The top entry in count_stack is decremented every time something is yielded,
+    and when an entry hits zero, the corresponding tag from tail_stack is yielded as well.
 
     Raises:
         TypeError: If the HTML contains an invalid tag.
     """
-    # Initialize result and work data structures
-    result: deque[str] = deque()
-
-    initial_list = lxml.html.fragments_fromstring(html)
-    count_stack: deque[int] = deque([len(initial_list)])
-    work_stack: deque[str | lxml.html.HtmlElement] = deque(reversed(initial_list))
+    # Initialize work data structures
+    count_stack: deque[int] = deque([len(fragments)])
+    work_stack: deque[str | lxml.html.HtmlElement] = deque(reversed(fragments))
     tail_stack: deque[tuple[str, str | None]] = deque()
 
     while work_stack:
         element = work_stack.pop()
 
-        # For just a string, append to final result
+        # For just a string, add it to the result
         if isinstance(element, str):
-            result.append(element)
+            yield element
 
         else:
             new_elements = replace(element)
@@ -125,7 +218,7 @@ def traverse_and_replace(
                 continue
 
             if isinstance(new_elements, lxml.html.HtmlComment):
-                result.append(lxml.html.tostring(new_elements, encoding="unicode"))
+                yield lxml.html.tostring(new_elements, encoding="unicode")
             elif isinstance(new_elements, lxml.html.HtmlProcessingInstruction):
                 # Handling processing instructions is necessary for elements like `<pl-graph>`
                 # that produce SVG documents.
@@ -139,20 +232,20 @@ def traverse_and_replace(
                     .removeprefix("<?")
                     .removesuffix("?>")
                 )
-                result.append(f"<!--?{instruction}?-->")
+                yield f"<!--?{instruction}?-->"
                 if tail:
-                    result.append(prepare_text(tail))
+                    yield prepare_text(tail)
             else:
                 if not isinstance(new_elements.tag, str):
                     raise TypeError(f"Invalid tag type: {type(new_elements.tag)}")
 
                 # Add opening tag and text
-                result.append(get_source_definition(new_elements))
+                yield get_source_definition(new_elements)
                 if new_elements.text is not None:
                     if new_elements.tag in UNESCAPED_ELEMENTS:
-                        result.append(new_elements.text)
+                        yield new_elements.text
                     else:
-                        result.append(prepare_text(new_elements.text))
+                        yield prepare_text(new_elements.text)
 
                 # Add all children to the work stack
                 children = list(new_elements)
@@ -172,9 +265,9 @@ def traverse_and_replace(
             tail_tag, tail_text = tail_stack.pop()
 
             if tail_tag not in VOID_ELEMENTS:
-                result.append(f"</{tail_tag}>")
+                yield f"</{tail_tag}>"
             if tail_text is not None:
-                result.append(tail_text)
+                yield tail_text
 
         count_stack[-1] -= 1
 
@@ -183,5 +276,3 @@ def traverse_and_replace(
     #
     # assert count_stack == deque([0])
     # assert not tail_stack
-
-    return "".join(result)
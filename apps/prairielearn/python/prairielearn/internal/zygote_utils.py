@@ -1,7 +1,27 @@
-from typing import Any
+import math
+import random
+import re
+import struct
+import sys
+import types
+from collections.abc import Sequence
+from importlib.abc import MetaPathFinder
+from typing import Any, BinaryIO, cast
+
+import msgpack
+import numpy as np
 
 import prairielearn as pl
 
+FRAME_HEADER = struct.Struct(">I")
+
+# msgpack markers that might indicate a value that cannot be represented in
+# JavaScript/JSON: 64-bit integers (`0xcf`/`0xd3`), or a float64 (`0xcb`) whose
+# sign and exponent bits are all set, i.e. NaN or +/-Infinity. These bytes can
+# also legitimately appear inside strings or binary data, so a match only means
+# that we need to fall back to a precise check of the original object.
+SUSPICIOUS_MSGPACK_BYTES = re.compile(rb"[\xcf\xd3]|\xcb[\x7f\xff][\xf0-\xff]")
+
 
 def safe_parse_int(int_str: str) -> int | float:
     """
@@ -43,3 +63,124 @@ def assert_all_integers_within_limits(item: Any) -> None:
         elif isinstance(next_item, dict):
             item_stack.extend(next_item.keys())
             item_stack.extend(next_item.values())
+
+
+def assert_all_values_msgpack_safe(item: Any) -> None:
+    """
+    Raise an exception if the input item contains any values that would not
+    survive being sent to the JavaScript side and stored as JSON, namely
+    oversized integers and non-finite floats.
+
+    Raises:
+        ValueError: If any such values are found in the input item.
+    """
+    item_stack = [item]
+
+    while item_stack:
+        next_item = item_stack.pop()
+
+        if isinstance(next_item, int):
+            if not pl.is_int_json_serializable(next_item):
+                raise ValueError(
+                    f"Data structure contains oversized integer: {next_item}"
+                )
+
+        elif isinstance(next_item, float):
+            if not math.isfinite(next_item):
+                raise ValueError(
+                    f"Data structure contains non-finite float: {next_item}"
+                )
+
+        elif isinstance(next_item, (list, tuple)):
+            item_stack.extend(next_item)
+
+        elif isinstance(next_item, dict):
+            item_stack.extend(next_item.keys())
+            item_stack.extend(next_item.values())
+
+
+def pack_frame(obj: Any) -> bytes:
+    """
+    Encode an object as a length-prefixed msgpack frame.
+
+    Unlike the line-JSON protocol, this doesn't walk the whole object before
+    encoding it. Instead, the encoded bytes are scanned for markers that could
+    indicate an oversized integer or a non-finite float, and the object is only
+    checked in detail if one is found. `bytes` values are encoded as msgpack
+    binary data rather than as base64 strings.
+
+    Returns:
+        The 4-byte big-endian payload length followed by the payload.
+    """
+    payload = cast(bytes, msgpack.packb(obj, use_bin_type=True))
+    if SUSPICIOUS_MSGPACK_BYTES.search(payload):
+        assert_all_values_msgpack_safe(obj)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def read_frame(stream: BinaryIO) -> Any:
+    """
+    Read a single length-prefixed msgpack frame from the given stream.
+
+    Returns:
+        The decoded object, or `None` if the stream was closed before a frame
+        could be read.
+
+    Raises:
+        EOFError: If the stream was closed in the middle of a frame.
+    """
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise EOFError("Stream closed while reading frame header")
+
+    (length,) = FRAME_HEADER.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("Stream closed while reading frame payload")
+
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+# We want to initialize the Faker seed, but only if faker is loaded
+class FakerInitializeMetaPathFinder(MetaPathFinder):
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+
+    def find_spec(
+        self,
+        fullname: str,
+        _path: Sequence[str] | None,
+        _target: types.ModuleType | None = None,
+    ) -> None:
+        if fullname == "faker" or fullname.startswith("faker."):
+            # Once this initialization is done we no longer need this meta path finder
+            sys.meta_path.remove(self)
+            from faker import Faker
+
+            Faker.seed(self.seed)
+
+
+def seed_prngs(seed: Any) -> None:
+    """
+    Seed the PRNGs that question code commonly uses with a variant's seed:
+    `random`, `numpy.random`, and Faker. To avoid the cost of importing Faker
+    for questions that don't use it, Faker is only seeded once it is imported.
+
+    Seeding again replaces the previous seed, including a pending Faker seed.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    sys.meta_path[:] = [
+        finder
+        for finder in sys.meta_path
+        if not isinstance(finder, FakerInitializeMetaPathFinder)
+    ]
+    if "faker" in sys.modules:
+        from faker import Faker
+
+        Faker.seed(seed)
+    else:
+        sys.meta_path.insert(0, FakerInitializeMetaPathFinder(seed))
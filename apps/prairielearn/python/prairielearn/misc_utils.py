@@ -5,6 +5,8 @@ from prairielearn import ...
 ```
 """
 
+import copy
+import functools
 import itertools as it
 import os
 import random
@@ -12,8 +14,10 @@ import string
 import unicodedata
 import uuid
 from collections.abc import Generator
+from typing import Any
 
 from pint import UnitRegistry
+from pint.facets.plain import PlainQuantity
 from text_unidecode import unidecode
 
 
@@ -42,19 +46,52 @@ def index2key(i: int) -> str:
     return next(it.islice(iter_keys(), i, None))
 
 
+# The number of distinct strings whose parsed quantities `parse_quantity` keeps.
+QUANTITY_CACHE_SIZE = 1024
+
+
+@functools.cache
 def get_unit_registry() -> UnitRegistry:
-    """Get a unit registry using cache folder valid on production machines.
+    """Get the unit registry shared by all code in this process, using a cache folder valid on production machines.
+
+    Constructing a registry is slow, so it is only constructed once per
+    process. The zygote constructs it before forking workers, so workers
+    share it rather than each constructing their own. Since the registry is
+    shared by every element and question, code that needs to modify a
+    registry (e.g. to define new units) should construct its own
+    `UnitRegistry` instead.
 
     <https://pint.readthedocs.io/en/stable/index.html>
 
     Returns:
-        A process-specific unit registry.
+        A process-wide unit registry.
     """
     pid = os.getpid()
     cache_dir = f"/tmp/pint_{pid}"
     return UnitRegistry(cache_folder=cache_dir)
 
 
+@functools.lru_cache(maxsize=QUANTITY_CACHE_SIZE)
+def _parse_quantity_cached(value: str) -> PlainQuantity[Any]:
+    return get_unit_registry().Quantity(value)
+
+
+def parse_quantity(value: Any) -> PlainQuantity[Any]:
+    """Construct a quantity of the registry returned by `get_unit_registry`, usually from a string.
+
+    This is equivalent to `get_unit_registry().Quantity(value)`, but the
+    results of parsing strings are cached, so parsing the same string again
+    (e.g. the same correct answer in every phase, or the same submitted answer
+    across submissions) is much faster.
+
+    Returns:
+        A new quantity, which the caller is free to modify.
+    """
+    if not isinstance(value, str):
+        return get_unit_registry().Quantity(value)
+    return copy.copy(_parse_quantity_cached(value))
+
+
 def full_unidecode(input_str: str) -> str:
     """Do unidecode of input and replace the unicode minus with the normal one.
 
@@ -6,14 +6,20 @@ from prairielearn.sympy_utils import ...
 """
 
 import ast
-import copy
+import functools
+import hashlib
 import html
+import time
+import types
+import warnings
 from collections import deque
 from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from tokenize import TokenError
 from typing import Any, Literal, TypedDict, TypeGuard, cast
 
+import numpy as np
+import numpy.typing as npt
 import sympy
 from sympy.parsing.sympy_parser import (
     eval_expr,
@@ -37,6 +43,34 @@ Examples:
     >>> {"x": {"positive": True}, "y": {"real": True}}
 """
 
+# The maximum number of distinct (expression, locals) pairs whose parsed form
+# is kept by `evaluate_with_source`.
+EXPRESSION_CACHE_SIZE = 1024
+
+# Defaults for the numeric probe used by `is_equivalent`.
+NUMERIC_PROBE_POINTS = 16
+NUMERIC_PROBE_TIME_BUDGET = 0.5
+
+# Functions that are not analytic, so that expressions using them can agree at
+# every sampled point (e.g. `Abs(x - 5)` and `5 - x` for `x < 5`) without being
+# equivalent. A numeric probe can only show that such expressions differ.
+NON_ANALYTIC_FUNCTIONS = (
+    sympy.Abs,
+    sympy.Max,
+    sympy.Min,
+    sympy.floor,
+    sympy.ceiling,
+    sympy.frac,
+    sympy.sign,
+    sympy.Heaviside,
+    sympy.Piecewise,
+    sympy.Mod,
+    sympy.re,
+    sympy.im,
+    sympy.arg,
+    sympy.conjugate,
+)
+
 
 class SympyJson(TypedDict):
     """A class with type signatures for the SymPy JSON dict"""
@@ -425,11 +459,74 @@ def evaluate(
     return evaluate_with_source(expr, locals_for_eval, allow_complex=allow_complex)[0]
 
 
+def _build_sympy_global_dict() -> dict[str, Any]:
+    # Global dict is set up to be very permissive for parsing purposes
+    # (makes it cleaner to call this function with a custom locals dict).
+    # This line shouldn't be dangerous, as it's just loading the global dict.
+    global_dict: dict[str, Any] = {}
+    exec("from sympy import *", global_dict)
+    return global_dict
+
+
+# Running `from sympy import *` takes a significant fraction of the time it
+# takes to parse a short expression, so the namespace is only built once per
+# process. It must not be modified; `eval` gets a shallow copy of it.
+_SYMPY_GLOBAL_DICT = types.MappingProxyType(_build_sympy_global_dict())
+
+LocalsKeyT = tuple[tuple[str, tuple[tuple[str, Any], ...]], ...]
+
+
+def _locals_key(locals_for_eval: LocalsForEval) -> LocalsKeyT:
+    """Return a hashable representation of `locals_for_eval`, for use as a cache key."""
+    return tuple(
+        (category, tuple(sorted(cast(SympyMapT, inner_dict).items())))
+        for category, inner_dict in locals_for_eval.items()
+    )
+
+
 def evaluate_with_source(
     expr: str, locals_for_eval: LocalsForEval, *, allow_complex: bool = False
 ) -> tuple[sympy.Expr, str]:
     """Evaluate a SymPy expression string with a given set of locals.
 
+    Successful results are kept in a process-wide LRU cache keyed by the
+    expression, the locals, and `allow_complex`, so repeated evaluations of the
+    same expression (e.g. the correct answer, or common submissions) skip
+    parsing and validation. Errors are not cached.
+
+    Returns:
+        A tuple of the SymPy expression and the code that was used to generate it.
+    """
+    try:
+        locals_key = _locals_key(locals_for_eval)
+        hash(locals_key)
+    except TypeError:
+        # Custom locals that aren't hashable can't be cached.
+        return _evaluate_with_source(expr, locals_for_eval, allow_complex=allow_complex)
+
+    return _evaluate_with_source_cached(expr, locals_key, allow_complex=allow_complex)
+
+
+@functools.lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _evaluate_with_source_cached(
+    expr: str, locals_key: LocalsKeyT, *, allow_complex: bool
+) -> tuple[sympy.Expr, str]:
+    locals_for_eval = cast(
+        LocalsForEval, {category: dict(items) for category, items in locals_key}
+    )
+    return _evaluate_with_source(expr, locals_for_eval, allow_complex=allow_complex)
+
+
+def clear_expression_cache() -> None:
+    """Clear the cache of parsed expressions used by `evaluate_with_source`."""
+    _evaluate_with_source_cached.cache_clear()
+
+
+def _evaluate_with_source(
+    expr: str, locals_for_eval: LocalsForEval, *, allow_complex: bool
+) -> tuple[sympy.Expr, str]:
+    """Uncached implementation of `evaluate_with_source`.
+
     Returns:
         A tuple of the SymPy expression and the code that was used to generate it.
 
@@ -449,12 +546,7 @@ def evaluate_with_source(
 
     # Based on code here:
     # https://github.com/sympy/sympy/blob/26f7bdbe3f860e7b4492e102edec2d6b429b5aaf/sympy/parsing/sympy_parser.py#L1086
-
-    # Global dict is set up to be very permissive for parsing purposes
-    # (makes it cleaner to call this function with a custom locals dict).
-    # This line shouldn't be dangerous, as it's just loading the global dict.
-    global_dict = {}
-    exec("from sympy import *", global_dict)
+    global_dict = dict(_SYMPY_GLOBAL_DICT)
 
     transformations = (*standard_transformations, implicit_multiplication_application)
 
@@ -463,8 +555,13 @@ def evaluate_with_source(
     except TokenError as exc:
         raise HasParseError(-1) from exc
 
-    # First do AST check, mainly for security
-    parsed_locals_to_eval = copy.deepcopy(locals_for_eval)
+    # First do AST check, mainly for security. The check only looks at the
+    # names in each dict, so shallow copies are enough.
+    parsed_locals_to_eval: LocalsForEval = {
+        "functions": {**locals_for_eval["functions"]},
+        "variables": {**locals_for_eval["variables"]},
+        "helpers": {**locals_for_eval["helpers"]},
+    }
 
     # Add locals that appear after sympy stringification
     # This check is only for safety, so won't change what gets parsed
@@ -634,6 +731,184 @@ def convert_string_to_sympy_with_source(
     return evaluate_with_source(expr, locals_for_eval, allow_complex=allow_complex)
 
 
+def _sample_symbol(
+    symbol: sympy.Symbol, rng: np.random.Generator, num_points: int
+) -> npt.NDArray[np.complex128]:
+    """Draw random values for a symbol that are consistent with its assumptions."""
+    assumptions = symbol.assumptions0
+    if assumptions.get("negative") or assumptions.get("nonpositive"):
+        signs = np.full(num_points, -1)
+    elif assumptions.get("positive") or assumptions.get("nonnegative"):
+        signs = np.full(num_points, 1)
+    else:
+        signs = rng.choice((-1, 1), size=num_points)
+
+    if assumptions.get("integer"):
+        magnitude = rng.integers(1, 100, size=num_points, endpoint=True)
+        return (signs * magnitude).astype(np.complex128)
+
+    if (
+        assumptions.get("real")
+        or assumptions.get("positive")
+        or assumptions.get("negative")
+    ):
+        # Sample magnitudes over several orders of magnitude, so that
+        # expressions that only agree near 1 (e.g. `Abs(x - 5)` and `5 - x`)
+        # are told apart.
+        magnitude = np.exp(rng.uniform(np.log(0.01), np.log(10), size=num_points))
+        return (signs * magnitude).astype(np.complex128)
+
+    # Away from the real axis, functions like `sin` and `tan` grow or cancel
+    # exponentially, so larger magnitudes would lose more digits than the
+    # high-precision check uses.
+    magnitude = rng.uniform(0.25, 3, size=num_points)
+    # Symbols are complex unless stated otherwise, so sample the complex plane.
+    angle = rng.uniform(-np.pi, np.pi, size=num_points)
+    return (magnitude * np.exp(1j * angle)).astype(np.complex128)
+
+
+def _differs_at_point(
+    a: sympy.Expr, b: sympy.Expr, point: dict[sympy.Symbol, complex]
+) -> bool:
+    """Confirm with high-precision arithmetic that `a` and `b` differ at a point."""
+    subs = {symbol: sympy.sympify(value) for symbol, value in point.items()}
+    a_value = cast(sympy.Expr, a.evalf(30, subs=subs))
+    b_value = cast(sympy.Expr, b.evalf(30, subs=subs))
+    difference = cast(sympy.Expr, (a_value - b_value).evalf(30))
+    try:
+        values = np.array([complex(a_value), complex(b_value), complex(difference)])
+    except TypeError:
+        return False
+    if not np.isfinite(values).all():
+        return False
+    scale = max(1, abs(values[0]), abs(values[1]))
+    return bool(abs(values[2]) > 1e-20 * scale)
+
+
+def numeric_probe(
+    a: sympy.Expr,
+    b: sympy.Expr,
+    *,
+    num_points: int = NUMERIC_PROBE_POINTS,
+    time_budget: float | None = NUMERIC_PROBE_TIME_BUDGET,
+) -> bool | None:
+    """Decide whether two SymPy expressions are equivalent by evaluating them at random points.
+
+    Both expressions are evaluated with NumPy at `num_points` random points,
+    sampled to respect each symbol's assumptions (e.g. positive, real, integer).
+    Symbols without a `real` assumption are sampled from the complex plane, which
+    matches how SymPy treats them. Any point at which the expressions appear to
+    differ is confirmed with high-precision arithmetic before it is trusted.
+
+    The points are derived from the expressions, so the result is deterministic
+    and the global random state is not touched.
+
+    Agreement at every point is not a proof that the expressions are
+    equivalent. However, the difference of two analytic expressions that are
+    not equivalent is only zero on a set of measure zero, so it is vanishingly
+    unlikely to vanish at every random point. Expressions that use non-analytic
+    functions (see `NON_ANALYTIC_FUNCTIONS`) can agree on whole regions, so the
+    probe is inconclusive for them unless they differ somewhere.
+
+    Returns:
+        `False` if the expressions differ at some point, `True` if they agree at
+        every point, or `None` if the probe is inconclusive (e.g. the expressions
+        use functions that can't be evaluated numerically or that aren't
+        analytic, are undefined at some points, or the time budget ran out).
+    """
+    start = time.perf_counter()
+
+    def out_of_time() -> bool:
+        return time_budget is not None and time.perf_counter() - start > time_budget
+
+    # Undefined (custom) functions have no numeric value.
+    if a.atoms(sympy.core.function.AppliedUndef) or b.atoms(
+        sympy.core.function.AppliedUndef
+    ):
+        return None
+
+    symbols = cast(list[sympy.Symbol], sorted(a.free_symbols | b.free_symbols, key=str))
+    seed = hashlib.sha256(f"{sympy.srepr(a)}\n{sympy.srepr(b)}".encode()).digest()
+    rng = np.random.default_rng(int.from_bytes(seed[:8], "big"))
+    samples = [_sample_symbol(symbol, rng, num_points) for symbol in symbols]
+
+    try:
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            a_values = np.broadcast_to(
+                np.asarray(sympy.lambdify(symbols, a, "numpy")(*samples), complex),
+                (num_points,),
+            )
+            b_values = np.broadcast_to(
+                np.asarray(sympy.lambdify(symbols, b, "numpy")(*samples), complex),
+                (num_points,),
+            )
+    except Exception:
+        return None
+
+    finite = np.isfinite(a_values) & np.isfinite(b_values)
+    if not finite.all():
+        return None
+
+    scale = np.maximum(np.abs(a_values), np.abs(b_values))
+    mismatched = np.nonzero(np.abs(a_values - b_values) > 1e-12 + 1e-12 * scale)[0]
+
+    for i in mismatched:
+        if out_of_time():
+            return None
+        point = {
+            symbol: complex(sample[i])
+            for symbol, sample in zip(symbols, samples, strict=True)
+        }
+        try:
+            if _differs_at_point(a, b, point):
+                return False
+        except Exception:
+            return None
+
+    if (
+        out_of_time()
+        or a.has(*NON_ANALYTIC_FUNCTIONS)
+        or b.has(*NON_ANALYTIC_FUNCTIONS)
+    ):
+        return None
+    return True
+
+
+def is_equivalent(
+    a: sympy.Expr,
+    b: sympy.Expr,
+    *,
+    num_points: int = NUMERIC_PROBE_POINTS,
+    time_budget: float | None = NUMERIC_PROBE_TIME_BUDGET,
+) -> bool:
+    """Check whether two SymPy expressions are mathematically equivalent.
+
+    A [numeric probe][prairielearn.sympy_utils.numeric_probe] is tried first,
+    as it is far cheaper than symbolic comparison for most expressions, and its
+    result is used if it is conclusive. Only if it isn't (e.g. the expressions
+    use non-analytic functions, or the time budget ran out) does `a.equals(b)`
+    decide. Note that the time budget applies to the probe; the symbolic check
+    can't be interrupted.
+
+    Returns:
+        `True` if the expressions are equivalent.
+    """
+    if a == b:
+        return True
+
+    # SymPy automatically cancels terms, so expressions that differ only by a
+    # constant (e.g. `x + 1` and `x + 2`) are recognized without any evaluation.
+    difference = a - b
+    if difference.is_Number:
+        return bool(difference == 0)
+
+    result = numeric_probe(a, b, num_points=num_points, time_budget=time_budget)
+    if result is not None:
+        return result
+    return a.equals(b) is True
+
+
 def point_to_error(expr: str, ind: int, w: int = 5) -> str:
     """Generate a string with a pointer to error in expr with index ind
 
@@ -1,7 +1,7 @@
 from typing import Any
 
 import pytest
-from prairielearn.internal.check_data import check_data
+from prairielearn.internal.check_data import check_data, snapshot_data
 
 
 def test_check_data_extra_props() -> None:
@@ -67,3 +67,42 @@ def test_check_data_number_keys() -> None:
             {"panel": "question", 1: "data", 2: "more data"},
             "render",
         )
+
+
+def test_snapshot_data_only_copies_compared_props() -> None:
+    data = {
+        "params": {"matrix": [[1, 2], [3, 4]]},
+        "options": {"question_url": "/q"},
+        "raw_submitted_answers": {"x": "1"},
+        "panel": "question",
+    }
+    snapshot = snapshot_data(data, "grade")
+
+    assert snapshot.keys() == data.keys()
+    # `params` may be modified during `grade`, so it doesn't need to be copied.
+    assert snapshot["params"] is None
+    # `panel` isn't present during `grade`, so it isn't compared either.
+    assert snapshot["panel"] is None
+    assert snapshot["options"] == data["options"]
+    assert snapshot["options"] is not data["options"]
+    assert snapshot["raw_submitted_answers"] == data["raw_submitted_answers"]
+
+
+def test_snapshot_data_detects_modification() -> None:
+    data = {"params": {"foo": "bar"}, "options": {"foo": "bar"}}
+    snapshot = snapshot_data(data, "grade")
+
+    data["params"]["foo"] = "baz"
+    check_data(snapshot, data, "grade")
+
+    data["options"]["foo"] = "baz"
+    with pytest.raises(
+        ValueError, match=r'data\["options"\] has been illegally modified'
+    ):
+        check_data(snapshot, data, "grade")
+
+
+def test_snapshot_data_missing_props() -> None:
+    snapshot = snapshot_data({"params": {}, "options": {}}, "grade")
+    with pytest.raises(ValueError, match="data is missing keys: params"):
+        check_data(snapshot, {"options": {}}, "grade")
@@ -48,8 +48,11 @@ def test_external_exports():
             load_all_extensions,
             load_extension,
             load_host_script,
+            load_template,
             numpy_to_matlab,
             numpy_to_matlab_sf,
+            parse_quantity,
+            render_template,
             set_all_or_nothing_score_data,
             set_weighted_score_data,
             string_fraction_to_number,
@@ -0,0 +1,94 @@
+import os
+import pathlib
+import sys
+from collections.abc import Iterator
+
+import pytest
+from prairielearn.internal import controller_cache
+
+
+@pytest.fixture
+def core_elements_path(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[pathlib.Path]:
+    monkeypatch.setattr(controller_cache, "CORE_ELEMENTS_PATH", tmp_path)
+    controller_cache.clear_persistent_cache()
+    yield tmp_path
+    controller_cache.clear_persistent_cache()
+
+
+def write_element(root: pathlib.Path, name: str, source: str) -> pathlib.Path:
+    element_path = root / name
+    element_path.mkdir(exist_ok=True)
+    (element_path / "info.json").write_text(f'{{"controller": "{name}.py"}}')
+    controller_path = element_path / f"{name}.py"
+    controller_path.write_text(source)
+    return controller_path
+
+
+def test_core_controller_is_cached_across_calls(
+    core_elements_path: pathlib.Path,
+) -> None:
+    path = write_element(core_elements_path, "pl-test", "VALUE = 1\n")
+
+    first = controller_cache.load_controller(path, {})
+    second = controller_cache.load_controller(path, {})
+
+    assert first is second
+    assert first["VALUE"] == 1
+
+
+def test_core_controller_is_reloaded_when_modified(
+    core_elements_path: pathlib.Path,
+) -> None:
+    path = write_element(core_elements_path, "pl-test", "VALUE = 1\n")
+    first = controller_cache.load_controller(path, {})
+
+    path.write_text("VALUE = 2\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = controller_cache.load_controller(path, {})
+    assert first is not second
+    assert second["VALUE"] == 2
+
+
+@pytest.mark.usefixtures("core_elements_path")
+def test_non_core_controller_uses_local_cache(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> None:
+    course_path = tmp_path_factory.mktemp("course")
+    path = write_element(course_path, "course-element", "VALUE = 1\n")
+
+    local_cache: dict[pathlib.Path, controller_cache.ControllerModule] = {}
+    first = controller_cache.load_controller(path, local_cache)
+    assert local_cache == {path: first}
+    assert controller_cache.load_controller(path, {}) is not first
+
+
+def test_preload_core_elements(core_elements_path: pathlib.Path) -> None:
+    good_path = write_element(core_elements_path, "pl-good", "VALUE = 1\n")
+    write_element(core_elements_path, "pl-bad", "import does_not_exist\n")
+    cwd = os.getcwd()
+
+    assert controller_cache.preload_core_elements() == [good_path]
+    assert os.getcwd() == cwd
+    assert controller_cache.load_controller(good_path, {})["VALUE"] == 1
+
+
+def test_preload_core_elements_removes_element_modules(
+    core_elements_path: pathlib.Path,
+) -> None:
+    path = write_element(
+        core_elements_path,
+        "pl-helper",
+        "import pl_helper_defaults\nimport json\n\nVALUE = pl_helper_defaults.VALUE\n",
+    )
+    (path.parent / "pl_helper_defaults.py").write_text("VALUE = 1\n")
+
+    assert controller_cache.preload_core_elements() == [path]
+    # The controller still works, but its helper module doesn't shadow any
+    # other module with the same name.
+    assert controller_cache.load_controller(path, {})["VALUE"] == 1
+    assert "pl_helper_defaults" not in sys.modules
+    assert "json" in sys.modules
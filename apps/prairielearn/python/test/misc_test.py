@@ -2,11 +2,13 @@ import base64
 import itertools as it
 import json
 import math
+import os
+import re
 import string
 from collections.abc import Callable
 from enum import Enum
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, Literal, cast
 
 import lxml.html
 import networkx as nx
@@ -185,6 +187,22 @@ def test_inner_html(inner_html_string: str) -> None:
     assert pl.inner_html(e) == inner_html_string
 
 
+def test_render_template(tmp_path: Path) -> None:
+    template_path = tmp_path / "test.mustache"
+    template_path.write_text("{{#items}}<b>{{.}}</b>{{/items}}", encoding="utf-8")
+
+    assert pl.render_template(template_path, {"items": ["a", "<"]}) == (
+        "<b>a</b><b>&lt;</b>"
+    )
+    # The tokenized template is reused while the file is unchanged.
+    assert pl.load_template(template_path) is pl.load_template(str(template_path))
+
+    stat = template_path.stat()
+    template_path.write_text("{{{value}}}", encoding="utf-8")
+    os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert pl.render_template(template_path, {"value": "<i>"}) == "<i>"
+
+
 @pytest.mark.parametrize(
     ("weight_set_function", "score_1", "score_2", "score_3", "expected_score"),
     [
@@ -240,12 +258,20 @@ def test_set_score_data(
         np.array([[1, 2], [3, 4]], dtype=complex),
         np.array([[1, "stuff"], [3, None]], dtype=object),
         np.ones((2, 3, 4), dtype=np.int16),
+        np.array(7.5),
+        np.arange(12).reshape(3, 4)[:, ::2],
+        np.array(["a", "bc"]),
+        np.array([True, False]),
     ],
 )
-def test_numpy_serialization(numpy_object: ArrayLike) -> None:
+@pytest.mark.parametrize("np_encoding_version", [2, 3])
+def test_numpy_serialization(
+    numpy_object: ArrayLike, np_encoding_version: Literal[2, 3]
+) -> None:
     """Test equality after conversion of various numpy objects."""
     json_object = json.dumps(
-        pl.to_json(numpy_object, np_encoding_version=2), allow_nan=False
+        pl.to_json(numpy_object, np_encoding_version=np_encoding_version),
+        allow_nan=False,
     )
     decoded_json_object = pl.from_json(json.loads(json_object))
 
@@ -257,6 +283,35 @@ def test_numpy_serialization(numpy_object: ArrayLike) -> None:
     np.testing.assert_array_equal(numpy_object, decoded_json_object, strict=True)
 
 
+def test_numpy_buffer_serialization() -> None:
+    """Test that version 3 arrays are stored little-endian and decode to writeable arrays."""
+    big_endian = np.arange(6, dtype=">i4").reshape(2, 3)
+    encoded = cast(dict[str, Any], pl.to_json(big_endian, np_encoding_version=3))
+    assert encoded["_type"] == "ndarray_buffer"
+    assert encoded["_dtype"] == "<i4"
+    assert encoded["_shape"] == [2, 3]
+
+    decoded = pl.from_json(json.loads(json.dumps(encoded)))
+    np.testing.assert_array_equal(decoded, big_endian)
+    decoded[0, 0] = 10
+    assert decoded[0, 0] == 10
+
+    # These can't be represented by the list-based encoding
+    for array in (
+        np.zeros((0, 3)),
+        np.array(["2024-01-01", "2025-06-30"], dtype="datetime64[D]"),
+    ):
+        encoded = pl.to_json(array, np_encoding_version=3)
+        np.testing.assert_array_equal(
+            pl.from_json(json.loads(json.dumps(encoded))), array, strict=True
+        )
+
+    # Object arrays can't be stored as a buffer
+    object_array = np.array([1, "a"], dtype=object)
+    encoded = cast(dict[str, Any], pl.to_json(object_array, np_encoding_version=3))
+    assert encoded["_type"] == "ndarray"
+
+
 @pytest.mark.parametrize(
     ("object_to_encode", "expected_result"),
     [(np.float64(5.0), 5.0), (np.complex128("12+3j"), complex("12+3j"))],
@@ -413,6 +468,63 @@ def test_grade_answer_parametrized_key_error_blank(
     assert question_data["partial_scores"][question_name]["score"] == 0.0
 
 
+def test_grade_answer_parametrized_cache(question_data: pl.QuestionData) -> None:
+    pl.clear_grade_cache()
+    calls: list[str] = []
+
+    def grading_function(submitted_answer: str) -> tuple[float, str | None]:
+        calls.append(submitted_answer)
+        return (0.5, "Almost") if submitted_answer == "b" else (1.0, None)
+
+    for answer, cache_key in [
+        ("a", "x"),
+        ("b", "x"),
+        ("b", "x"),
+        ("b", "y"),
+        ("a", "x"),
+    ]:
+        question_data["submitted_answers"] = {"name": answer}
+        question_data["partial_scores"] = {}
+        pl.grade_answer_parameterized(
+            question_data, "name", grading_function, cache_key=cache_key
+        )
+        expected = 0.5 if answer == "b" else 1.0
+        assert question_data["partial_scores"]["name"]["score"] == expected
+
+    assert calls == ["a", "b", "b"]
+    assert question_data["partial_scores"]["name"].get("feedback") is None
+    assert pl.grade_cache_info()[:3] == (2, 3, 3)
+
+    # Answers that can't be serialized are graded without the cache
+    question_data["submitted_answers"] = {"name": {"a"}}
+    pl.grade_answer_parameterized(
+        question_data, "name", lambda _: (True, None), cache_key="x"
+    )
+    assert pl.grade_cache_info()[:3] == (2, 3, 3)
+
+    pl.clear_grade_cache()
+    assert pl.grade_cache_info()[:3] == (0, 0, 0)
+
+
+def test_get_unit_registry_is_shared() -> None:
+    assert pl.get_unit_registry() is pl.get_unit_registry()
+
+
+def test_parse_quantity() -> None:
+    ureg = pl.get_unit_registry()
+    first = pl.parse_quantity("3 m/s")
+    assert first == ureg.Quantity("3 m/s")
+
+    # Each call returns a new quantity, even when the result is cached.
+    first.ito("km/h")
+    second = pl.parse_quantity("3 m/s")
+    assert second is not first
+    assert second.magnitude == 3
+    assert str(second.units) == "meter / second"
+
+    assert pl.parse_quantity(2.5) == ureg.Quantity(2.5)
+
+
 @pytest.mark.repeat(100)
 def test_get_uuid() -> None:
     """Test basic properties of the pl.get_uuid() function."""
@@ -1235,6 +1347,85 @@ def test_get_string_attrib(
         assert result == expected_result
 
 
+@pytest.mark.parametrize(
+    ("method", "function", "args"),
+    [
+        ("get_string", pl.get_string_attrib, ("str-attr",)),
+        ("get_string", pl.get_string_attrib, ("legacy-attr",)),
+        ("get_string", pl.get_string_attrib, ("missing", None)),
+        ("get_string", pl.get_string_attrib, ("missing",)),
+        ("get_string", pl.get_string_attrib, ("checked", "default")),
+        ("get_boolean", pl.get_boolean_attrib, ("bool-attr",)),
+        ("get_boolean", pl.get_boolean_attrib, ("missing", True)),
+        ("get_boolean", pl.get_boolean_attrib, ("checked", False)),
+        ("get_boolean", pl.get_boolean_attrib, ("str-attr",)),
+        ("get_integer", pl.get_integer_attrib, ("int-attr",)),
+        ("get_integer", pl.get_integer_attrib, ("missing", 3)),
+        ("get_integer", pl.get_integer_attrib, ("float-attr",)),
+        ("get_float", pl.get_float_attrib, ("float-attr",)),
+        ("get_float", pl.get_float_attrib, ("int-attr", 1.0)),
+        ("get_float", pl.get_float_attrib, ("str-attr", 1.0)),
+        ("get_color", pl.get_color_attrib, ("color-attr", None)),
+        ("get_color", pl.get_color_attrib, ("missing", "red1")),
+        ("get_color", pl.get_color_attrib, ("str-attr", None)),
+    ],
+)
+def test_element_attribs(
+    method: str, function: Callable[..., Any], args: tuple[Any, ...]
+) -> None:
+    element = lxml.html.fragment_fromstring(
+        '<pl-test str-attr="value" legacy_attr="old" bool-attr="yes" int-attr="4" '
+        'float-attr="2.5" color-attr="blue3" checked></pl-test>'
+    )
+    attribs = pl.ElementAttribs(element)
+
+    try:
+        expected = function(element, *args)
+    except ValueError as exc:
+        with pytest.raises(ValueError, match=re.escape(str(exc))):
+            getattr(attribs, method)(*args)
+    else:
+        # The second call is served from the cache.
+        assert getattr(attribs, method)(*args) == expected
+        assert getattr(attribs, method)(*args) == expected
+
+
+def test_element_attribs_enum() -> None:
+    element = lxml.html.fragment_fromstring(
+        '<pl-thing test-choice="dummy-choice-1" bad-choice="dummy_choice_1"></pl-thing>'
+    )
+    attribs = pl.ElementAttribs(element)
+
+    assert attribs.get_enum("test-choice", DummyEnum) is DummyEnum.DUMMY_CHOICE_1
+    assert (
+        attribs.get_enum("missing", DummyEnum, DummyEnum.DEFAULT) is DummyEnum.DEFAULT
+    )
+    with pytest.raises(ValueError, match="is not a valid type"):
+        attribs.get_enum("bad-choice", DummyEnum)
+    with pytest.raises(ValueError, match="missing and no default"):
+        attribs.get_enum("missing", DummyEnum)
+
+
+def test_get_attribs() -> None:
+    element = lxml.html.fragment_fromstring(
+        '<pl-test required-attr="val" optional_attr="1"></pl-test>'
+    )
+
+    attribs = pl.get_attribs(element, ["required-attr"], ["optional-attr"])
+    assert attribs.has("optional-attr")
+    assert attribs.get_integer("optional-attr") == 1
+    # Values are cached once they have been read.
+    element.attrib["optional_attr"] = "2"
+    assert attribs.get_integer("optional-attr") == 1
+    assert attribs.get_string("optional-attr") == "2"
+    assert pl.get_attribs(element).get_integer("optional-attr") == 2
+
+    with pytest.raises(ValueError, match='Required attribute "missing-attr" missing'):
+        pl.get_attribs(element, ["missing-attr"], ["optional-attr"])
+    with pytest.raises(ValueError, match='Unknown attribute "required-attr"'):
+        pl.get_attribs(element, [], ["optional-attr"])
+
+
 def test_string_to_integer() -> None:
     """Test converting strings to integers."""
     # Basic integer parsing
@@ -0,0 +1,121 @@
+import json
+import pathlib
+
+import pytest
+from prairielearn.internal import preload
+
+
+def write_json(path: pathlib.Path, value: object) -> str:
+    path.write_text(json.dumps(value))
+    return str(path)
+
+
+def test_load_manifest_defaults() -> None:
+    assert preload.load_manifest(None) == preload.DEFAULT_MANIFEST
+    assert preload.load_manifest("") == preload.DEFAULT_MANIFEST
+
+
+def test_load_manifest_overrides(tmp_path: pathlib.Path) -> None:
+    path = write_json(tmp_path / "manifest.json", {"policy": "lazy"})
+    manifest = preload.load_manifest(path)
+    assert manifest["policy"] == "lazy"
+    assert manifest["modules"] == preload.DEFAULT_MANIFEST["modules"]
+
+
+@pytest.mark.parametrize(
+    ("manifest", "match"),
+    [
+        ({"policy": "sometimes"}, "Invalid preload policy"),
+        ({"policy": "histogram"}, "requires a histogram path"),
+    ],
+)
+def test_load_manifest_invalid(
+    tmp_path: pathlib.Path, manifest: dict[str, str], match: str
+) -> None:
+    path = write_json(tmp_path / "manifest.json", manifest)
+    with pytest.raises(ValueError, match=match):
+        preload.load_manifest(path)
+
+
+def test_select_modules_policies(tmp_path: pathlib.Path) -> None:
+    histogram = write_json(
+        tmp_path / "histogram.json",
+        {
+            "rarely_used": {"used": 1, "observed": 100},
+            "often_used": {"used": 50, "observed": 100},
+        },
+    )
+    manifest: preload.PreloadManifest = {
+        "policy": "eager",
+        "modules": ["rarely_used", "often_used", "never_observed"],
+        "elements": False,
+        "histogram": histogram,
+        "min_usage": 0.1,
+    }
+
+    assert preload.select_modules(manifest) == manifest["modules"]
+    assert preload.select_modules({**manifest, "policy": "lazy"}) == []
+    assert preload.select_modules({**manifest, "policy": "histogram"}) == [
+        "often_used",
+        "never_observed",
+    ]
+
+
+def test_select_modules_ignores_malformed_histogram(tmp_path: pathlib.Path) -> None:
+    histogram = write_json(
+        tmp_path / "histogram.json",
+        {
+            "string_count": {"used": "x", "observed": 100},
+            "boolean_count": {"used": True, "observed": 100},
+            "too_many_uses": {"used": 200, "observed": 100},
+            "not_a_dict": [0, 100],
+            "rarely_used": {"used": 1, "observed": 100},
+        },
+    )
+    manifest: preload.PreloadManifest = {
+        "policy": "histogram",
+        "modules": [
+            "string_count",
+            "boolean_count",
+            "too_many_uses",
+            "not_a_dict",
+            "rarely_used",
+        ],
+        "elements": False,
+        "histogram": histogram,
+        "min_usage": 0.1,
+    }
+
+    # Malformed entries count as never observed, so those modules are preloaded.
+    assert preload.select_modules(manifest) == manifest["modules"][:-1]
+
+    write_json(tmp_path / "histogram.json", ["not", "a", "histogram"])
+    assert preload.select_modules(manifest) == manifest["modules"]
+
+
+def test_record_module_usage(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / "histogram.json")
+
+    # `json` is always imported in this process; the other module never is.
+    candidates = ["json", "not_a_real_module", "os"]
+    used = preload.imported_modules(candidates)
+    assert used == ["json", "os"]
+    preload.record_module_usage(path, candidates, ["os"], used)
+    preload.record_module_usage(path, candidates, ["os"], used)
+
+    assert preload.read_usage_histogram(path) == {
+        "json": {"used": 2, "observed": 2},
+        "not_a_real_module": {"used": 0, "observed": 2},
+    }
+
+
+def test_preload_modules_profile(tmp_path: pathlib.Path) -> None:
+    profiles = preload.preload_modules(["json", "colorsys"], elements=False)
+    assert [p["name"] for p in profiles] == ["json", "colorsys"]
+    assert all(p["import_ms"] >= 0 for p in profiles)
+
+    report_path = tmp_path / "report.json"
+    preload.write_profile_report(str(report_path), profiles)
+    report = json.loads(report_path.read_text())
+    assert {p["name"] for p in report["modules"]} == {"json", "colorsys"}
+    assert report["total_rss_kb"] == sum(p["rss_kb"] for p in profiles)
@@ -0,0 +1,386 @@
+import copy
+import os
+import pathlib
+import re
+import sys
+from typing import Any
+
+import prairielearn.internal.zygote_utils as zu
+import pytest
+from prairielearn.internal import question_phases
+
+CONTROLLER = """
+import random
+
+LOADS = []
+
+
+def grade(element, data):
+    LOADS.append(None)
+    name = element.get("answers-name")
+    correct = data["submitted_answers"].get(name) == data["correct_answers"][name]
+    data["partial_scores"][name] = {
+        "score": 1.0 if correct else 0.0,
+        "weight": int(element.get("weight", "1")),
+        "loads": len(LOADS),
+    }
+    # Changes to `params` must not leak into the next submission.
+    data["params"].setdefault("graded", []).append(name)
+    data["feedback"][name] = random.random()
+
+
+def parse(element, data):
+    name = element.get("answers-name")
+    value = data["submitted_answers"].get(name)
+    if isinstance(value, str):
+        if value.isdigit():
+            data["submitted_answers"][name] = int(value)
+        else:
+            data["format_errors"][name] = "Not a number"
+
+
+def render(element, data):
+    if element.get("random") is not None:
+        return f"<span>{random.random()}</span>"
+    return f"<span>{element.get('answers-name') * 100}</span>"
+"""
+
+
+@pytest.fixture
+def context(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> question_phases.RenderContext:
+    # Processing elements changes the working directory and `sys.path`.
+    monkeypatch.chdir(os.getcwd())
+    monkeypatch.setattr(sys, "path", list(sys.path))
+
+    element_path = tmp_path / "elements" / "test-input"
+    element_path.mkdir(parents=True)
+    (element_path / "test-input.py").write_text(CONTROLLER)
+    return {
+        "html": '<div><test-input answers-name="a"></test-input></div>'
+        '<test-input answers-name="b" weight="3"></test-input>',
+        "elements": {
+            "test-input": {
+                "name": "test-input",
+                "controller": "test-input.py",
+                "type": "course",
+            }
+        },
+        "element_extensions": {},
+        "course_path": str(tmp_path),
+    }
+
+
+def variant_data() -> dict[str, Any]:
+    return {
+        "params": {},
+        "correct_answers": {"a": 1, "b": 2},
+        "submitted_answers": {},
+        "raw_submitted_answers": {},
+        "format_errors": {},
+        "partial_scores": {},
+        "score": 0,
+        "feedback": {},
+        "variant_seed": 1,
+        "options": {},
+        "answers_names": {},
+    }
+
+
+@pytest.mark.parametrize(
+    ("partial_credit", "expected_scores"),
+    [(True, [1.0, 0.25, 0.75, 0.0]), (False, [1, 0, 0, 0])],
+)
+def test_grade_submissions(
+    context: question_phases.RenderContext,
+    *,
+    partial_credit: bool,
+    expected_scores: list[float],
+) -> None:
+    data = variant_data()
+    answers = [{"a": 1, "b": 2}, {"a": 1, "b": 0}, {"a": 0, "b": 2}, {}]
+
+    results = list(
+        question_phases.grade_submissions(
+            data,
+            [{"submitted_answers": answer} for answer in answers],
+            context,
+            partial_credit=partial_credit,
+        )
+    )
+
+    assert [result["score"] for result in results] == expected_scores
+    assert [result["submitted_answers"] for result in results] == answers
+    assert all(result["gradable"] for result in results)
+    # The controller is only loaded once for all submissions.
+    assert [result["partial_scores"]["b"]["loads"] for result in results] == [
+        2,
+        4,
+        6,
+        8,
+    ]
+    assert data == variant_data()
+
+
+def test_grade_submissions_server_grade(
+    context: question_phases.RenderContext,
+) -> None:
+    seen_params: list[dict[str, Any]] = []
+
+    def server_grade(data: dict[str, Any]) -> dict[str, Any]:
+        seen_params.append(data["params"])
+        data["score"] = 0.5
+        data["format_errors"]["c"] = "Invalid"
+        return data
+
+    results = list(
+        question_phases.grade_submissions(
+            variant_data(),
+            [
+                {"submitted_answers": {"a": 1}},
+                {"submitted_answers": {"b": 2}, "params": {"x": 1}},
+            ],
+            context,
+            server_grade=server_grade,
+        )
+    )
+
+    assert [result["score"] for result in results] == [0.5, 0.5]
+    assert not any(result["gradable"] for result in results)
+    assert seen_params == [{"graded": ["a", "b"]}, {"x": 1, "graded": ["a", "b"]}]
+
+
+def test_grade_submissions_submission_props(
+    context: question_phases.RenderContext,
+) -> None:
+    results = list(
+        question_phases.grade_submissions(
+            variant_data(),
+            [
+                # Graded against its own correct answers
+                {
+                    "submitted_answers": {"a": 0, "b": 0},
+                    "correct_answers": {"a": 0, "b": 0},
+                },
+                # Not gradable, so not graded
+                {
+                    "submitted_answers": {"a": 1, "b": 2},
+                    "raw_submitted_answers": {"a": "1", "b": "two"},
+                    "format_errors": {"b": "Not a number"},
+                    "gradable": False,
+                },
+            ],
+            context,
+        )
+    )
+
+    assert results[0]["score"] == 1.0
+    assert results[0]["gradable"]
+    assert results[1] == {
+        "submitted_answers": {"a": 1, "b": 2},
+        "format_errors": {"b": "Not a number"},
+        "partial_scores": {},
+        "score": 0,
+        "feedback": {},
+        "gradable": False,
+    }
+
+
+def test_grade_submissions_parse(context: question_phases.RenderContext) -> None:
+    submissions: list[question_phases.Submission] = [
+        {"submitted_answers": {"a": "1", "b": "2"}},
+        {"submitted_answers": {"a": "x", "b": "2"}},
+    ]
+
+    results = list(
+        question_phases.grade_submissions(
+            variant_data(), submissions, context, parse=True
+        )
+    )
+
+    assert results[0]["submitted_answers"] == {"a": 1, "b": 2}
+    assert results[0]["score"] == 1.0
+    assert results[0]["gradable"]
+    # A submission with format errors isn't graded.
+    assert results[1]["format_errors"] == {"a": "Not a number"}
+    assert results[1]["partial_scores"] == {}
+    assert results[1]["score"] == 0
+    assert not results[1]["gradable"]
+    # Without `parse`, the answers are graded as they are.
+    (unparsed,) = question_phases.grade_submissions(
+        variant_data(), submissions[:1], context
+    )
+    assert unparsed["score"] == 0.0
+
+
+def test_grade_submissions_element_error(
+    context: question_phases.RenderContext,
+) -> None:
+    data = variant_data()
+    del data["correct_answers"]["b"]
+
+    results = question_phases.grade_submissions(
+        data, [{"submitted_answers": {"a": 1}}], context
+    )
+    with pytest.raises(RuntimeError, match="Error processing element test-input"):
+        next(results)
+
+
+def test_grade_jobs_in_parallel(context: question_phases.RenderContext) -> None:
+    variants = []
+    for seed in range(3):
+        data = variant_data()
+        data["variant_seed"] = seed
+        variants.append(data)
+    jobs: list[question_phases.GradingJob] = [
+        {
+            "context": context,
+            "data": variants[index % 3],
+            "submission": {"submitted_answers": {"a": index % 2, "b": 2}},
+        }
+        for index in range(20)
+    ]
+
+    results = dict(question_phases.grade_jobs_in_parallel(jobs, processes=3))
+
+    assert sorted(results) == list(range(20))
+    for index, job in enumerate(jobs):
+        (expected,) = question_phases.grade_submissions(
+            job["data"], [job["submission"]], context
+        )
+        # Each process loads the controller separately.
+        for partial_score in (
+            *results[index]["partial_scores"].values(),
+            *expected["partial_scores"].values(),
+        ):
+            del partial_score["loads"]
+        assert results[index] == expected
+
+
+def test_grade_jobs_in_parallel_no_jobs() -> None:
+    assert list(question_phases.grade_jobs_in_parallel([], processes=3)) == []
+
+
+def test_process_render_streaming(context: question_phases.RenderContext) -> None:
+    data = variant_data()
+    data["options"] = {
+        "course_element_files_url": "/elements",
+        "course_element_extension_files_url": "/extensions",
+    }
+    data["panel"] = "question"
+    context["html"] = "<p>Start</p>" + context["html"] * 1000
+    expected, _ = question_phases.process("render", copy.deepcopy(data), context)
+
+    chunks: list[str] = []
+    html, processed_elements = question_phases.process(
+        "render", data, context, write_chunk=chunks.append
+    )
+
+    assert html is None
+    assert processed_elements == {"test-input"}
+    assert len(chunks) > 1
+    assert "".join(chunks) == expected
+
+
+def test_process_render_streaming_element_error(
+    context: question_phases.RenderContext,
+) -> None:
+    data = variant_data()
+    data["options"] = {
+        "course_element_files_url": "/elements",
+        "course_element_extension_files_url": "/extensions",
+    }
+    data["panel"] = "question"
+    html = context["html"] * 1000
+    expected, _ = question_phases.process(
+        "render", copy.deepcopy(data), {**context, "html": html}
+    )
+    # An element without `answers-name` fails to render.
+    context["html"] = html + "<test-input></test-input>"
+
+    chunks: list[str] = []
+    with pytest.raises(RuntimeError, match="Error processing element test-input"):
+        question_phases.process("render", data, context, write_chunk=chunks.append)
+
+    # The chunks written before the error are only the start of the HTML.
+    assert chunks
+    assert isinstance(expected, str)
+    assert expected.startswith("".join(chunks))
+
+
+def test_process_render_parallel(context: question_phases.RenderContext) -> None:
+    data = variant_data()
+    data["options"] = {
+        "course_element_files_url": "/elements",
+        "course_element_extension_files_url": "/extensions",
+    }
+    data["panel"] = "question"
+    context["html"] = "<p>Start</p>" + context["html"] * 3 + "<p>End</p>"
+    expected, _ = question_phases.process("render", copy.deepcopy(data), context)
+
+    html, processed_elements = question_phases.process(
+        "render", copy.deepcopy(data), context, processes=2
+    )
+    assert html == expected
+    assert processed_elements == {"test-input"}
+
+    chunks: list[str] = []
+    question_phases.process(
+        "render", copy.deepcopy(data), context, write_chunk=chunks.append, processes=2
+    )
+    assert "".join(chunks) == expected
+
+    context["html"] += "<div><test-input></test-input></div>"
+    with pytest.raises(RuntimeError, match="Error processing element test-input"):
+        question_phases.process("render", data, context, processes=2)
+
+
+def test_process_render_parallel_random(
+    context: question_phases.RenderContext,
+) -> None:
+    data = variant_data()
+    data["options"] = {
+        "course_element_files_url": "/elements",
+        "course_element_extension_files_url": "/extensions",
+    }
+    data["panel"] = "question"
+    context["html"] = "<div><test-input random></test-input></div>" * 4
+
+    def render(processes: int) -> str:
+        zu.seed_prngs(1)
+        html, _ = question_phases.process(
+            "render", copy.deepcopy(data), context, processes=processes
+        )
+        assert isinstance(html, str)
+        return html
+
+    html = render(2)
+    # The result doesn't depend on how the fragments are spread over processes.
+    assert render(2) == html
+    assert render(4) == html
+    # Each fragment draws different numbers.
+    assert len(set(re.findall(r"<span>(.*?)</span>", html))) == 4
+
+
+@pytest.mark.parametrize(
+    ("partial_scores", "partial_credit", "expected"),
+    [
+        ({}, True, 0),
+        ({}, False, 0),
+        ({"a": {"score": 1, "weight": 2}, "b": {"score": 0.5}}, True, 2.5 / 3),
+        ({"a": {"score": 1}, "b": {"score": 0.5}}, False, 0),
+        ({"a": {"score": 1}, "b": {"score": 1.0, "weight": 0}}, False, 1),
+        ({"a": {"score": True}, "b": None}, True, 0),
+        ({"a": {"weight": 0}}, True, 0),
+    ],
+)
+def test_compute_score(
+    partial_scores: dict[str, Any],
+    *,
+    partial_credit: bool,
+    expected: float,
+) -> None:
+    assert question_phases.compute_score(
+        partial_scores, partial_credit=partial_credit
+    ) == pytest.approx(expected)
@@ -32,6 +32,32 @@ def test_evaluate() -> None:
         psu.evaluate("eval('dict')", locals_for_eval=locals_for_eval)
 
 
+def test_evaluate_cache() -> None:
+    psu.clear_expression_cache()
+    x = sympy.Symbol("x")
+    x_positive = sympy.Symbol("x", positive=True)
+
+    first = psu.convert_string_to_sympy("x^2 + 1", ["x"])
+    second = psu.convert_string_to_sympy("x^2 + 1", ["x"])
+    assert first is second
+    assert first == x**2 + 1
+
+    # Assumptions are part of the cache key
+    positive = psu.convert_string_to_sympy(
+        "x^2 + 1", ["x"], assumptions={"x": {"positive": True}}
+    )
+    assert positive == x_positive**2 + 1
+    assert positive != first
+
+    # So is allow_complex
+    psu.convert_string_to_sympy("i", allow_complex=True)
+    with pytest.raises(psu.HasComplexError):
+        psu.convert_string_to_sympy("sqrt(-1)", allow_complex=False)
+    with pytest.raises(psu.HasComplexError):
+        psu.convert_string_to_sympy("sqrt(-1)", allow_complex=False)
+    assert psu.convert_string_to_sympy("sqrt(-1)", allow_complex=True) == sympy.I
+
+
 class TestSympy:
     SYMBOL_NAMES = ("n", "m", "alpha", "\u03bc0")
     M, N, ALPHA, MU0 = sympy.symbols("m n alpha mu0")
@@ -402,3 +428,77 @@ def test_greek_unicode_transform(input_str: str, expected_output: str) -> None:
 )
 def test_get_items_list(items_string: str | None, expected_output: list[str]) -> None:
     assert psu.get_items_list(items_string) == expected_output
+
+
+@pytest.mark.parametrize(
+    ("a_str", "b_str", "expected"),
+    [
+        ("(x + 1)^2", "x^2 + 2*x + 1", True),
+        ("(x + 1)^2", "x^2 + 2*x + 2", False),
+        ("sin(x)^2 + cos(x)^2", "1", True),
+        ("sin(2*x)", "2*sin(x)*cos(x)", True),
+        ("exp(x + y)", "exp(x)*exp(y)", True),
+        ("x", "x + 1/100000000", False),
+        # Symbols are complex unless assumptions say otherwise
+        ("sqrt(x^2)", "x", False),
+        ("log(x*y)", "log(x) + log(y)", False),
+    ],
+)
+def test_is_equivalent(a_str: str, b_str: str, *, expected: bool) -> None:
+    a = psu.convert_string_to_sympy(a_str, ["x", "y"])
+    b = psu.convert_string_to_sympy(b_str, ["x", "y"])
+    assert psu.is_equivalent(a, b) is expected
+
+
+def test_is_equivalent_trusts_numeric_probe(monkeypatch: pytest.MonkeyPatch) -> None:
+    def equals(*_args: object) -> bool:
+        raise AssertionError("Symbolic comparison should not be needed")
+
+    monkeypatch.setattr(sympy.Expr, "equals", equals)
+    a = psu.convert_string_to_sympy("(x + y)^3", ["x", "y"])
+    b = psu.convert_string_to_sympy("x^3 + 3*x^2*y + 3*x*y^2 + y^3", ["x", "y"])
+    c = psu.convert_string_to_sympy("x^3 + 3*x^2*y + 3*x*y^2 + y^2", ["x", "y"])
+    assert psu.is_equivalent(a, b)
+    assert not psu.is_equivalent(a, c)
+
+
+def test_numeric_probe_respects_assumptions() -> None:
+    assumptions = {"x": {"positive": True}, "y": {"positive": True}}
+    a = psu.convert_string_to_sympy("log(x*y)", ["x", "y"], assumptions=assumptions)
+    b = psu.convert_string_to_sympy(
+        "log(x) + log(y)", ["x", "y"], assumptions=assumptions
+    )
+    assert psu.numeric_probe(a, b) is True
+
+
+def test_is_equivalent_non_analytic() -> None:
+    x = sympy.Symbol("x", real=True)
+    positive_x = sympy.Symbol("x", positive=True)
+    abs_x_minus_five: Any = sympy.Abs(x - 5)
+    abs_x_minus_four: Any = sympy.Abs(positive_x - 4)
+    max_plus_min: Any = sympy.Max(x, 0) + sympy.Min(x, 0)
+    abs_x: Any = sympy.Abs(x)
+
+    # These agree at the points that used to be sampled, but are not equivalent
+    assert not psu.is_equivalent(abs_x_minus_five, 5 - x)
+    assert not psu.is_equivalent(
+        positive_x**2, positive_x**2 + positive_x + abs_x_minus_four - 4
+    )
+
+    # Agreement at every point doesn't prove that these are equivalent
+    assert psu.numeric_probe(max_plus_min, x) is None
+    assert psu.numeric_probe(abs_x, sympy.sqrt(x**2)) is None
+
+
+def test_numeric_probe_inconclusive() -> None:
+    f = sympy.Function("f")
+    x = sympy.Symbol("x")
+    n = sympy.Symbol("n", integer=True, positive=True)
+    factorial_n: Any = sympy.factorial(n)
+    factorial_n_minus_one: Any = sympy.factorial(n - 1)
+
+    # Undefined functions and functions without a NumPy equivalent fall back
+    # to symbolic comparison
+    assert psu.numeric_probe(f(x) + 1, 1 + f(x)) is None  # type: ignore
+    assert psu.numeric_probe(factorial_n, n * factorial_n_minus_one) is None
+    assert psu.is_equivalent(factorial_n, n * factorial_n_minus_one)
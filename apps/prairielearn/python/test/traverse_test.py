@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING
 import lxml.html
 from prairielearn.internal.traverse import (
     ElementReplacement,
+    iter_traverse_and_replace,
+    parse_fragments,
     traverse_and_execute,
     traverse_and_replace,
 )
@@ -394,3 +396,62 @@ def test_traverse_and_replace_script_complex() -> None:
 
     html = traverse_and_replace(test_str, replace)
     assert html == test_str
+
+
+def test_parse_fragments_returns_independent_copies() -> None:
+    html = "Leading text<p>Hello <b>world</b></p> trailing"
+
+    first = parse_fragments(html)
+    assert first[0] == "Leading text"
+    paragraph = first[1]
+    assert isinstance(paragraph, lxml.html.HtmlElement)
+    paragraph.tail = None
+    paragraph.set("class", "modified")
+
+    second = parse_fragments(html)
+    second_paragraph = second[1]
+    assert isinstance(second_paragraph, lxml.html.HtmlElement)
+    assert second_paragraph is not paragraph
+    assert second_paragraph.tail == " trailing"
+    assert second_paragraph.get("class") is None
+
+
+def test_traverse_and_replace_repeated() -> None:
+    html = "<p>Hello <strong>world</strong></p>"
+
+    def replace(e: lxml.html.HtmlElement) -> ElementReplacement:
+        if e.tag == "strong":
+            e.text = "there"
+        return e
+
+    # Mutations made while processing the first call must not leak into the
+    # cached parse that the second call starts from.
+    assert traverse_and_replace(html, replace) == "<p>Hello <strong>there</strong></p>"
+    assert traverse_and_replace(html, lambda e: e) == html
+
+
+def test_iter_traverse_and_replace() -> None:
+    html = (
+        "<div>"
+        + "".join(f"<pl-x n='{i}'>{i}</pl-x> text" for i in range(20))
+        + "</div>"
+    )
+    replaced: list[str] = []
+
+    def replace(e: lxml.html.HtmlElement) -> ElementReplacement:
+        if e.tag == "pl-x":
+            replaced.append(e.attrib["n"])
+            return f"<b>{'x' * 10}</b>"
+        return e
+
+    # Record how many elements had been replaced when each chunk was produced.
+    chunks = [
+        (chunk, len(replaced))
+        for chunk in iter_traverse_and_replace(html, replace, chunk_size=50)
+    ]
+
+    assert "".join(chunk for chunk, _ in chunks) == traverse_and_replace(html, replace)
+    assert all(len(chunk) >= 50 for chunk, _ in chunks[:-1])
+    # The first chunk is produced before all elements have been replaced.
+    assert chunks[0][1] < 20
+    assert list(iter_traverse_and_replace("<p>Hello</p>", lambda _: None)) == []
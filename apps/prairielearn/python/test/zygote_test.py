@@ -0,0 +1,346 @@
+import copy
+import json
+import os
+import pathlib
+import select
+import struct
+import subprocess
+import sys
+from collections.abc import Callable, Iterator
+from typing import IO, Any, cast
+
+import msgpack
+import pytest
+
+ZYGOTE_PATH = pathlib.Path(__file__).parent.parent / "zygote.py"
+# Seconds to wait for a response from the zygote
+RESPONSE_TIMEOUT = 30
+
+ELEMENT_CONTROLLER = """
+import os
+
+
+def parse(element_html, data):
+    data["params"].setdefault("element_cwds", []).append(os.getcwd())
+
+
+def grade(element_html, data):
+    data["partial_scores"]["x"] = {"score": 1, "weight": 1}
+
+
+def render(element_html, data):
+    return "<p>Element</p>"
+"""
+
+SERVER = """
+import importlib
+import os
+
+
+def record(data, phase):
+    # Relative paths and first-time imports of question and course modules
+    # must work in every phase.
+    with open("answer.txt") as f:
+        answer = f.read()
+    question_module = importlib.import_module(f"question_{phase}")
+    course_module = importlib.import_module(f"course_{phase}")
+    data["params"].setdefault("seen", []).append(
+        [phase, os.getcwd(), answer, question_module.VALUE, course_module.VALUE]
+    )
+
+
+def parse(data):
+    record(data, "parse")
+
+
+def grade(data):
+    record(data, "grade")
+    data["score"] = 0.5
+"""
+
+
+# Start the zygote with the given FDs as its FDs 3 and 4. Both are greater than
+# 3, since FDs 0-2 and the read end of the first pipe come first.
+LAUNCHER = """
+import os, sys
+os.dup2(int(sys.argv[1]), 3)
+os.dup2(int(sys.argv[2]), 4)
+os.execv(sys.executable, [sys.executable, sys.argv[3]])
+"""
+
+
+class Zygote:
+    """A zygote process, which tests talk to as the code caller would."""
+
+    def __init__(self, stdin: IO[bytes], output_fd: int) -> None:
+        self.stdin = stdin
+        self.output_fd = output_fd
+        self.buffer = b""
+        # The framing that the current worker uses, as in the code caller
+        self.framing = "json"
+
+    def send(self, inp: dict[str, Any]) -> None:
+        if self.framing == "msgpack":
+            payload = cast(bytes, msgpack.packb(inp, use_bin_type=True))
+            self.stdin.write(struct.pack(">I", len(payload)) + payload)
+        else:
+            self.stdin.write(json.dumps(inp).encode() + b"\n")
+        self.stdin.flush()
+
+    def read_until(self, has_enough: Callable[[bytes], bool]) -> None:
+        while not has_enough(self.buffer):
+            # If the worker fails, the zygote starts a new one instead of
+            # closing its outputs, so the response would never come.
+            ready, _, _ = select.select([self.output_fd], [], [], RESPONSE_TIMEOUT)
+            assert ready, "The worker didn't respond"
+            data = os.read(self.output_fd, 65536)
+            assert data, "The zygote exited without responding"
+            self.buffer += data
+
+    def receive(self) -> Any:
+        if self.framing == "msgpack":
+            self.read_until(lambda buffer: len(buffer) >= 4)
+            (length,) = struct.unpack(">I", self.buffer[:4])
+            self.read_until(lambda buffer: len(buffer) >= 4 + length)
+            payload, self.buffer = (
+                self.buffer[4 : 4 + length],
+                self.buffer[4 + length :],
+            )
+            return msgpack.unpackb(payload, raw=False)
+
+        self.read_until(lambda buffer: b"\n" in buffer)
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def call(self, inp: dict[str, Any]) -> Any:
+        self.send(inp)
+        return self.receive()
+
+    def restart(self) -> None:
+        """Start a new worker, which hasn't imported any question modules."""
+        assert self.call({"file": None, "fcn": "restart", "args": []})["val"] == (
+            "success"
+        )
+        self.framing = "json"
+
+
+@pytest.fixture(scope="module")
+def zygote() -> Iterator[Zygote]:
+    # The zygote writes its outputs to FD 3 and exit confirmations to FD 4.
+    output_read, output_write = os.pipe()
+    exit_read, exit_write = os.pipe()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            LAUNCHER,
+            str(output_write),
+            str(exit_write),
+            str(ZYGOTE_PATH),
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        pass_fds=(output_write, exit_write),
+        # Use the default preload manifest, which preloads the core elements.
+        env={
+            key: value
+            for key, value in os.environ.items()
+            if key != "ZYGOTE_PRELOAD_MANIFEST"
+        },
+        cwd=ZYGOTE_PATH.parent.parent.parent.parent,
+    )
+    os.close(output_write)
+    os.close(exit_write)
+    assert process.stdin is not None
+
+    try:
+        yield Zygote(process.stdin, output_read)
+    finally:
+        process.kill()
+        process.wait()
+        os.close(output_read)
+        os.close(exit_read)
+
+
+@pytest.fixture
+def question(tmp_path: pathlib.Path) -> dict[str, Any]:
+    course_path = tmp_path / "course"
+    element_path = course_path / "elements" / "test-element"
+    element_path.mkdir(parents=True)
+    (element_path / "test-element.py").write_text(ELEMENT_CONTROLLER)
+
+    question_path = course_path / "questions" / "q"
+    question_path.mkdir(parents=True)
+    (question_path / "server.py").write_text(SERVER)
+    (question_path / "answer.txt").write_text("42")
+    server_files_path = course_path / "serverFilesCourse"
+    server_files_path.mkdir()
+    # Each phase imports its own modules, so that every import in it is a
+    # first-time import.
+    for phase in ("parse", "grade"):
+        (question_path / f"question_{phase}.py").write_text(
+            f"VALUE = {str(question_path)!r}"
+        )
+        (server_files_path / f"course_{phase}.py").write_text(
+            f"VALUE = {str(server_files_path)!r}"
+        )
+
+    return {
+        "cwd": str(question_path),
+        "paths": [str(server_files_path)],
+        "context": {
+            "html": '<test-element answers-name="x"></test-element>',
+            "elements": {
+                "test-element": {
+                    "name": "test-element",
+                    "controller": "test-element.py",
+                    "type": "course",
+                }
+            },
+            "element_extensions": {},
+            "course_path": str(course_path),
+        },
+        "data": {
+            "params": {},
+            "correct_answers": {},
+            "submitted_answers": {"x": "1"},
+            "raw_submitted_answers": {"x": "1"},
+            "format_errors": {},
+            "partial_scores": {},
+            "score": 0,
+            "feedback": {},
+            "gradable": True,
+            "variant_seed": 1,
+            "options": {},
+        },
+    }
+
+
+def test_batch_matches_separate_calls(zygote: Zygote, question: dict[str, Any]) -> None:
+    calls = [
+        {"file": "question.html", "fcn": "parse"},
+        {"file": "server", "fcn": "parse"},
+        {"file": "question.html", "fcn": "grade"},
+        {"file": "server", "fcn": "grade"},
+    ]
+    location = {"cwd": question["cwd"], "paths": question["paths"]}
+
+    zygote.restart()
+    data = copy.deepcopy(question["data"])
+    separate_results: list[dict[str, Any]] = []
+    for call in calls:
+        is_question_html = call["file"] == "question.html"
+        output = zygote.call({
+            **call,
+            **location,
+            "args": [question["context"], data] if is_question_html else [data],
+        })
+        if is_question_html:
+            data = output["val"].pop("data")
+        else:
+            data = output["val"]
+            output["val"] = None
+        separate_results.append(output)
+
+    zygote.restart()
+    batch = zygote.call({
+        "file": None,
+        "fcn": "batch",
+        "args": [copy.deepcopy(question["data"])],
+        "calls": calls,
+        "context": question["context"],
+        **location,
+    })
+
+    assert batch["val"]["results"] == separate_results
+    assert batch["val"]["data"] == data
+    # Both server.py functions ran in the question's directory, and could
+    # import its modules and the course's modules.
+    assert data["params"]["seen"] == [
+        [phase, question["cwd"], "42", question["cwd"], question["paths"][0]]
+        for phase in ("parse", "grade")
+    ]
+    assert data["score"] == 0.5
+
+
+def test_question_modules_not_shadowed_by_elements(
+    zygote: Zygote, tmp_path: pathlib.Path
+) -> None:
+    # pl-drawing has modules with the same names, which the zygote imports
+    # when it preloads the core elements.
+    for name in ("defaults", "elements"):
+        (tmp_path / f"{name}.py").write_text("")
+    (tmp_path / "server.py").write_text(
+        "import defaults\n"
+        "import elements\n"
+        "\n"
+        "\n"
+        "def generate(data):\n"
+        '    data["params"]["files"] = [defaults.__file__, elements.__file__]\n'
+    )
+
+    zygote.restart()
+    output = zygote.call({
+        "file": "server",
+        "fcn": "generate",
+        "args": [{"params": {}, "correct_answers": {}, "variant_seed": 1}],
+        "cwd": str(tmp_path),
+        "paths": [],
+    })
+
+    assert output["val"]["params"]["files"] == [
+        str(tmp_path / "defaults.py"),
+        str(tmp_path / "elements.py"),
+    ]
+
+
+def test_render_streams_frames_with_msgpack_framing(
+    zygote: Zygote, question: dict[str, Any]
+) -> None:
+    # Large enough to be rendered in several chunks
+    context = {
+        **question["context"],
+        "html": '<test-element answers-name="x"></test-element>\n' * 10000,
+    }
+    data = {
+        **question["data"],
+        "options": {
+            "course_element_files_url": "/elements",
+            "course_element_extension_files_url": "/extensions",
+        },
+        "panel": "question",
+    }
+    render = {
+        "file": "question.html",
+        "fcn": "render",
+        "args": [context, data],
+        "cwd": question["cwd"],
+        "paths": question["paths"],
+        "stream": True,
+    }
+
+    # With JSON framing, "stream" is ignored.
+    zygote.restart()
+    output = zygote.call(render)
+    html = output["val"]["html"]
+    assert "partial" not in output
+    assert "chunks" not in output["val"]
+    assert html.count("<p>Element</p>") == 10000
+
+    output = zygote.call({"file": None, "fcn": "framing", "args": ["msgpack"]})
+    assert output["val"] == "msgpack"
+    zygote.framing = "msgpack"
+
+    zygote.send(render)
+    chunks: list[str] = []
+    while (output := zygote.receive()).get("partial"):
+        assert output["present"]
+        assert output["index"] == len(chunks)
+        chunks.append(output["val"])
+    assert len(chunks) > 1
+    assert output["present"]
+    assert output["val"]["html"] is None
+    assert output["val"]["chunks"] == len(chunks)
+    assert "".join(chunks) == html
+
+    zygote.restart()
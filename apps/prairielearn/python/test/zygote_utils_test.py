@@ -1,8 +1,12 @@
+import io
 import json
+import random
 from typing import Any
 
+import numpy as np
 import prairielearn.internal.zygote_utils as zu
 import pytest
+from faker import Faker
 
 
 @pytest.mark.parametrize(
@@ -56,3 +60,48 @@ def test_all_integers_within_limits_no_exception(item: Any) -> None:
 def test_all_integers_within_limits_raise_exception(item: Any) -> None:
     with pytest.raises(ValueError, match="oversized integer"):
         zu.assert_all_integers_within_limits(item)
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        {"present": True, "val": "pong"},
+        {"params": {"x": 9007199254740991, "y": [1.5, -2, "\xcf\xd3"]}},
+        {"file": b"\x00\xcb\x7f\xf8 raw bytes"},
+        [{1: "integer key"}, None, True],
+    ],
+)
+def test_frame_round_trip(item: Any) -> None:
+    frame = zu.pack_frame(item)
+    assert int.from_bytes(frame[:4], "big") == len(frame) - 4
+    assert zu.read_frame(io.BytesIO(frame)) == item
+
+
+@pytest.mark.parametrize(
+    ("item", "match"),
+    [
+        ({"x": 9007199254740992}, "oversized integer"),
+        ({"x": [-(2**60)]}, "oversized integer"),
+        ({"x": float("nan")}, "non-finite float"),
+        ({"x": (float("-inf"),)}, "non-finite float"),
+    ],
+)
+def test_pack_frame_raise_exception(item: Any, match: str) -> None:
+    with pytest.raises(ValueError, match=match):
+        zu.pack_frame(item)
+
+
+def test_read_frame_eof() -> None:
+    assert zu.read_frame(io.BytesIO(b"")) is None
+
+    frame = zu.pack_frame({"val": "truncated"})
+    with pytest.raises(EOFError):
+        zu.read_frame(io.BytesIO(frame[:-1]))
+
+
+def test_seed_prngs() -> None:
+    zu.seed_prngs(42)
+    first = (random.random(), np.random.rand(), Faker().name())
+    zu.seed_prngs(43)
+    zu.seed_prngs(42)
+    assert (random.random(), np.random.rand(), Faker().name()) == first
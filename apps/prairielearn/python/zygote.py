@@ -11,13 +11,35 @@
 # SIGTERM (or SIGKILL if it's stuck).
 #
 # Input is formatted as JSON on STDIN
+# A "batch" input runs several calls against one shared `data` object and
+# returns all of their results in a single response (see `call_batch()`)
+# A "grade_submissions" input grades many submissions to one variant and returns
+# all of their results in the final output (see `call_grade_submissions()`), and
+# a "grade_jobs" input does the same for submissions to many variants using a
+# pool of processes (see `call_grade_jobs()`). Once msgpack framing has been
+# negotiated, an input that also has "stream_results": true instead has each
+# result written as its own frame, with "partial": true, before the final frame.
+# With JSON framing, "stream_results" is ignored, since JSON callers (like
+# `code-caller-native.ts`) read a single line per call
+# A "question.html" "render" input with "processes" > 1 renders independent parts
+# of the question in forked processes (see `call_question_html()`). The question
+# server never sends "processes", so this is only enabled by callers that add
+# it to the input themselves
+# A "framing" input switches both directions to length-prefixed msgpack frames
+# until the worker exits (see `zygote_utils.pack_frame()`)
+# Once msgpack framing has been negotiated, a "question.html" "render" input with
+# "stream": true is answered with one frame per chunk of the rendered HTML, each
+# with "partial": true, followed by a terminal frame without "partial" that has
+# the number of chunks (see `call_question_html()`). With JSON framing, "stream"
+# is ignored, since JSON callers read a single line per call
 # Output is formatted as JSON on file descriptor 3
 # Anything written to STDOUT or STDERR will be captured and logged, but it has no meaning
 # Errors are signaled by exiting with non-zero exit code
 # Exceptions are not caught and so will trigger a process exit with non-zero exit code (signaling an error)
 
-import base64
+import contextlib
 import copy
+import gc
 import io
 import json
 import os
@@ -26,13 +48,14 @@ import subprocess
 import sys
 import time
 import types
-from collections.abc import Iterable, Sequence
+from collections.abc import Callable, Iterable, Sequence
 from importlib.abc import MetaPathFinder
 from inspect import signature
-from typing import Any
+from typing import Any, NamedTuple
 
 import prairielearn.internal.zygote_utils as zu
-from prairielearn.internal import question_phases
+from prairielearn.internal import controller_cache, question_phases
+from prairielearn.internal.check_data import Phase
 
 saved_path = copy.copy(sys.path)
 
@@ -80,24 +103,36 @@ import logging
 
 logging.getLogger("matplotlib.font_manager").disabled = True
 
+# Ensure that matplotlib uses a non-interactive backend, even if it isn't
+# imported until a worker needs it.
+os.environ["MPLBACKEND"] = "PDF"
+
 # Pre-load commonly used modules
 import html
 import math
 import random
 
-import chevron
 import lxml.html
-import matplotlib as mpl
-import nltk
 import numpy as np
-import pint
 import prairielearn
-import sklearn
-
-mpl.use("PDF")
-
-# Construct initial unit registry to create initial cache file.
-prairielearn.get_unit_registry()
+from prairielearn.internal import preload
+
+# Which other modules get preloaded (and whether core element controllers are
+# compiled and executed up front) is controlled by a manifest; see
+# `preload.PreloadManifest`. Forked workers inherit everything loaded here, so
+# they don't have to re-import it for every request, at the cost of zygote
+# startup time and memory.
+preload_manifest = preload.load_manifest(os.environ.get("ZYGOTE_PRELOAD_MANIFEST"))
+preloaded_modules = preload.select_modules(preload_manifest)
+preload_profiles = preload.preload_modules(
+    preloaded_modules, elements=preload_manifest["elements"]
+)
+
+# In profiling mode, write a report of how long each preloaded module took to
+# import and how much memory it used.
+preload_profile_path = os.environ.get("ZYGOTE_PRELOAD_PROFILE")
+if preload_profile_path:
+    preload.write_profile_report(preload_profile_path, preload_profiles)
 
 
 # We want to conditionally allow/block importing specific modules.
@@ -130,25 +165,6 @@ class ForbidModuleMetaPathFinder(MetaPathFinder):
         return None  # noqa: PLR1711, RET501
 
 
-# We want to initialize the Faker seed, but only if faker is loaded
-class FakerInitializeMetaPathFinder(MetaPathFinder):
-    def __init__(self, seed: int) -> None:
-        self.seed = seed
-
-    def find_spec(
-        self,
-        fullname: str,
-        _path: Sequence[str] | None,
-        _target: types.ModuleType | None = None,
-    ) -> None:
-        if fullname == "faker" or fullname.startswith("faker."):
-            # Once this initialization is done we no longer need this meta path finder
-            sys.meta_path.remove(self)
-            from faker import Faker
-
-            Faker.seed(self.seed)
-
-
 # This function tries to convert a python object to valid JSON. If an exception
 # is raised, this function prints the object and re-raises the exception. This is
 # helpful because the object - which contains something that cannot be converted
@@ -163,7 +179,342 @@ def try_dumps(obj: Any, *, sort_keys: bool = False, allow_nan: bool = False) ->
         raise
 
 
-def worker_loop() -> None:
+def call_question_html(
+    fcn: Phase,
+    context: question_phases.RenderContext,
+    data: dict[str, Any],
+    *,
+    raw_file: bool = False,
+    write_output: Callable[[Any], None] | None = None,
+    processes: int | None = None,
+) -> dict[str, Any]:
+    """
+    Run a phase for all elements in `question.html`.
+
+    If `processes` is greater than 1, the `render` phase renders independent
+    top-level parts of the question in up to that many forked processes (see
+    `question_phases.render_fragments_in_parallel`).
+
+    If `write_output` is given, the HTML rendered by the `render` phase is
+    streamed instead of being returned: each chunk of it is written with
+    `write_output` as soon as it is ready, as an output with `"present": True`,
+    `"partial": True`, the index of the chunk, and the chunk as `val`. The
+    caller gets the HTML by joining them in order. The returned `html` is then
+    `None`, and `chunks` is the number of chunks that were written. If an
+    element raises an exception, the worker exits without a final output, and
+    the caller must discard the chunks that it has received.
+
+    Returns:
+        The response to send back to the caller.
+    """
+    chunks = 0
+
+    def write_chunk(chunk: str) -> None:
+        nonlocal chunks
+        assert write_output is not None
+        write_output({"present": True, "partial": True, "index": chunks, "val": chunk})
+        chunks += 1
+
+    stream = write_output is not None and fcn == "render"
+    result, processed_elements = question_phases.process(
+        fcn,
+        data,
+        context,
+        raw_file=raw_file,
+        write_chunk=write_chunk if stream else None,
+        processes=processes,
+    )
+    output: dict[str, Any] = {
+        "html": result if fcn == "render" else None,
+        "file": result if fcn == "file" else None,
+        "data": data,
+        "processed_elements": list(processed_elements),
+    }
+    if stream:
+        output["chunks"] = chunks
+    return output
+
+
+def call_python_function(
+    file: str,
+    fcn: str,
+    args: list[Any],
+    cwd: str,
+    mod_cache: dict[str, dict[str, Any]],
+    *,
+    raw_file: bool = False,
+) -> dict[str, Any]:
+    """
+    Call a top-level function in a Python file, relative to `cwd`.
+
+    If `raw_file` is true, the return value of a `file` function is passed
+    through as raw bytes instead of being base64-encoded.
+
+    Returns:
+        The response to send back to the caller. `present` indicates whether the
+        function exists in the file; if it does, `val` contains its return value
+        (or the passed-in `data` object for functions that modify `data`).
+    """
+    file_path = os.path.join(cwd, file + ".py")
+
+    mod = controller_cache.load_controller(file_path, mod_cache)
+
+    # check whether we have the desired fcn in the module
+    if fcn not in mod:
+        # the function wasn't present, so report this
+        return {"present": False}
+
+    # get the desired function in the loaded module
+    method = mod[fcn]
+
+    # check if the desired function is a legacy element function - if
+    # so, we add an argument for element_index
+    arg_names = list(signature(method).parameters.keys())
+    if arg_names == ["element_html", "element_index", "data"]:
+        args.insert(1, None)
+
+    # call the desired function in the loaded module
+    val = method(*args)
+
+    if fcn == "file":
+        if raw_file:
+            val = question_phases.filelike_to_bytes(val)
+        else:
+            val = question_phases.filelike_to_string(val)
+
+    # Any function that is not 'file' or 'render' will modify 'data' and
+    # should not be returning anything (because 'data' is mutable).
+    if fcn not in ("file", "render"):
+        if val is None or val is args[-1]:
+            return {"present": True, "val": args[-1]}
+
+        # We'll only actually complain if the function returned
+        # a completely different object than the one passed in.
+        # Otherwise, we'll just silently ignore the return value
+        # and use the passed-in object (which should in fact be
+        # the same object).
+        #
+        # TODO: Once this has been running in production for a while,
+        # change this to raise an exception.
+        sys.stderr.write(
+            f"Function {fcn}() in {file + '.py'} returned a data object other than the one that was passed in.\n\n"
+            + "There is no need to return a value, as the data object is mutable and can be modified in place.\n\n"
+            + "For now, the return value will be used instead of the data object that was passed in.\n\n"
+            + "In the future, returning a different object will trigger a fatal error."
+        )
+
+    return {"present": True, "val": val}
+
+
+def set_up_path(cwd: str, paths: list[str]) -> None:
+    """
+    Reset `sys.path` and the working directory to what a call to a question in
+    `cwd` expects, undoing any changes that elements made to them.
+    """
+    sys.path = copy.copy(saved_path)
+    for path in reversed(paths):
+        sys.path.insert(0, path)
+    sys.path.insert(0, cwd)
+    os.chdir(cwd)
+
+
+def call_batch(
+    calls: list[dict[str, Any]],
+    context: question_phases.RenderContext | None,
+    data: dict[str, Any],
+    cwd: str,
+    paths: list[str],
+    mod_cache: dict[str, dict[str, Any]],
+    *,
+    raw_file: bool = False,
+) -> dict[str, Any]:
+    """
+    Run an ordered list of calls against a single shared `data` object.
+
+    Each call is a dict with `file` and `fcn` keys. Calls to `question.html`
+    receive `context` and `data`; all other calls receive only `data`. Since
+    every call mutates the same `data` object, it is only returned once rather
+    than once per call.
+
+    Returns:
+        A dict with the final `data` and a list of per-call `results`. Each
+        result has the same shape as the response to a single call, except that
+        `data` is omitted from it.
+
+    Raises:
+        ValueError: If a call to `question.html` is made without a context.
+    """
+    results: list[dict[str, Any]] = []
+    for call in calls:
+        file = call["file"]
+        fcn = call["fcn"]
+
+        # Each call sees the same working directory and path as it would if
+        # it were made on its own, not those left behind by elements.
+        set_up_path(cwd, paths)
+
+        if file == "question.html":
+            if context is None:
+                raise ValueError("Batch calls to question.html require a context")
+            val = call_question_html(fcn, context, data, raw_file=raw_file)
+            del val["data"]
+            results.append({"present": True, "val": val})
+            continue
+
+        output = call_python_function(
+            file, fcn, [data], cwd, mod_cache, raw_file=raw_file
+        )
+        if output["present"] and fcn not in ("file", "render"):
+            # Subsequent calls should see whatever object this function
+            # produced, which is consistent with how the caller would treat
+            # the return value of an individual call.
+            data = output["val"]
+            output["val"] = None
+        results.append(output)
+
+    return {"data": data, "results": results}
+
+
+def make_server_function(
+    fcn: str, cwd: str, paths: list[str], mod_cache: dict[str, dict[str, Any]]
+) -> Callable[[dict[str, Any]], dict[str, Any]] | None:
+    """
+    Returns:
+        A function that calls the given function (e.g. `grade()`) in the
+        question's `server.py` with the given data and returns the new data,
+        or `None` if the question doesn't have a `server.py`.
+    """
+    if not os.path.exists(os.path.join(cwd, "server.py")):
+        return None
+
+    def server_function(submission_data: dict[str, Any]) -> dict[str, Any]:
+        # Elements change the working directory and path; restore them to
+        # what `server.py` would normally see.
+        set_up_path(cwd, paths)
+
+        output = call_python_function("server", fcn, [submission_data], cwd, mod_cache)
+        return output["val"] if output["present"] else submission_data
+
+    return server_function
+
+
+def write_grading_results(
+    results: Iterable[tuple[int, question_phases.GradingResult]],
+    write_output: Callable[[Any], None] | None,
+) -> dict[str, Any]:
+    """
+    Collect the grading results of several submissions into a single output.
+
+    If `write_output` is given, each result is instead written with it as soon
+    as it is ready, as an output with `"present": True`, `"partial": True`, the
+    index of the submission as `"index"`, and the result as `"val"`, and the
+    final output only has the number of submissions that were graded.
+
+    Returns:
+        The final output, with the number of submissions that were graded and,
+        unless they were streamed, their results indexed by submission.
+    """
+    collected: list[question_phases.GradingResult | None] = []
+    count = 0
+    for index, result in results:
+        count += 1
+        if write_output is None:
+            collected.extend([None] * (index + 1 - len(collected)))
+            collected[index] = result
+            continue
+        sys.stderr.flush()
+        sys.stdout.flush()
+        write_output({"present": True, "partial": True, "index": index, "val": result})
+    if write_output is not None:
+        return {"present": True, "val": {"count": count}}
+    return {"present": True, "val": {"count": count, "results": collected}}
+
+
+def call_grade_submissions(
+    context: question_phases.RenderContext,
+    submissions: list[question_phases.Submission],
+    data: dict[str, Any],
+    cwd: str,
+    paths: list[str],
+    mod_cache: dict[str, dict[str, Any]],
+    write_output: Callable[[Any], None] | None,
+    *,
+    parse: bool,
+    partial_credit: bool,
+) -> dict[str, Any]:
+    """
+    Grade each of the given submissions to a single variant, as `question.html`
+    and then `server.py` would for a single `grade` call (preceded by a `parse`
+    call if `parse` is true). Results are written with `write_grading_results`,
+    indexed by their position in `submissions`.
+
+    Returns:
+        The final output, with the number of submissions that were graded.
+    """
+    results = question_phases.grade_submissions(
+        data,
+        submissions,
+        context,
+        parse=parse,
+        partial_credit=partial_credit,
+        server_parse=make_server_function("parse", cwd, paths, mod_cache),
+        server_grade=make_server_function("grade", cwd, paths, mod_cache),
+    )
+    return write_grading_results(enumerate(results), write_output)
+
+
+def call_grade_jobs(
+    variants: list[dict[str, Any]],
+    jobs: list[dict[str, Any]],
+    cwd: str,
+    paths: list[str],
+    mod_cache: dict[str, dict[str, Any]],
+    write_output: Callable[[Any], None] | None,
+    *,
+    parse: bool,
+    partial_credit: bool,
+    processes: int | None,
+) -> dict[str, Any]:
+    """
+    Grade submissions to any number of variants of the question in parallel.
+
+    Each variant is a dict with the `context` and `data` for that variant, and
+    each job is a dict with the index of its variant in `variants` as
+    `variant` and the submission (see `question_phases.Submission`) as
+    `submission`. Results are written with
+    `write_grading_results` in the order in which they finish, indexed by
+    their position in `jobs`.
+
+    Returns:
+        The final output, with the number of submissions that were graded.
+    """
+    grading_jobs: list[question_phases.GradingJob] = [
+        {
+            "context": variants[job["variant"]]["context"],
+            "data": variants[job["variant"]]["data"],
+            "submission": job["submission"],
+        }
+        for job in jobs
+    ]
+    # Grade jobs for the same variant together; see `grade_jobs_in_parallel`.
+    order = sorted(range(len(jobs)), key=lambda index: jobs[index]["variant"])
+    results = question_phases.grade_jobs_in_parallel(
+        [grading_jobs[index] for index in order],
+        processes=processes,
+        parse=parse,
+        partial_credit=partial_credit,
+        server_parse=make_server_function("parse", cwd, paths, mod_cache),
+        server_grade=make_server_function("grade", cwd, paths, mod_cache),
+    )
+    return write_grading_results(
+        ((order[index], result) for index, result in results), write_output
+    )
+
+
+def worker_loop(usage_fd: int | None = None) -> None:
+    # The worker reports which modules it imported on `usage_fd`, if given,
+    # when it exits.
+
     # Whether the PRNGs have already been seeded in this worker_loop() call
     seeded = False
 
@@ -177,29 +528,51 @@ def worker_loop() -> None:
     #   specifically for elements that want to maintain a cache of expensive-to-compute data.
     mod_cache: dict[str, dict[str, Any]] = {}
 
+    # Either "json" (a single line of JSON per message) or "msgpack"
+    # (length-prefixed msgpack frames). Every worker starts out using JSON;
+    # the caller can negotiate a switch with a "framing" message.
+    framing = "json"
+
     # file descriptor 3 is for output data
     with open(3, "w", encoding="utf-8") as outf:
+
+        def write_output(output: Any) -> None:
+            if framing == "msgpack":
+                outf.buffer.write(zu.pack_frame(output))
+                outf.buffer.flush()
+            else:
+                outf.write(try_dumps(output, allow_nan=False))
+                outf.write("\n")
+                outf.flush()
+
         # Infinite loop where we wait for an input command, do it, and
         # return the results. The caller should terminate us with a
         # SIGTERM.
         while True:
-            # Wait for a single line of input
-            json_inp = sys.stdin.readline()
+            if framing == "msgpack":
+                inp = zu.read_frame(sys.stdin.buffer)
 
-            # Sometimes we seem to get an empty line, so we'll just ignore it.
-            if json_inp == "\n":
-                continue
+                # If the input is empty, the server has died; see below.
+                if inp is None:
+                    sys.exit(1)
+            else:
+                # Wait for a single line of input
+                json_inp = sys.stdin.readline()
+
+                # Sometimes we seem to get an empty line, so we'll just ignore it.
+                if json_inp == "\n":
+                    continue
 
-            # If the input is empty, the server has died and we should exit to avoid
-            # becoming a zombie. Exit non-zero to ensure the parent process also exits
-            if json_inp == "":
-                sys.exit(1)
+                # If the input is empty, the server has died and we should exit to avoid
+                # becoming a zombie. Exit non-zero to ensure the parent process also exits
+                if json_inp == "":
+                    sys.exit(1)
 
-            # Unpack the input line as JSON. If that fails, log the line for debugging.
-            try:
-                inp = json.loads(json_inp, parse_int=zu.safe_parse_int)
-            except json.JSONDecodeError as exc:
-                raise ValueError(f"Error decoding JSON input: {json_inp}") from exc
+                # Unpack the input line as JSON. If that fails, log the line for debugging.
+                try:
+                    inp = json.loads(json_inp, parse_int=zu.safe_parse_int)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Error decoding JSON input: {json_inp}") from exc
 
             # Get the contents of the JSON input
             file = inp.get("file", None)
@@ -218,18 +591,38 @@ def worker_loop() -> None:
             # will use to check if the worker is active and able to respond to
             # calls. We just reply with "pong" to indicate that we're alive.
             if file is None and fcn == "ping":
-                json.dump({"present": True, "val": "pong"}, outf)
-                outf.write("\n")
-                outf.flush()
+                write_output({"present": True, "val": "pong"})
+                continue
+
+            # "framing" is a special fake function name that the parent process
+            # uses to negotiate the framing of all subsequent messages in both
+            # directions. The reply is still sent using the current framing.
+            if file is None and fcn == "framing":
+                requested_framing = args[0] if args else None
+                if requested_framing not in ("json", "msgpack"):
+                    raise ValueError(f"Unknown framing: {requested_framing}")
+                write_output({"present": True, "val": requested_framing})
+                framing = requested_framing
                 continue
 
             # "restart" is a special fake function name that causes
             # the forked worker to exit, returning control to the
             # zygote parent process
             if file is None and fcn == "restart":
-                json.dump({"present": True, "val": "success"}, outf)
-                outf.write("\n")
-                outf.flush()
+                write_output({"present": True, "val": "success"})
+
+                # Report which of the candidate modules were imported by this
+                # worker to the zygote, which records them to drive the
+                # "histogram" policy. The pipe doesn't block, and anything
+                # that goes wrong here only affects the histogram.
+                if usage_fd is not None:
+                    with contextlib.suppress(OSError):
+                        os.write(
+                            usage_fd,
+                            json.dumps(
+                                preload.imported_modules(preload_manifest["modules"])
+                            ).encode(),
+                        )
 
                 # `sys.exit()` allows the process to gracefully shut down. however, that
                 # makes things much slower than necessary, because we can't reuse this
@@ -241,7 +634,7 @@ def worker_loop() -> None:
                 # fast as possible.
                 os._exit(0)
 
-            if file.endswith(".js"):
+            if file is not None and file.endswith(".js"):
                 # We've shoehorned legacy v2 questions into the v3 code caller
                 # so that we can reuse the same worker processes, and specifically
                 # so that we can reuse the container pool.
@@ -274,9 +667,12 @@ def worker_loop() -> None:
                 # If the subprocess exited with a non-zero exit code, raise an exception.
                 result.check_returncode()
 
-                outf.write(result.stdout)
-                outf.write("\n")
-                outf.flush()
+                if framing == "msgpack":
+                    write_output(json.loads(result.stdout))
+                else:
+                    outf.write(result.stdout)
+                    outf.write("\n")
+                    outf.flush()
                 continue
 
             # Here, we re-seed the PRNGs if not already seeded in this worker_loop() call.
@@ -285,215 +681,301 @@ def worker_loop() -> None:
             # randomizations for each occurrence are independent of each other but still
             # dependent on the variant seed.
             if type(args[-1]) is dict and not seeded:
-                variant_seed = args[-1].get("variant_seed", None)
-                random.seed(variant_seed)
-                np.random.seed(variant_seed)
-                sys.meta_path.insert(0, FakerInitializeMetaPathFinder(variant_seed))
+                zu.seed_prngs(args[-1].get("variant_seed", None))
                 seeded = True
 
-            # reset and then set up the path
-            sys.path = copy.copy(saved_path)
-            for path in reversed(paths):
-                sys.path.insert(0, path)
-            sys.path.insert(0, cwd)
-
-            # change to the desired working directory
-            os.chdir(cwd)
-
-            if file == "question.html":
+            # reset and then set up the path, and change to the desired
+            # working directory
+            set_up_path(cwd, paths)
+
+            # Partial outputs are only ever written as msgpack frames.
+            stream_results = inp.get("stream_results") and framing == "msgpack"
+
+            if file is None and fcn == "batch":
+                # A batch runs an ordered list of calls against a single shared
+                # `data` object and returns all of their results at once. This
+                # lets the caller perform e.g. `parse` -> `grade` -> `render`
+                # for a submission with a single round trip, and `data` only
+                # has to be encoded and decoded once in each direction.
+                output = {
+                    "present": True,
+                    "val": call_batch(
+                        inp.get("calls", []),
+                        inp.get("context", None),
+                        args[-1],
+                        cwd,
+                        paths,
+                        mod_cache,
+                        raw_file=framing == "msgpack",
+                    ),
+                }
+            elif file == "question.html" and fcn == "grade_submissions":
+                # Grading many submissions to the same variant at once (e.g.
+                # when regrading an assessment) avoids the overhead of parsing
+                # `question.html` and setting up the elements for each one.
+                # By convention, the arguments are the context, the list of
+                # submissions, and the variant's `data`. With "parse", each
+                # submission is parsed before it is graded. With
+                # "stream_results" and msgpack framing, each result is written
+                # as soon as it is ready instead of being returned in the final
+                # output.
+                output = call_grade_submissions(
+                    args[0],
+                    args[1],
+                    args[2],
+                    cwd,
+                    paths,
+                    mod_cache,
+                    write_output if stream_results else None,
+                    parse=inp.get("parse", False),
+                    partial_credit=inp.get("partial_credit", True),
+                )
+            elif file == "question.html" and fcn == "grade_jobs":
+                # Like "grade_submissions", but for submissions to any number
+                # of variants, which are graded by a pool of processes forked
+                # from this worker. The arguments are the list of variants and
+                # the list of jobs; see `call_grade_jobs()`.
+                output = call_grade_jobs(
+                    args[0],
+                    args[1],
+                    cwd,
+                    paths,
+                    mod_cache,
+                    write_output if stream_results else None,
+                    parse=inp.get("parse", False),
+                    partial_credit=inp.get("partial_credit", True),
+                    processes=inp.get("processes", None),
+                )
+            elif file == "question.html":
                 # This is an experimental implementation of question processing
                 # that does all HTML parsing and rendering in Python. This should
                 # be much faster than the current implementation that does an IPC
                 # call for each element.
-
-                context = args[0]
-                data = args[1]
-
-                result, processed_elements = question_phases.process(fcn, data, context)
-                val = {
-                    "html": result if fcn == "render" else None,
-                    "file": result if fcn == "file" else None,
-                    "data": data,
-                    "processed_elements": list(processed_elements),
+                # With "stream" and msgpack framing, the rendered HTML is
+                # written in chunks as it is produced, so that the caller can
+                # start forwarding it before rendering is done, and it's never
+                # encoded as part of one large output. With "processes",
+                # rendering is spread over that many forked processes.
+                stream = inp.get("stream") and framing == "msgpack"
+                output = {
+                    "present": True,
+                    "val": call_question_html(
+                        fcn,
+                        args[0],
+                        args[1],
+                        raw_file=framing == "msgpack",
+                        write_output=write_output if stream else None,
+                        processes=inp.get("processes"),
+                    ),
                 }
-
-                # make sure all output streams are flushed
-                sys.stderr.flush()
-                sys.stdout.flush()
-
-                # write the return value (JSON on a single line)
-                outf.write(try_dumps({"present": True, "val": val}))
-                outf.write("\n")
-                outf.flush()
-
-                continue
-
-            file_path = os.path.join(cwd, file + ".py")
-
-            mod = mod_cache.get(file_path)
-            if mod is None:
-                mod = {}
-
-                with open(file_path, encoding="utf-8") as inf:
-                    # Use `compile` to associate filename with code object, so the
-                    # filename appears in the traceback if there is an error:
-                    # https://stackoverflow.com/a/437857
-                    code = compile(inf.read(), file_path, "exec")
-
-                exec(code, mod)
-                mod_cache[file_path] = mod
-
-            # check whether we have the desired fcn in the module
-            if fcn in mod:
-                # get the desired function in the loaded module
-                method = mod[fcn]
-
-                # check if the desired function is a legacy element function - if
-                # so, we add an argument for element_index
-                arg_names = list(signature(method).parameters.keys())
-                if arg_names == ["element_html", "element_index", "data"]:
-                    args.insert(1, None)
-
-                # call the desired function in the loaded module
-                val = method(*args)
-
-                if fcn == "file":
-                    # if val is None, replace it with empty string
-                    if val is None:
-                        val = ""
-                    # if val is a file-like object, read whatever is inside
-                    if isinstance(val, io.IOBase):
-                        val.seek(0)
-                        val = val.read()
-                    # if val is a string, treat it as utf-8
-                    if isinstance(val, str):
-                        val = bytes(val, "utf-8")
-                    # if this next call does not work, it will throw an error, because
-                    # the thing returned by file() does not have the correct format
-                    val = base64.b64encode(val).decode()
-
-                # Any function that is not 'file' or 'render' will modify 'data' and
-                # should not be returning anything (because 'data' is mutable).
-                if fcn not in ("file", "render"):
-                    if val is None or val is args[-1]:
-                        json_outp = try_dumps(
-                            {"present": True, "val": args[-1]}, allow_nan=False
-                        )
-                    else:
-                        json_outp = try_dumps(
-                            {"present": True, "val": val}, allow_nan=False
-                        )
-
-                        # We'll only actually complain if the function returned
-                        # a completely different object than the one passed in.
-                        # Otherwise, we'll just silently ignore the return value
-                        # and use the passed-in object (which should in fact be
-                        # the same object).
-                        #
-                        # TODO: Once this has been running in production for a while,
-                        # change this to raise an exception.
-                        sys.stderr.write(
-                            f"Function {fcn}() in {file + '.py'} returned a data object other than the one that was passed in.\n\n"
-                            + "There is no need to return a value, as the data object is mutable and can be modified in place.\n\n"
-                            + "For now, the return value will be used instead of the data object that was passed in.\n\n"
-                            + "In the future, returning a different object will trigger a fatal error."
-                        )
-                else:
-                    json_outp = try_dumps(
-                        {"present": True, "val": val}, allow_nan=False
-                    )
             else:
-                # the function wasn't present, so report this
-                json_outp = try_dumps({"present": False}, allow_nan=False)
+                output = call_python_function(
+                    file, fcn, args, cwd, mod_cache, raw_file=framing == "msgpack"
+                )
 
             # make sure all output streams are flushed
             sys.stderr.flush()
             sys.stdout.flush()
 
-            # write the return value (JSON on a single line)
-            outf.write(json_outp)
-            outf.write("\n")
-            outf.flush()
+            # write the return value (JSON on a single line, or a msgpack frame)
+            write_output(output)
 
 
 worker_pid = 0
 
+# The number of pre-forked workers to keep parked in addition to the active
+# one. A parked worker has already been forked from this process and is only
+# waiting to be handed out, so after a `restart` the next worker is available
+# without waiting for a fork. Defaults to 0, in which case each worker is
+# forked only once the previous one has exited.
+pool_size = max(0, int(os.environ.get("ZYGOTE_POOL_SIZE", "0")))
+
+
+class ParkedWorker(NamedTuple):
+    pid: int
+    # Writing a byte to this pipe tells the worker to start serving requests.
+    start_fd: int
+    # The worker reports the modules that it imported on this pipe.
+    usage_fd: int | None
+    fork_ms: float
+
+
+parked_workers: list[ParkedWorker] = []
+
 
 def terminate_worker(_signum: int, _stack: types.FrameType | None) -> None:
     if worker_pid > 0:
         os.kill(worker_pid, signal.SIGKILL)
+    for parked in parked_workers:
+        os.kill(parked.pid, signal.SIGKILL)
     os._exit(0)
 
 
 signal.signal(signal.SIGTERM, terminate_worker)
 signal.signal(signal.SIGINT, terminate_worker)  # Ctrl-C case
 
+
+def fork_worker(exitf: io.TextIOWrapper) -> ParkedWorker:
+    """
+    Fork a new worker that waits until it is handed out before it drops
+    privileges and enters `worker_loop()`.
+
+    Returns:
+        The parked worker, as seen from the zygote.
+    """
+    start_read_fd, start_write_fd = os.pipe()
+    usage_read_fd, usage_write_fd = (
+        os.pipe() if preload_manifest["histogram"] else (None, None)
+    )
+    fork_start = time.perf_counter()
+    pid = os.fork()
+    if pid > 0:
+        os.close(start_read_fd)
+        if usage_write_fd is not None:
+            os.close(usage_write_fd)
+        return ParkedWorker(
+            pid,
+            start_write_fd,
+            usage_read_fd,
+            (time.perf_counter() - fork_start) * 1000,
+        )
+
+    # Ensure that no code running in the worker can interact with
+    # file descriptor 4, or with the pipes of other workers.
+    exitf.close()
+    os.close(start_write_fd)
+    for parked in parked_workers:
+        os.close(parked.start_fd)
+        if parked.usage_fd is not None:
+            os.close(parked.usage_fd)
+    parked_workers.clear()
+    if usage_read_fd is not None and usage_write_fd is not None:
+        os.close(usage_read_fd)
+        os.set_blocking(usage_write_fd, False)
+
+    # Block until the zygote hands this worker out. If the zygote exits
+    # first, we'll read EOF and should exit as well.
+    if os.read(start_read_fd, 1) == b"":
+        os._exit(1)
+    os.close(start_read_fd)
+
+    # If configured to do so, drop to a deprivileged user before running
+    # any user code. This should generally only be enabled when running
+    # in Docker, as the `prairielearn/executor` image will be guaranteed
+    # to have the user that we drop to.
+    if drop_privileges:
+        import pwd
+
+        user = pwd.getpwnam("executor")
+        os.setgid(user.pw_gid)
+        os.setuid(user.pw_uid)
+
+    worker_loop(usage_write_fd)
+    os._exit(0)
+
+
+def clean_up_after_worker() -> None:
+    # Once a worker exits, clean up after it if we were running as the
+    # `executor` user.
+    if not drop_privileges:
+        return
+
+    # Kill all processes started by `executor`. Parked workers are still
+    # running as root, so they aren't affected by this.
+    os.system("pkill -u executor --signal SIGKILL")
+
+    # Check that all processes are gone. If they're not, that probably means
+    # that someone is trying to escape by repeatedly forking. In that case,
+    # we'll refuse to hand out another worker. This process will exit, and if
+    # we're running inside a Docker container, the entire container should be
+    # killed too.
+    import psutil
+
+    if any(p.username() == "executor" for p in psutil.process_iter()):
+        raise RuntimeError("found remaining processes belonging to executor user")
+
+
+def record_worker_usage(fd: int) -> None:
+    """
+    Record the modules that a worker reported on `fd` in the histogram, and
+    close `fd`. The report comes from a process that ran untrusted code, so
+    anything other than a list of module names is ignored.
+    """
+    os.set_blocking(fd, False)
+    try:
+        report = os.read(fd, 65536)
+    except BlockingIOError:
+        report = b""
+    finally:
+        os.close(fd)
+
+    try:
+        used = json.loads(report)
+    except ValueError:
+        return
+    if not isinstance(used, list):
+        return
+
+    assert preload_manifest["histogram"] is not None
+    preload.record_module_usage(
+        preload_manifest["histogram"],
+        preload_manifest["modules"],
+        preloaded_modules,
+        {name for name in used if isinstance(name, str)},
+    )
+
+
+# Move everything that the zygote has loaded (e.g. preloaded modules and the
+# shared unit registry) into the garbage collector's permanent generation.
+# Otherwise, the first collection in each worker would write to all of those
+# objects, copying memory that the worker could have shared with the zygote.
+gc.freeze()
+
 with open(4, "w", encoding="utf-8") as exitf:
+    next_worker = fork_worker(exitf)
     while True:
-        worker_pid = os.fork()
-        if worker_pid == 0:
-            # Ensure that no code running in the worker can interact with
-            # file descriptor 4
-            exitf.close()
-
-            # If configured to do so, drop to a deprivileged user before running
-            # any user code. This should generally only be enabled when running
-            # in Docker, as the `prairielearn/executor` image will be guaranteed
-            # to have the user that we drop to.
-            if drop_privileges:
-                import pwd
-
-                user = pwd.getpwnam("executor")
-                os.setgid(user.pw_gid)
-                os.setuid(user.pw_uid)
-
-            worker_loop()
-
-            break
-        else:
-            pid, status = os.waitpid(worker_pid, 0)
-            worker_pid = 0
-            if os.WIFEXITED(status):
-                if os.WEXITSTATUS(status) == 0:
-                    # Everything is ok, the worker exited gracefully,
-                    # just repeat
-
-                    exited = True
-
-                    # Once this child exits, clean up after it if we
-                    # were running as the `executor` user
-                    if drop_privileges:
-                        # Kill all processes started by `executor`.
-                        os.system("pkill -u executor --signal SIGKILL")
-
-                        # Check that all processes are gone. If they're not,
-                        # that probably means that someone is trying to escape
-                        # by repeatedly forking. In that case, we'll refuse to
-                        # write an exit confirmation to FD 4. This process will
-                        # be killed, and if we're running inside a Docker container,
-                        # the entire container should be killed too.
-                        import psutil
-
-                        if any(
-                            p.username() == "executor" for p in psutil.process_iter()
-                        ):
-                            raise RuntimeError(
-                                "found remaining processes belonging to executor user"
-                            )
-
-                    # We'll need to write a confirmation message on file
-                    # descriptor 4 so that PL knows that control was actually
-                    # returned to the zygote.
-                    json.dump({"exited": True}, exitf)
-                    exitf.write("\n")
-                    exitf.flush()
-                else:
-                    # The worker did not exit gracefully
-                    raise RuntimeError(
-                        f"worker process exited unexpectedly with status {status}"
-                    )
-            else:
-                # Something else happened that is weird
-                raise RuntimeError(
-                    f"worker process exited unexpectedly with status {status}"
-                )
+        # Hand out the next worker, and then replace it (and any other
+        # missing workers) while the handed-out worker is serving requests.
+        os.write(next_worker.start_fd, b"1")
+        os.close(next_worker.start_fd)
+        worker_pid = next_worker.pid
+        worker_usage_fd = next_worker.usage_fd
+        last_fork_ms = next_worker.fork_ms
+
+        while len(parked_workers) < pool_size:
+            parked_workers.append(fork_worker(exitf))
+
+        pid, status = os.waitpid(worker_pid, 0)
+        worker_pid = 0
+        if not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+            # The worker did not exit gracefully, or something else happened
+            # that is weird
+            raise RuntimeError(
+                f"worker process exited unexpectedly with status {status}"
+            )
+
+        # Everything is ok, the worker exited gracefully. Clean up after it
+        # before confirming, since the caller sends its next request as soon
+        # as it sees the confirmation, and any processes left behind by the
+        # worker could otherwise read that request from stdin or write a
+        # response on file descriptor 3.
+        clean_up_after_worker()
+        if worker_usage_fd is not None:
+            record_worker_usage(worker_usage_fd)
+
+        # We'll need to write a confirmation message on file descriptor 4 so
+        # that PL knows that control was actually returned to the zygote. We
+        # also report how many workers are ready to be handed out and how long
+        # the most recent fork took.
+        json.dump(
+            {
+                "exited": True,
+                "pool_depth": len(parked_workers),
+                "fork_ms": round(last_fork_ms, 3),
+            },
+            exitf,
+        )
+        exitf.write("\n")
+        exitf.flush()
+
+        next_worker = parked_workers.pop(0) if parked_workers else fork_worker(exitf)
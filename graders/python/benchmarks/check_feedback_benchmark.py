@@ -0,0 +1,144 @@
+"""
+Benchmark `Feedback.check_tuple`, `check_dict` and `check_list` on outputs
+with 100,000 entries.
+
+This compares the checks with the entry by entry comparisons that they used to
+make, which are reproduced here, for integers, floats and strings. Each check
+is timed on a correct output, which has to compare every entry, and on an
+output where only the last entry is wrong. For `check_tuple` with `rtol`, it
+compares with the entry by entry comparison used for tuples of mixed types.
+
+Run from `graders/python` with:
+
+    PYTHONPATH=python_autograder python benchmarks/check_feedback_benchmark.py
+"""
+
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+from code_feedback import Feedback, values_close
+
+NUM_ENTRIES = 100_000
+REPEATS = 10
+RTOL = 1e-6
+
+
+def old_check_tuple(ref: tuple[Any, ...], data: tuple[Any, ...]) -> bool:
+    good = True
+    for i in range(len(ref)):
+        if type(data[i]) != type(ref[i]) or data[i] != ref[i]:  # noqa: E721
+            good = False
+    return good
+
+
+def old_check_dict(ref: dict[Any, Any], data: dict[Any, Any]) -> bool:
+    if set(ref.keys()) - set(data.keys()) or set(data.keys()) - set(ref.keys()):
+        return False
+    for key, ref_value in ref.items():
+        if type(ref_value) is not type(data[key]):
+            return False
+        if ref_value != data[key]:
+            return False
+    return True
+
+
+def old_check_list(data: list[Any], entry_type: type) -> bool:
+    return all(isinstance(entry, entry_type) for entry in data)
+
+
+def per_entry_check_tuple(ref: tuple[Any, ...], data: tuple[Any, ...]) -> bool:
+    # The comparison made for each entry of a tuple of mixed types
+    return all(
+        type(ref_value) is type(value) and values_close(ref_value, value, RTOL)
+        for ref_value, value in zip(ref, data, strict=True)
+    )
+
+
+def new_check_tuple(ref: tuple[Any, ...], data: tuple[Any, ...]) -> bool:
+    return Feedback.check_tuple("x", ref, data, report_success=False)
+
+
+def new_check_tuple_rtol(ref: tuple[Any, ...], data: tuple[Any, ...]) -> bool:
+    return Feedback.check_tuple("x", ref, data, report_success=False, rtol=RTOL)
+
+
+def new_check_dict(ref: dict[Any, Any], data: dict[Any, Any]) -> bool:
+    return Feedback.check_dict("x", ref, data, report_success=False)
+
+
+def new_check_list(data: list[Any], entry_type: type) -> bool:
+    return Feedback.check_list(
+        "x", data, data, entry_type=entry_type, report_success=False
+    )
+
+
+def time_check(check: Callable[..., bool], *args: Any, expected: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        assert check(*args) == expected
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def print_row(label: str, output: str, old_ms: float, new_ms: float) -> None:
+    print(f"{label:<20}{output:<9}{old_ms:>9.2f}{new_ms:>9.2f}{old_ms / new_ms:>9.1f}")
+
+
+def main() -> None:
+    # Feedback for the wrong outputs is written to files in this directory.
+    os.environ["MERGE_DIR"] = tempfile.mkdtemp()
+    Feedback.set_name("benchmark")
+
+    # Student outputs are computed separately from the reference, so their
+    # entries are equal but not the same objects.
+    makers: dict[str, Callable[[int], Any]] = {
+        "int": lambda i: i * 1000,
+        "float": lambda i: i / 7,
+        "str": lambda i: f"entry {i}",
+    }
+
+    print(f"{NUM_ENTRIES} entries, times in ms per check")
+    print(f"{'check':<20}{'output':<9}{'before':>9}{'after':>9}{'speedup':>9}")
+    for entry_type, make in makers.items():
+        ref = [make(i) for i in range(NUM_ENTRIES)]
+        correct = [make(i) for i in range(NUM_ENTRIES)]
+        wrong = [*correct[:-1], make(0)]
+        for output, data, expected in (
+            ("correct", correct, True),
+            ("wrong", wrong, False),
+        ):
+            print_row(
+                f"check_tuple {entry_type}",
+                output,
+                time_check(old_check_tuple, tuple(ref), tuple(data), expected=expected),
+                time_check(new_check_tuple, tuple(ref), tuple(data), expected=expected),
+            )
+            ref_dict, data_dict = dict(enumerate(ref)), dict(enumerate(data))
+            print_row(
+                f"check_dict {entry_type}",
+                output,
+                time_check(old_check_dict, ref_dict, data_dict, expected=expected),
+                time_check(new_check_dict, ref_dict, data_dict, expected=expected),
+            )
+        print_row(
+            f"check_list {entry_type}",
+            "correct",
+            time_check(old_check_list, correct, type(ref[0]), expected=True),
+            time_check(new_check_list, correct, type(ref[0]), expected=True),
+        )
+
+    # Floats within tolerance, compared one at a time as for mixed types
+    ref = tuple(i / 7 for i in range(NUM_ENTRIES))
+    close = tuple(i / 7 * (1 + 1e-9) for i in range(NUM_ENTRIES))
+    print_row(
+        "check_tuple rtol",
+        "correct",
+        time_check(per_entry_check_tuple, ref, close, expected=True),
+        time_check(new_check_tuple_rtol, ref, close, expected=True),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark `execute_code` for a test suite with `total_iters = 10`.
+
+This compares running the question code for every iteration with a new
+`ExecutionContext`, which reads, parses and compiles the question files and the
+student code again each time as `execute_code` used to, and with one context
+that is shared by all iterations as `PLTestCase` does. The setup and reference
+code still run on every iteration, since they can depend on `test_iter_num`
+and on the random seed of the iteration.
+
+Run from `graders/python` with:
+
+    PYTHONPATH=python_autograder python benchmarks/execute_code_benchmark.py
+"""
+
+import json
+import os
+import tempfile
+import time
+from os.path import join
+
+from pl_execute import ExecutionContext, execute_code
+
+TOTAL_ITERS = 10
+REPEATS = 20
+NUM_FUNCTIONS = 200
+
+# Question code with many helper functions, as in larger questions
+HELPERS = "\n".join(
+    f"def helper_{i}(values):\n"
+    f"    total = 0\n"
+    f"    for value in values:\n"
+    f"        total += value * {i}\n"
+    f"    return total\n"
+    for i in range(NUM_FUNCTIONS)
+)
+SETUP_CODE = (
+    "import numpy as np\n\n" + HELPERS + "\n\nA = np.arange(test_iter_num, 100.0)\n"
+)
+ANSWER_CODE = "total = sum(helper_1(A) for _ in range(10))\n"
+STUDENT_CODE = HELPERS + "\n\ntotal = sum(helper_1(A) for _ in range(10))\n"
+
+
+def write_files(base_dir: str) -> None:
+    filenames_dir = join(base_dir, "filenames")
+    os.mkdir(filenames_dir)
+    files = {
+        join(filenames_dir, "setup_code.py"): SETUP_CODE,
+        join(filenames_dir, "ans.py"): ANSWER_CODE,
+        join(filenames_dir, "test.py"): "",
+        join(filenames_dir, "data.json"): json.dumps({
+            "params": {
+                "names_for_user": [{"name": "A"}],
+                "names_from_user": [{"name": "total"}],
+            }
+        }),
+        join(base_dir, "user_code.py"): STUDENT_CODE,
+    }
+    for fname, contents in files.items():
+        with open(fname, "w") as f:
+            f.write(contents)
+
+
+def time_iterations(base_dir: str, *, shared: bool) -> float:
+    filenames_dir = join(base_dir, "filenames")
+    fname_ref = join(filenames_dir, "ans.py")
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        context = ExecutionContext(filenames_dir, fname_ref)
+        for iter_num in range(TOTAL_ITERS):
+            if not shared and iter_num > 0:
+                context = ExecutionContext(filenames_dir, fname_ref)
+            execute_code(
+                fname_ref,
+                join(base_dir, "user_code.py"),
+                test_iter_num=iter_num,
+                context=context,
+            )
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as base_dir:
+        write_files(base_dir)
+        os.environ["FILENAMES_DIR"] = join(base_dir, "filenames")
+        per_iteration_ms = time_iterations(base_dir, shared=False)
+        shared_ms = time_iterations(base_dir, shared=True)
+
+    print(f"total_iters={TOTAL_ITERS}, times in ms per test suite")
+    print(f"{'per iteration':<15}{per_iteration_ms:>8.2f}")
+    print(f"{'shared':<15}{shared_ms:>8.2f}")
+    print(f"{'speedup':<15}{per_iteration_ms / shared_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
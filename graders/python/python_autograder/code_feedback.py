@@ -21,13 +21,16 @@ THE SOFTWARE.
 """
 
 
-from collections.abc import Callable
+import os
+from collections.abc import Callable, Sequence
+from itertools import count
 from typing import Any, Literal, NoReturn, TypeVar
 
 import numpy as np
 from matplotlib.axes import Axes
 from numpy.typing import ArrayLike, NDArray
 from pandas import DataFrame
+from pl_profile import Profile
 
 
 class GradingComplete(Exception):  # noqa: N818
@@ -47,6 +50,77 @@ class TestComplete(Exception):  # noqa: N818
 T = TypeVar("T")
 
 
+def get_feedback_path(feedback_file: str) -> str:
+    """
+    Returns the path of the file that feedback is written to for the given
+    `feedback_file`, e.g. `"feedback_test_0"`.
+    """
+    base_dir = os.environ.get("MERGE_DIR", "/grade/run")
+    return os.path.join(base_dir, feedback_file + ".txt")
+
+
+def values_close(
+    ref: Any, data: Any, rtol: float | None = None, atol: float | None = None
+) -> Any:
+    """
+    Compares numbers, or NumPy arrays of numbers elementwise, in the same way
+    as `Feedback.check_scalar`. Without `rtol` and `atol`, the values must be
+    equal.
+    """
+    close = ref == data
+    if rtol is None and atol is None:
+        return close
+    with np.errstate(invalid="ignore", over="ignore"):
+        diff = abs(ref - data)
+        if rtol is not None:
+            close |= diff < abs(ref) * rtol
+        if atol is not None:
+            close |= diff < atol
+    return close
+
+
+def find_mismatch(
+    ref: Sequence[Any],
+    data: Sequence[Any],
+    rtol: float | None = None,
+    atol: float | None = None,
+) -> int | None:
+    """
+    Returns the index of the first entry of `data` that has a different type
+    or value than the same entry of `ref`, or None if all entries match. Both
+    must have the same length.
+
+    Floating point and complex numbers are compared using `rtol` and `atol` as
+    in `values_close`. If all entries are floating point numbers of the same
+    type, they are compared with the tolerance as NumPy arrays.
+    """
+    tolerance = rtol is not None or atol is not None
+    if tolerance:
+        types = set(map(type, ref))
+        if (
+            len(types) == 1
+            and issubclass(next(iter(types)), (float, complex, np.inexact))
+            and set(map(type, data)) == types
+        ):
+            ref_array, data_array = np.array(ref), np.array(data)
+            if ref_array.dtype.kind in "fc" and data_array.dtype.kind in "fc":
+                mismatches = ~values_close(ref_array, data_array, rtol, atol)
+                return int(mismatches.argmax()) if mismatches.any() else None
+
+    # Faster than `enumerate`, which would put each pair of entries in a tuple
+    for i, ref_value, value in zip(count(), ref, data, strict=False):
+        if type(ref_value) is not type(value) or (
+            ref_value != value
+            and not (
+                tolerance
+                and isinstance(ref_value, (float, complex, np.inexact))
+                and values_close(ref_value, value, rtol, atol)
+            )
+        ):
+            return i
+    return None
+
+
 class Feedback:
     """
     Class to provide user feedback and correctness checking of various datatypes, including NumPy arrays, Matplotlib plots, and Pandas DataFrames.
@@ -109,9 +183,7 @@ class Feedback:
         if cls.feedback_file is None:
             raise RuntimeError("Cannot add feedback without a feedback file set. ")
 
-        with open(
-            "/grade/run/" + cls.feedback_file + ".txt", "a+", encoding="utf-8"
-        ) as f:
+        with open(get_feedback_path(cls.feedback_file), "a+", encoding="utf-8") as f:
             f.write(cls.buffer + text)
             f.write("\n")
             cls.buffer = ""
@@ -362,7 +434,11 @@ class Feedback:
                 f"'{name}' has the wrong length--expected {len(ref)}, got {len(data)}"
             )
 
-        if entry_type is not None:
+        # Only look for the entry with the wrong type if there is one, since
+        # lists usually hold entries of very few types.
+        if entry_type is not None and not all(
+            issubclass(entry_class, entry_type) for entry_class in set(map(type, data))
+        ):
             for i, entry in enumerate(data):
                 if not isinstance(entry, entry_type):
                     return bad(f"'{name}[{i}]' has the wrong type")
@@ -383,6 +459,8 @@ class Feedback:
         accuracy_critical: bool = False,
         report_failure: bool = True,
         report_success: bool = True,
+        rtol: float | None = None,
+        atol: float | None = None,
     ) -> bool:
         """
         Checks that a student dict (`data`) has all correct key-value mappings with respect to a reference dict (`ref`).
@@ -395,6 +473,8 @@ class Feedback:
             accuracy_critical: If true, grading will halt on failure.
             report_failure: If true, feedback will be given on failure.
             report_success: If true, feedback will be given on success.
+            rtol: If not None, floating point values only need to be within this relative tolerance, as in `check_scalar`.
+            atol: If not None, floating point values only need to be within this absolute tolerance, as in `check_scalar`.
         """
 
         def bad(msg: str) -> Literal[False]:
@@ -419,30 +499,40 @@ class Feedback:
         check_all = target_keys is None
         keys_to_check = ref.keys() if check_all else target_keys
 
-        missing_keys = set(keys_to_check) - set(data.keys())
-        if missing_keys:
-            return bad(
-                f"'{name}' has missing keys: `{', '.join(sorted(map(str, missing_keys)))}`"
-            )
+        # Comparing the key views does not build any sets, so only work out
+        # which keys are wrong when they are not all the same.
+        if not (check_all and ref.keys() == data.keys()):
+            missing_keys = set(keys_to_check) - data.keys()
+            if missing_keys:
+                return bad(
+                    f"'{name}' has missing keys: `{', '.join(sorted(map(str, missing_keys)))}`"
+                )
 
-        extra_keys = set(data.keys()) - set(keys_to_check)
-        if check_all and extra_keys:
-            return bad(
-                f"'{name}' has extra keys: `{', '.join(sorted(map(str, extra_keys)))}`"
-            )
+            extra_keys = data.keys() - set(keys_to_check)
+            if check_all and extra_keys:
+                return bad(
+                    f"'{name}' has extra keys: `{', '.join(sorted(map(str, extra_keys)))}`"
+                )
 
         # Now check the values themselves
-        for key in keys_to_check:
+        keys = list(keys_to_check)
+        i = find_mismatch(
+            list(ref.values()) if check_all else list(map(ref.__getitem__, keys)),
+            list(map(data.__getitem__, keys)),
+            rtol,
+            atol,
+        )
+        if i is not None:
+            key = keys[i]
             # It's possible that the equality will pass even if the types are different
             if type(ref[key]) is not type(data[key]):
                 return bad(
                     f"'{name}' has key `{key}` with type `{type(data[key]).__name__}`, which is not the right type"
                 )
 
-            if ref[key] != data[key]:
-                return bad(
-                    f"'{name}' has key `{key}` with value `{data[key]}`, which is not correct"
-                )
+            return bad(
+                f"'{name}' has key `{key}` with value `{data[key]}`, which is not correct"
+            )
 
         if report_success:
             cls.add_feedback(f"'{name}' looks good")
@@ -458,6 +548,8 @@ class Feedback:
         accuracy_critical: bool = False,  # noqa: FBT001
         report_failure: bool = True,  # noqa: FBT001
         report_success: bool = True,  # noqa: FBT001
+        rtol: float | None = None,
+        atol: float | None = None,
     ) -> bool:
         """
         Check that a student tuple has correct length with respect to a reference tuple, and same values.
@@ -469,6 +561,8 @@ class Feedback:
             accuracy_critical: If true, grading will halt on failure.
             report_failure: If true, feedback will be given on failure.
             report_success: If true, feedback will be given on success.
+            rtol: If not None, floating point values only need to be within this relative tolerance, as in `check_scalar`.
+            atol: If not None, floating point values only need to be within this absolute tolerance, as in `check_scalar`.
 
         Examples:
             >>> Feedback.check_tuple(name, ref, data)
@@ -493,19 +587,15 @@ class Feedback:
         if len(data) != nref:
             return bad(f"{name} should be of length {nref}")
 
-        good = True
-        for i in range(nref):
-            if type(data[i]) != type(ref[i]):  # noqa: E721
-                good = False
-                if report_failure:
-                    cls.add_feedback(
-                        f"{name}[{i}] should be of type {type(ref[i]).__name__}"
-                    )
-            elif data[i] != ref[i]:
-                good = False
-
-        if not good:
-            return bad(f"'{name}' is inaccurate")
+        mismatch = find_mismatch(ref, data, rtol, atol)
+        if mismatch is not None:
+            if report_failure:
+                for i in range(mismatch, nref):
+                    if type(data[i]) != type(ref[i]):  # noqa: E721
+                        cls.add_feedback(
+                            f"{name}[{i}] should be of type {type(ref[i]).__name__}"
+                        )
+            return bad(f"'{name}' is inaccurate at index {mismatch}")
         elif report_success:
             cls.add_feedback(f"'{name}' looks good")
 
@@ -611,7 +701,8 @@ class Feedback:
         """
 
         try:
-            return f(*args, **kwargs)
+            with Profile.measure("call_user", getattr(f, "__name__", type(f).__name__)):
+                return f(*args, **kwargs)
         except Exception as exc:
             if callable(f):
                 try:
@@ -6,7 +6,7 @@ import random
 import sys
 from copy import deepcopy
 from os import path
-from types import ModuleType
+from types import CodeType, ModuleType
 from typing import Any
 
 import numpy as np
@@ -44,6 +44,97 @@ def populate_linecache(fname: str, contents: str) -> None:
     )
 
 
+class ExecutionContext:
+    """
+    The question files used by `execute_code`, which are read and compiled
+    once and then reused when the test suite is run for several iterations.
+
+    The files in `filenames_dir` are only hidden from the student code while
+    it runs, and are restored from memory afterwards.
+    """
+
+    def __init__(self, filenames_dir: str, fname_ref: str) -> None:
+        self.filenames_dir = filenames_dir
+        self.fname_ref = fname_ref
+        self.fname_setup = path.join(filenames_dir, "setup_code.py")
+
+        with open(path.join(filenames_dir, "data.json"), encoding="utf-8") as f:
+            self.data_json = f.read()
+        with open(self.fname_setup, encoding="utf-8") as f:
+            self.str_setup = f.read()
+        with open(fname_ref, encoding="utf-8") as f:
+            self.str_ref = f.read()
+        with open(path.join(filenames_dir, "test.py"), encoding="utf-8") as f:
+            self.str_test = f.read()
+
+        # Read in leading, trailing code
+        self.str_leading = try_read(path.join(filenames_dir, "leading_code.py"))
+        self.str_trailing = try_read(path.join(filenames_dir, "trailing_code.py"))
+
+        self.code_setup = compile(self.str_setup, self.fname_setup, "exec")
+        self.code_ref = compile(self.str_ref, fname_ref, "exec")
+        self.student_code: dict[tuple[str, str], str] = {}
+        self.student_bytecode: dict[tuple[str, str], CodeType] = {}
+
+    def read_student_code(self, fname_student: str, ipynb_key: str) -> str:
+        """
+        Read student code (and transform if necessary) and append
+        leading/trailing code.
+        """
+        key = (fname_student, ipynb_key)
+        if key not in self.student_code:
+            with open(fname_student, encoding="utf-8") as f:
+                _, extension = path.splitext(fname_student)
+                if extension == ".ipynb":
+                    str_student = extract_ipynb_contents(f, ipynb_key)
+                else:
+                    str_student = f.read()
+            self.student_code[key] = "\n".join(
+                filter(bool, (self.str_leading, str_student, self.str_trailing))
+            )
+        return self.student_code[key]
+
+    def compile_student_code(self, fname_student: str, ipynb_key: str) -> CodeType:
+        key = (fname_student, ipynb_key)
+        if key not in self.student_bytecode:
+            self.student_bytecode[key] = compile(
+                self.read_student_code(fname_student, ipynb_key), fname_student, "exec"
+            )
+        return self.student_bytecode[key]
+
+    def hide_files(self) -> None:
+        """
+        Delete sensitive code so students can't read e.g. test cases or setup code.
+        """
+        os.remove(path.join(self.filenames_dir, "data.json"))
+        os.remove(self.fname_ref)
+        os.remove(self.fname_setup)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path.join(self.filenames_dir, "leading_code.py"))
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path.join(self.filenames_dir, "trailing_code.py"))
+        os.remove(path.join(self.filenames_dir, "test.py"))
+
+    def restore_files(self) -> None:
+        """
+        Replace the files deleted by `hide_files`.
+        """
+        files = {
+            path.join(self.filenames_dir, "data.json"): self.data_json,
+            self.fname_ref: self.str_ref,
+            self.fname_setup: self.str_setup,
+            path.join(self.filenames_dir, "test.py"): self.str_test,
+        }
+        # Leading and trailing code are optional
+        if self.str_leading:
+            files[path.join(self.filenames_dir, "leading_code.py")] = self.str_leading
+        if self.str_trailing:
+            files[path.join(self.filenames_dir, "trailing_code.py")] = self.str_trailing
+        for fname, contents in files.items():
+            with open(fname, "w", encoding="utf-8") as f:
+                f.write(contents)
+
+
 def execute_code(
     fname_ref: str,
     fname_student: str,
@@ -51,6 +142,7 @@ def execute_code(
     console_output_fname: str | None = None,
     test_iter_num: int = 0,
     ipynb_key: str = "#grade",
+    context: ExecutionContext | None = None,
 ) -> tuple[dict[str, Any], dict[str, Any], ModuleType | None]:
     """
     execute_code(fname_ref, fname_student)
@@ -62,6 +154,8 @@ def execute_code(
     - include_plt: If true, plots will be included in grading results.
     - console_output_fname: Filename to redirect console output to.
     - test_iter_num: The iteration number of this test, when test cases are run multiple times.
+    - context: The question files to use, if they have already been read by a
+      previous iteration.
 
     Returns:
     - ref_result: A named tuple with reference variables
@@ -73,52 +167,25 @@ def execute_code(
     if filenames_dir is None:
         raise ValueError("FILENAMES_DIR not set in environment variables")
 
-    with open(path.join(filenames_dir, "data.json"), encoding="utf-8") as f:
-        data = json.load(f)
-    with open(path.join(filenames_dir, "setup_code.py"), encoding="utf-8") as f:
-        str_setup = f.read()
-    with open(fname_ref, encoding="utf-8") as f:
-        str_ref = f.read()
-
-    # Read in leading, trailing code
-    str_leading = try_read(path.join(filenames_dir, "leading_code.py"))
-    str_trailing = try_read(path.join(filenames_dir, "trailing_code.py"))
-
-    # Read student code (and transform if necessary) and append leading/trailing code
-    with open(fname_student, encoding="utf-8") as f:
-        _, extension = path.splitext(fname_student)
-        if extension == ".ipynb":
-            str_student = extract_ipynb_contents(f, ipynb_key)
-        else:
-            str_student = f.read()
-    str_student = "\n".join(filter(bool, (str_leading, str_student, str_trailing)))
-
-    with open(path.join(filenames_dir, "test.py"), encoding="utf-8") as f:
-        str_test = f.read()
-
-    # Delete sensitive code so students can't read e.g. test cases or setup code
-    os.remove(path.join(filenames_dir, "data.json"))
-    os.remove(fname_ref)
-    os.remove(path.join(filenames_dir, "setup_code.py"))
-    with contextlib.suppress(FileNotFoundError):
-        os.remove(path.join(filenames_dir, "leading_code.py"))
-    with contextlib.suppress(FileNotFoundError):
-        os.remove(path.join(filenames_dir, "trailing_code.py"))
-    os.remove(path.join(filenames_dir, "test.py"))
+    if context is None:
+        context = ExecutionContext(filenames_dir, fname_ref)
+    data = json.loads(context.data_json)
+    str_student = context.read_student_code(fname_student, ipynb_key)
+
+    context.hide_files()
 
     # Since we've deleted some files, we need to manually populate
     # the linecache so that `traceback` can find the correct contents when
     # printing any exceptions.
-    populate_linecache(path.join(filenames_dir, "setup_code.py"), str_setup)
-    populate_linecache(fname_ref, str_ref)
+    populate_linecache(context.fname_setup, context.str_setup)
+    populate_linecache(fname_ref, context.str_ref)
 
     # Seed student code and answer code with same seed
     seed = random.randint(0, (2**32) - 1)
 
     setup_globals = {"test_iter_num": test_iter_num, "data": data}
     # make all the variables in setup_code.py available to ans.py
-    code_setup = compile(str_setup, path.join(filenames_dir, "setup_code.py"), "exec")
-    exec(code_setup, setup_globals)
+    exec(context.code_setup, setup_globals)
 
     # If the setup code has a repeated_setup function, run it.
     repeated_setup = setup_globals.get("repeated_setup")
@@ -143,8 +210,7 @@ def execute_code(
         ):
             ref_code[i] = j
     set_random_seed(seed)
-    code_ref = compile(str_ref, fname_ref, "exec")
-    exec(code_ref, ref_code)
+    exec(context.code_ref, ref_code)
     # ref_code contains the correct answers
 
     if include_plt:
@@ -167,7 +233,7 @@ def execute_code(
 
     # Remove the setup and answer code from the linecache to make it slightly
     # harder for students to read it.
-    linecache.cache.pop(path.join(filenames_dir, "setup_code.py"), None)
+    linecache.cache.pop(context.fname_setup, None)
     linecache.cache.pop(fname_ref, None)
 
     student_globals = {}
@@ -192,31 +258,16 @@ def execute_code(
     populate_linecache(fname_student, str_student)
 
     try:
-        code_student = compile(str_student, fname_student, "exec")
+        code_student = context.compile_student_code(fname_student, ipynb_key)
         exec(code_student, student_globals)
         err = None
     except Exception:
         err = sys.exc_info()
 
-    # Now that user code has been run, replace deleted files in case we are to run the tests again.
-    with open(path.join(filenames_dir, "data.json"), "w", encoding="utf-8") as f:
-        json.dump(data, f)
-    with open(fname_ref, "w", encoding="utf-8") as f:
-        f.write(str_ref)
-    with open(path.join(filenames_dir, "setup_code.py"), "w", encoding="utf-8") as f:
-        f.write(str_setup)
-    if len(str_leading) > 0:
-        with open(
-            path.join(filenames_dir, "leading_code.py"), "w", encoding="utf-8"
-        ) as f:
-            f.write(str_leading)
-    if len(str_trailing) > 0:
-        with open(
-            path.join(filenames_dir, "trailing_code.py"), "w", encoding="utf-8"
-        ) as f:
-            f.write(str_trailing)
-    with open(path.join(filenames_dir, "test.py"), "w", encoding="utf-8") as f:
-        f.write(str_test)
+    # Now that user code has been run, replace deleted files. Changes that the
+    # setup code made to `data` are kept for the next iteration.
+    context.data_json = json.dumps(data)
+    context.restore_files()
     if err is not None:
         raise UserCodeFailedError(err)
 
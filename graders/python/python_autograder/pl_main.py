@@ -1,11 +1,13 @@
 import json
 import os
+import time
 import traceback
 from collections import defaultdict
 from os.path import join
 from typing import Any
 from unittest import TestLoader
 
+from pl_profile import Profile
 from pl_result import PLTestResult
 
 """
@@ -39,7 +41,16 @@ def add_files(results: list[dict[str, Any]]) -> None:
             os.remove(feedback_fname)
 
 
-if __name__ == "__main__":
+def main() -> dict[str, float]:
+    """
+    Run the tests in `filenames/test.py` and write the grading results to the
+    file named in `output-fname.txt`.
+
+    Returns the time in seconds spent setting up, running the setup, reference
+    and student code, and running the tests.
+    """
+    times = {"setup": 0.0, "student_exec": 0.0, "tests": 0.0}
+    start = time.perf_counter()
     output_fname = None
     try:
         filenames_dir = os.environ.get("FILENAMES_DIR")
@@ -58,9 +69,14 @@ if __name__ == "__main__":
 
         from filenames.test import Test as TestCase  # type: ignore
 
+        if getattr(TestCase, "include_profile", False):
+            Profile.start()
+
         # Update the working directory so tests may access local files
         prev_wd = os.getcwd()
         os.chdir(base_dir)
+        times["setup"] = time.perf_counter() - start
+        start = time.perf_counter()
 
         # Run the tests with our custom setup
         loader = TestLoader()
@@ -71,14 +87,22 @@ if __name__ == "__main__":
         for _ in range(TestCase.total_iters):
             suite = loader.loadTestsFromTestCase(TestCase)
             has_test_cases = suite.countTestCases() > 0
-            result = PLTestResult()
+            result = PLTestResult(
+                getattr(TestCase, "parallel_tests", False),
+                getattr(TestCase, "parallel_processes", None),
+            )
             suite.run(result)
+            result.wait_for_tests()
             all_results.append(result.getResults())
             if not result.getGradable():
                 gradable = False
                 format_errors = result.format_errors
                 break
 
+        # Running the code is timed separately from the tests that check it
+        times["student_exec"] = getattr(TestCase, "exec_time", 0.0)
+        times["tests"] = time.perf_counter() - start - times["student_exec"]
+
         # Change back to previous directory
         os.chdir(prev_wd)
 
@@ -146,6 +170,11 @@ if __name__ == "__main__":
                 else:
                     break
 
+        if Profile.enabled:
+            grading_result["profile"] = Profile.get_results()
+            # Also log a summary that can be collected from the job logs
+            print("[profile] " + json.dumps(Profile.get_summary()))
+
         with open(output_fname, mode="w", encoding="utf-8") as out:
             json.dump(grading_result, out)
     except BaseException as exc:
@@ -161,3 +190,8 @@ if __name__ == "__main__":
 
         with open(output_fname, mode="w") as out:
             json.dump(grading_result, out)
+    return times
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import contextlib
+import resource
+import time
+import tracemalloc
+from collections.abc import Generator
+from typing import Any, ClassVar
+
+
+class Profile:
+    """
+    Records where time and memory go while grading, when a test suite sets
+    `include_profile`.
+
+    Measurements are grouped by category (`execute_code`, `tests` and
+    `call_user`) and name, e.g. the name of a test method. For each one, the
+    number of calls, the total wall-clock and CPU time, the peak memory
+    allocated by Python code while it ran (using `tracemalloc`), and the peak
+    resident set size of the process when it finished are recorded.
+    """
+
+    enabled = False
+    sections: ClassVar[dict[str, dict[str, dict[str, float]]]] = {}
+    # The peak traced memory of each running measurement, innermost last
+    peaks: ClassVar[list[int]] = []
+
+    @classmethod
+    def start(cls) -> None:
+        cls.enabled = True
+        cls.sections = {}
+        tracemalloc.start()
+
+    @classmethod
+    @contextlib.contextmanager
+    def measure(cls, category: str, name: str = "") -> Generator[None, None, None]:
+        """
+        Measure the code run in this context, if profiling is enabled.
+        """
+        if not cls.enabled:
+            yield
+            return
+
+        # Measurements can be nested, e.g. a test method calling student code,
+        # and the peak of an inner one also counts for the outer ones.
+        current, peak = tracemalloc.get_traced_memory()
+        if cls.peaks:
+            cls.peaks[-1] = max(cls.peaks[-1], peak)
+        tracemalloc.reset_peak()
+        cls.peaks.append(current)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak = max(cls.peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if cls.peaks:
+                cls.peaks[-1] = max(cls.peaks[-1], peak)
+            cls.record(
+                category,
+                name,
+                {
+                    "calls": 1,
+                    "wall_ms": wall * 1000,
+                    "cpu_ms": cpu * 1000,
+                    "peak_alloc_kb": (peak - current) / 1024,
+                    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                },
+            )
+
+    @classmethod
+    def record(cls, category: str, name: str, stats: dict[str, float]) -> None:
+        """
+        Add `stats` to the measurements for `name` in `category`.
+        """
+        totals = cls.sections.setdefault(category, {}).get(name)
+        if totals is None:
+            cls.sections[category][name] = dict(stats)
+            return
+        for key in ("calls", "wall_ms", "cpu_ms"):
+            totals[key] += stats[key]
+        for key in ("peak_alloc_kb", "max_rss_kb"):
+            totals[key] = max(totals[key], stats[key])
+
+    @classmethod
+    def merge(cls, sections: dict[str, dict[str, dict[str, float]]]) -> None:
+        """
+        Add the measurements made by another process.
+        """
+        for category, names in sections.items():
+            for name, stats in names.items():
+                cls.record(category, name, stats)
+
+    @classmethod
+    def get_results(cls) -> dict[str, Any]:
+        """
+        Returns the measurements for the `profile` section of the grading
+        results. Measurements without a name are reported directly under their
+        category.
+        """
+        results: dict[str, Any] = {}
+        for category, names in cls.sections.items():
+            rounded = {
+                name: {key: round(value, 3) for key, value in stats.items()}
+                for name, stats in names.items()
+            }
+            results[category] = rounded.get("", rounded)
+        results["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return results
+
+    @classmethod
+    def get_summary(cls) -> dict[str, Any]:
+        """
+        Returns the total calls and time of each category, for the job log.
+        """
+        summary: dict[str, Any] = {}
+        for category, names in cls.sections.items():
+            summary[category] = {
+                key: round(sum(stats[key] for stats in names.values()), 3)
+                for key in ("calls", "wall_ms", "cpu_ms")
+            }
+        summary["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return summary
@@ -1,10 +1,90 @@
+import json
+import math
+import os
+import resource
+import select
+import signal
+import sys
+import time
 import traceback
 import unittest
 from typing import Any
 
-from code_feedback import Feedback, GradingComplete, TestComplete
+from code_feedback import (
+    Feedback,
+    GradingComplete,
+    TestComplete,
+    get_feedback_path,
+)
 from pl_execute import UserCodeFailedError
 from pl_helpers import DoNotRunError, GradingSkipped, print_student_code
+from pl_profile import Profile
+
+
+class TestProcess:
+    """
+    A test case that is run in a forked process by `PLTestResult.run_in_process`.
+    """
+
+    def __init__(
+        self,
+        test: unittest.TestCase,
+        pid: int,
+        fd: int,
+        timeout: float | None,
+        feedback_size: int | None,
+        image: str | None,
+    ) -> None:
+        self.test = test
+        self.pid = pid
+        self.fd = fd
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        # The size of the feedback file of the test before it was started, or
+        # `None` if it didn't exist
+        self.feedback_size = feedback_size
+        # The contents of the image file of the test before it was started, or
+        # `None` if it didn't exist
+        self.image = image
+        self.output = b""
+        self.finished = False
+        self.timed_out = False
+        self.status = 0
+
+    def discard_feedback(self) -> None:
+        """
+        Remove any feedback and image that the test process has written.
+        """
+        feedback_fname = get_feedback_path("feedback_" + self.test._testMethodName)
+        if self.feedback_size is not None:
+            os.truncate(feedback_fname, self.feedback_size)
+        elif os.path.exists(feedback_fname):
+            os.remove(feedback_fname)
+
+        image_fname = get_image_path(self.test)
+        if self.image is not None:
+            with open(image_fname, "w") as f:
+                f.write(self.image)
+        elif os.path.exists(image_fname):
+            os.remove(image_fname)
+
+
+def get_test_name(test: unittest.TestCase) -> str:
+    """
+    Returns the name of the test case that is shown in the results.
+    """
+    options = getattr(test, test._testMethodName).__func__.__dict__
+    name = options.get("name", test.shortDescription())
+    return test._testMethodName if name is None else name
+
+
+def get_image_path(test: unittest.TestCase) -> str:
+    """
+    Returns the path of the image file of the test case, which `pl_main`
+    adds to its results.
+    """
+    base_dir = os.environ.get("MERGE_DIR", "/grade/run")
+    return os.path.join(base_dir, "image_" + get_test_name(test) + ".png")
 
 
 class PLTestResult(unittest.TestResult):
@@ -23,7 +103,14 @@ class PLTestResult(unittest.TestResult):
         "The associated traceback is:\n"
     )
 
-    def __init__(self) -> None:
+    timeout_message = "This test took too long to run (over {} seconds)."
+    crash_message = "This test stopped unexpectedly while running."
+
+    def __init__(
+        self,
+        parallel: bool = False,  # noqa: FBT001
+        processes: int | None = None,
+    ) -> None:
         unittest.TestResult.__init__(self)
         self.results = []
         self.format_errors = []
@@ -36,17 +123,23 @@ class PLTestResult(unittest.TestResult):
         # (but not execute them) so that we show the correct number of points on the grading panel
         self.skip_grading = False
 
+        # If set, test cases are run in parallel by `run_in_process`, by up to
+        # `processes` processes at a time. By default, that's the number of
+        # CPUs that this process may run on, which may be fewer than the
+        # machine has (e.g. in a container).
+        self.parallel = parallel
+        self.processes = processes or len(os.sched_getaffinity(0))
+        self.test_processes: list[TestProcess] = []
+
     def startTest(self, test: unittest.TestCase) -> None:  # noqa: N802
         unittest.TestResult.startTest(self, test)
 
         options = getattr(test, test._testMethodName).__func__.__dict__
 
         points = options.get("points", 1)
-        name = options.get("name", test.shortDescription())
+        name = get_test_name(test)
         filename = test._testMethodName
 
-        if name is None:
-            name = test._testMethodName
         self.results.append({"name": name, "max_points": points, "filename": filename})
 
     def addSuccess(self, test: Any | unittest.TestCase) -> None:  # noqa: N802
@@ -141,6 +234,142 @@ class PLTestResult(unittest.TestResult):
         self._mirrorOutput = False
         unittest.TestResult.stopTest(self, test)
 
+    def run_in_process(self, test: unittest.TestCase, timeout: float | None) -> None:
+        """
+        Start running a test case in a forked process, which inherits the state
+        of the test class, such as the variables defined by the student code.
+        Up to `self.processes` test cases run at the same time, and each one is
+        stopped if it takes longer than `timeout` seconds of wall-clock or CPU
+        time. The results are merged by `wait_for_tests`.
+        """
+        while sum(not process.finished for process in self.test_processes) >= (
+            self.processes
+        ):
+            self.poll_tests()
+
+        feedback_fname = get_feedback_path("feedback_" + test._testMethodName)
+        feedback_size = (
+            os.path.getsize(feedback_fname) if os.path.exists(feedback_fname) else None
+        )
+        image_fname = get_image_path(test)
+        image = None
+        if os.path.exists(image_fname):
+            with open(image_fname) as f:
+                image = f.read()
+        # Don't let the child process write out anything that is buffered here
+        sys.stdout.flush()
+        sys.stderr.flush()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            exit_code = 1
+            try:
+                if timeout is not None:
+                    limit = math.ceil(timeout)
+                    resource.setrlimit(resource.RLIMIT_CPU, (limit, limit + 1))
+                result = PLTestResult()
+                # Only report what was measured in this process
+                Profile.sections = {}
+                test.run(result)
+                with os.fdopen(write_fd, "w") as f:
+                    json.dump(
+                        {
+                            "results": result.results,
+                            "format_errors": result.format_errors,
+                            "done_grading": result.done_grading,
+                            "skip_grading": result.skip_grading,
+                            "grading_succeeded": result.grading_succeeded,
+                            "profile": Profile.sections,
+                        },
+                        f,
+                    )
+                exit_code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+        os.close(write_fd)
+        self.test_processes.append(
+            TestProcess(test, pid, read_fd, timeout, feedback_size, image)
+        )
+
+    def poll_tests(self) -> None:
+        """
+        Wait until a running test process has written output, finished, or
+        timed out.
+        """
+        running = [process for process in self.test_processes if not process.finished]
+        deadlines = [
+            process.deadline for process in running if process.deadline is not None
+        ]
+        wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        ready, _, _ = select.select([process.fd for process in running], [], [], wait)
+
+        now = time.monotonic()
+        for process in running:
+            if process.fd in ready:
+                chunk = os.read(process.fd, 65536)
+                process.output += chunk
+                done = not chunk
+            else:
+                done = process.timed_out = (
+                    process.deadline is not None and now >= process.deadline
+                )
+                if done:
+                    os.kill(process.pid, signal.SIGKILL)
+            if done:
+                os.close(process.fd)
+                _, process.status = os.waitpid(process.pid, 0)
+                process.finished = True
+
+    def wait_for_tests(self) -> None:
+        """
+        Wait for all tests started by `run_in_process`, and merge their results
+        in the order in which they were started. As when running sequentially,
+        tests after one that stopped grading early are reported as skipped.
+        """
+        while any(not process.finished for process in self.test_processes):
+            self.poll_tests()
+
+        processes, self.test_processes = self.test_processes, []
+        for process in processes:
+            test = process.test
+            if self.done_grading or self.skip_grading:
+                # This test wouldn't have been run after the previous one, so
+                # run it again to record it like the sequential run would.
+                process.discard_feedback()
+                test.run(self)
+            elif (
+                not process.timed_out and os.waitstatus_to_exitcode(process.status) == 0
+            ):
+                output = json.loads(process.output)
+                self.results.extend(output["results"])
+                self.format_errors.extend(output["format_errors"])
+                self.done_grading = self.done_grading or output["done_grading"]
+                self.skip_grading = self.skip_grading or output["skip_grading"]
+                self.grading_succeeded = (
+                    self.grading_succeeded and output["grading_succeeded"]
+                )
+                Profile.merge(output["profile"])
+                self.testsRun += 1
+            else:
+                # Only report why the test stopped, not what it had written
+                # by then.
+                process.discard_feedback()
+                self.startTest(test)
+                self.results[-1]["points"] = 0
+                Feedback.set_name(test._testMethodName)
+                if process.timed_out or (
+                    os.waitstatus_to_exitcode(process.status) == -signal.SIGXCPU
+                ):
+                    Feedback.add_feedback(self.timeout_message.format(process.timeout))
+                else:
+                    Feedback.add_feedback(self.crash_message)
+                self.stopTest(test)
+
     def getResults(self) -> list[dict[str, Any]]:  # noqa: N802
         return self.results
 
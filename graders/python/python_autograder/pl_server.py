@@ -0,0 +1,386 @@
+"""
+A resident grading server for the Python autograder.
+
+`run.sh` starts a new interpreter for every grading job, which then imports
+numpy, matplotlib, Faker and the rest of the grading stack before it can grade
+anything. This server imports all of that once, and then grades each job in a
+child process forked from it, so that jobs start with everything loaded.
+
+Jobs are read from stdin, one per line, as JSON with the job directory and an
+optional timeout in seconds, e.g. `{"job_dir": "/grade", "timeout": 60}`. Each
+job directory has the layout that `run.sh` expects, and grading it writes the
+same `results/results.json` that `run.sh` would. For each job, one line of JSON
+is written to stdout with the time in milliseconds that the job spent in setup,
+running the setup, reference and student code, and running the tests.
+
+As with `run.sh`, jobs are run as the `ag` user when the server runs as root.
+After each job, every process of the `ag` user is killed, and the job's files
+and any files that `ag` left in its home directory or the scratch directories
+are removed, so that nothing that a job leaves behind can interfere with later
+jobs.
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import os
+import pwd
+import select
+import shutil
+import signal
+import sys
+import time
+import traceback
+import uuid
+from os.path import join
+from typing import Any
+
+import pl_main
+
+AG_DIR = os.path.dirname(os.path.abspath(__file__))
+USER = "ag"
+
+# Modules that are imported before grading any jobs. `pl_main` already imports
+# most of the grading stack.
+PRELOAD_MODULES = ["pl_unit_test", "matplotlib.pyplot"]
+
+# Directories other than its home directory in which the `ag` user can leave
+# files for later jobs to find
+SCRATCH_DIRS = ["/tmp", "/var/tmp", "/dev/shm"]
+
+# How often to check whether a job has exited while waiting for its output,
+# in seconds. Processes that the job started may keep its pipe open after it
+# exits, so the end of the output can't be relied on.
+POLL_INTERVAL = 0.05
+
+FALLBACK_RESULT = {
+    "succeeded": False,
+    "score": 0.0,
+    "message": "Your code could not be processed by the autograder. Please contact course staff and have them check the logs for this submission.",
+}
+
+
+def move_contents(src: str, dst: str) -> None:
+    for entry in os.listdir(src):
+        if not entry.startswith("."):
+            shutil.move(join(src, entry), join(dst, entry))
+
+
+def chmod_tree(path: str, mode: int) -> None:
+    os.chmod(path, mode)
+    for root, dirs, files in os.walk(path):
+        for entry in dirs + files:
+            os.chmod(join(root, entry), mode)
+
+
+def prepare_job(job_dir: str) -> str:
+    """
+    Lay out the files of the job in `job_dir` in the same way as `run.sh`.
+
+    The grader's own files are copied rather than moved, since they are needed
+    for the next job.
+
+    Returns the path of the file that the results are written to.
+    """
+    merge_dir = join(job_dir, "run")
+    os.mkdir(merge_dir)
+    os.mkdir(join(job_dir, "results"))
+
+    move_contents(join(job_dir, "student"), merge_dir)
+    for entry in os.listdir(AG_DIR):
+        if entry.startswith(".") or entry in {"run.sh", "__pycache__"}:
+            continue
+        if os.path.isdir(join(AG_DIR, entry)):
+            shutil.copytree(join(AG_DIR, entry), join(merge_dir, entry))
+        else:
+            shutil.copy(join(AG_DIR, entry), join(merge_dir, entry))
+    move_contents(join(job_dir, "tests"), merge_dir)
+
+    # We need this to include code as python modules
+    with open(join(merge_dir, "__init__.py"), "a"):
+        pass
+
+    # Do not allow ag user to modify, rename, or delete any existing files
+    chmod_tree(merge_dir, 0o755)
+    os.chmod(merge_dir, 0o1777)
+
+    # Create directory without sticky bit for deletable files
+    filenames_dir = join(merge_dir, "filenames")
+    os.mkdir(filenames_dir)
+    os.chmod(filenames_dir, 0o777)
+    for fname in ("ans.py", "setup_code.py", "test.py"):
+        shutil.move(join(merge_dir, fname), join(filenames_dir, fname))
+    shutil.move(join(job_dir, "data", "data.json"), join(filenames_dir, "data.json"))
+    for fname in ("leading_code.py", "trailing_code.py"):
+        if os.path.isfile(join(merge_dir, fname)):
+            shutil.move(join(merge_dir, fname), join(filenames_dir, fname))
+
+    # Randomly generate the name of the results file, so that someone can't
+    # guess and write to it
+    secret_name = join(merge_dir, str(uuid.uuid4()))
+    output_fname = join(filenames_dir, pl_main.OUTPUT_FILE)
+    with open(output_fname, "w") as f:
+        f.write(secret_name)
+    os.chmod(output_fname, 0o644)
+    return secret_name
+
+
+def finish_job(job_dir: str, secret_name: str) -> None:
+    """
+    Move the results of the job to `results/results.json`, in the same way as
+    `run.sh`.
+    """
+    results_fname = join(job_dir, "results", "results.json")
+
+    # Remove any "fake" results.json files if they exist
+    for fname in (join(job_dir, "run", "results.json"), results_fname):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(fname)
+
+    if os.path.isfile(secret_name):
+        shutil.move(secret_name, results_fname)
+
+    if not os.path.isfile(results_fname) or os.path.getsize(results_fname) == 0:
+        with open(results_fname, "w") as f:
+            json.dump(FALLBACK_RESULT, f)
+
+
+def drop_privileges() -> None:
+    if os.geteuid() != 0:
+        return
+    user = pwd.getpwnam(USER)
+    os.setgroups([])
+    os.setgid(user.pw_gid)
+    os.setuid(user.pw_uid)
+    os.environ.update(HOME=user.pw_dir, USER=USER, LOGNAME=USER)
+
+
+def kill_user_processes() -> None:
+    """
+    Kill every process of the `ag` user, including any that a job moved out of
+    its process group, if jobs are run as `ag`.
+    """
+    if os.geteuid() != 0:
+        return
+    try:
+        uid = pwd.getpwnam(USER).pw_uid
+    except KeyError:
+        return
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setgroups([])
+            os.setuid(uid)
+            # Once this process runs as `ag`, `kill(-1)` signals every other
+            # process of `ag` at once, so none can escape by forking.
+            if os.getuid() == uid != 0:
+                os.kill(-1, signal.SIGKILL)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def remove_owned_files(path: str, uid: int) -> None:
+    """
+    Remove every file and directory under `path` that is owned by `uid`.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.stat(follow_symlinks=False).st_uid == uid:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+            elif entry.is_dir(follow_symlinks=False):
+                remove_owned_files(entry.path, uid)
+
+
+def remove_user_files() -> None:
+    """
+    Remove the files that the `ag` user left in its home directory and the
+    scratch directories, if jobs are run as `ag`. No process of `ag` may be
+    left when this is called.
+    """
+    if os.geteuid() != 0:
+        return
+    try:
+        user = pwd.getpwnam(USER)
+    except KeyError:
+        return
+    for directory in [user.pw_dir, *SCRATCH_DIRS]:
+        with contextlib.suppress(FileNotFoundError):
+            remove_owned_files(directory, user.pw_uid)
+
+
+def parse_times(output: bytes) -> dict[str, float] | None:
+    """
+    Parse the times that a job wrote to its pipe. The student code runs in the
+    same process, so the output can't be trusted.
+
+    Returns:
+        The times, or `None` if the output isn't a JSON object of numbers.
+    """
+    try:
+        times = json.loads(output)
+    except ValueError:
+        return None
+    if not isinstance(times, dict) or not all(
+        isinstance(value, int | float) and not isinstance(value, bool)
+        for value in times.values()
+    ):
+        return None
+    return times
+
+
+def run_job(job_dir: str, write_fd: int) -> None:
+    """
+    Grade the prepared job in `job_dir` in a forked child process, and write
+    the times returned by `pl_main.main` to `write_fd`. Never returns.
+    """
+    exit_code = 1
+    try:
+        # Put the job in its own process group, so that any processes started
+        # by the student code can be killed with it.
+        os.setpgid(0, 0)
+        # Stdin and stdout are used for the requests and responses of the server.
+        os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+        os.dup2(2, 1)
+        drop_privileges()
+
+        merge_dir = join(job_dir, "run")
+        os.environ.update(
+            JOB_DIR=job_dir,
+            MERGE_DIR=merge_dir,
+            FILENAMES_DIR=join(merge_dir, "filenames"),
+        )
+        os.chdir(merge_dir)
+        # Run as if by `python3 $MERGE_DIR/pl_main.py`. Job directories may not
+        # have existed when the server started, so importers for them must not
+        # have been cached.
+        sys.path[0] = merge_dir
+        sys.path_importer_cache.clear()
+        importlib.invalidate_caches()
+
+        times = pl_main.main()
+        with os.fdopen(write_fd, "w") as f:
+            json.dump(times, f)
+        exit_code = 0
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+
+def grade_job(job_dir: str, *, timeout: float | None = None) -> dict[str, Any]:
+    """
+    Grade the job in `job_dir` in a forked child process, killing it if it
+    takes longer than `timeout` seconds.
+
+    Returns the response for the job, with the time in milliseconds spent on
+    each part of it.
+    """
+    start = time.perf_counter()
+    secret_name = prepare_job(job_dir)
+    prepare_time = time.perf_counter() - start
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_job(job_dir, write_fd)
+    os.close(write_fd)
+    # Also set the process group here, in case the job has to be killed
+    # before it gets to do so itself.
+    with contextlib.suppress(OSError):
+        os.setpgid(pid, pid)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    output = b""
+    read_fds = [read_fd]
+    timed_out = False
+    status = None
+    while status is None:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            timed_out = True
+            os.killpg(pid, signal.SIGKILL)
+            _, status = os.waitpid(pid, 0)
+            break
+        wait = POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL)
+        if select.select(read_fds, [], [], wait)[0]:
+            chunk = os.read(read_fd, 65536)
+            output += chunk
+            if not chunk:
+                # Nothing else can be read, so just wait for the job to exit.
+                read_fds = []
+        # Stop as soon as the job has exited, even if something that it
+        # started still holds the pipe open.
+        exited_pid, exit_status = os.waitpid(pid, os.WNOHANG)
+        if exited_pid != 0:
+            status = exit_status
+
+    # Kill anything that the job left running, then read whatever the job
+    # wrote before it exited, which can't be more than the pipe holds.
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(pid, signal.SIGKILL)
+    kill_user_processes()
+    os.set_blocking(read_fd, False)
+    with contextlib.suppress(BlockingIOError):
+        output += os.read(read_fd, 65536)
+    os.close(read_fd)
+    finish_job(job_dir, secret_name)
+    # Only the results are kept, so that later jobs can't find anything that
+    # this one wrote.
+    shutil.rmtree(join(job_dir, "run"))
+    remove_user_files()
+
+    times = parse_times(output) if output else {}
+    succeeded = (
+        not timed_out and times is not None and os.waitstatus_to_exitcode(status) == 0
+    )
+    times = times or {}
+    return {
+        "job_dir": job_dir,
+        "succeeded": succeeded,
+        "timed_out": timed_out,
+        "times": {
+            "setup_ms": round((prepare_time + times.get("setup", 0)) * 1000, 3),
+            "student_exec_ms": round(times.get("student_exec", 0) * 1000, 3),
+            "tests_ms": round(times.get("tests", 0) * 1000, 3),
+            "total_ms": round((time.perf_counter() - start) * 1000, 3),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="A resident grading server for the Python autograder."
+    )
+    parser.add_argument(
+        "--preload",
+        action="append",
+        default=[],
+        help="an additional module to import before grading any jobs, e.g. pandas",
+    )
+    args = parser.parse_args()
+
+    for module in [*PRELOAD_MODULES, *args.preload]:
+        importlib.import_module(module)
+    # Keep the preloaded objects out of garbage collection, so that the pages
+    # that hold them stay shared with the forked jobs.
+    gc.freeze()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        response = grade_job(request["job_dir"], timeout=request.get("timeout"))
+        print(json.dumps(response), flush=True)
+
+
+if __name__ == "__main__":
+    main()
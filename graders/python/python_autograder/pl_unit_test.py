@@ -1,5 +1,6 @@
 import json
 import os
+import time
 import unittest
 from collections import namedtuple
 from os.path import join
@@ -8,8 +9,9 @@ from types import ModuleType
 # Needed to ensure matplotlib runs on Docker
 import matplotlib as mpl
 from code_feedback import Feedback
-from pl_execute import execute_code
+from pl_execute import ExecutionContext, execute_code
 from pl_helpers import GradingSkipped, name, save_plot
+from pl_profile import Profile
 from pl_result import PLTestResult
 
 mpl.use("Agg")
@@ -28,6 +30,19 @@ class PLTestCase(unittest.TestCase):
     iter_num = 0
     total_iters = 1
     ipynb_key = "#grade"
+    # Total time in seconds spent in `execute_code`, across all iterations
+    exec_time = 0.0
+    # The question files, which are read once and reused by every iteration
+    execution_context: ExecutionContext | None = None
+    # Run each test case in its own forked process, in parallel
+    parallel_tests = False
+    # Maximum number of test cases to run at the same time, when running in
+    # parallel. Defaults to the number of CPUs that the grader may use.
+    parallel_processes: int | None = None
+    # Time limit in seconds for each test case, when running in parallel
+    test_timeout: float | None = None
+    # Add a profile of the time and memory used while grading to the results
+    include_profile = False
     plt: ModuleType | None
 
     @classmethod
@@ -46,18 +61,26 @@ class PLTestCase(unittest.TestCase):
 
         cls.student_code_abs_path = join(base_dir, cls.student_code_file)
 
+        if cls.iter_num == 0 or cls.execution_context is None:
+            cls.execution_context = ExecutionContext(
+                filenames_dir, join(filenames_dir, "ans.py")
+            )
+
         # Load data so that we can use it in the test cases
-        with open(join(filenames_dir, "data.json"), encoding="utf-8") as f:
-            cls.data = json.load(f)
-
-        ref_result, student_result, plot_value = execute_code(
-            join(filenames_dir, "ans.py"),
-            join(base_dir, cls.student_code_file),
-            cls.include_plt,
-            join(base_dir, "output.txt"),
-            cls.iter_num,
-            cls.ipynb_key,
-        )
+        cls.data = json.loads(cls.execution_context.data_json)
+
+        start = time.perf_counter()
+        with Profile.measure("execute_code"):
+            ref_result, student_result, plot_value = execute_code(
+                join(filenames_dir, "ans.py"),
+                join(base_dir, cls.student_code_file),
+                cls.include_plt,
+                join(base_dir, "output.txt"),
+                cls.iter_num,
+                cls.ipynb_key,
+                cls.execution_context,
+            )
+        cls.exec_time += time.perf_counter() - start
         answerTuple = namedtuple("answerTuple", ref_result.keys())  # noqa: PYI024
         cls.ref = answerTuple(**ref_result)
         studentTuple = namedtuple("studentTuple", student_result.keys())  # noqa: PYI024
@@ -133,7 +156,11 @@ class PLTestCase(unittest.TestCase):
             or not isinstance(result, PLTestResult)
             or (not result.done_grading and not result.skip_grading)
         ):
-            super().run(result)
+            if isinstance(result, PLTestResult) and result.parallel:
+                result.run_in_process(self, self.test_timeout)
+            else:
+                with Profile.measure("tests", self._testMethodName):
+                    super().run(result)
         elif result.skip_grading:
             result.startTest(self)
             self.setUp()
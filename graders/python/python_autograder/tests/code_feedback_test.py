@@ -262,3 +262,97 @@ def test_check_dict_with_partial_key_matching_raises_error(
             NAME, ref_dict, student_dict, target_keys=target_keys, report_success=False
         )
     mock_add_feedback.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("ref_dict", "student_dict", "tolerance", "expected_feedback"),
+    [
+        (
+            {f"key_{i}": i / 3 for i in range(1000)},
+            {f"key_{i}": i / 3 + 1e-9 for i in range(1000)},
+            {"rtol": 1e-6, "atol": 1e-8},
+            None,
+        ),  # Test: Large dictionary of floats within tolerance
+        (
+            {f"key_{i}": i / 3 for i in range(1000)},
+            {f"key_{i}": i / 3 + 1e-9 for i in range(1000)},
+            {},
+            f"'{NAME}' has key `key_0` with value `1e-09`, which is not correct",
+        ),  # Test: Without tolerance, floats must be equal
+        (
+            {f"key_{i}": float(i) for i in range(1000)},
+            {f"key_{i}": float(i) for i in range(1000)} | {"key_700": 0.0},
+            {"atol": 1e-3},
+            f"'{NAME}' has key `key_700` with value `0.0`, which is not correct",
+        ),  # Test: Large dictionary of floats with one inaccurate value
+        (
+            {"a": 1.0, "b": 2, "c": "three"},
+            {"a": 1.0001, "b": 2, "c": "three"},
+            {"atol": 1e-3},
+            None,
+        ),  # Test: Mixed types within tolerance
+    ],
+)
+@patch("code_feedback.Feedback.add_feedback")
+@patch("builtins.open", new_callable=mock_open)
+def test_check_dict_tolerance(
+    mock_file, mock_add_feedback, ref_dict, student_dict, tolerance, expected_feedback
+) -> None:
+    """Test check_dict with the rtol and atol parameters."""
+    result = Feedback.check_dict(
+        NAME, ref_dict, student_dict, report_success=False, **tolerance
+    )
+    assert result == (expected_feedback is None)
+    if expected_feedback:
+        mock_add_feedback.assert_called_with(expected_feedback)
+    else:
+        mock_add_feedback.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("ref_tuple", "student_tuple", "expected_feedback"),
+    [
+        (tuple(range(10000)), tuple(range(10000)), []),
+        (
+            tuple(range(10000)),
+            (*range(5000), -1, *range(5001, 10000)),
+            [f"'{NAME}' is inaccurate at index 5000"],
+        ),
+        (
+            (1.5, float("nan"), 2.5),
+            (1.5, float("nan"), 2.5),
+            [f"'{NAME}' is inaccurate at index 1"],
+        ),
+        (("a", "b", "c"), ("a", "b", "d"), [f"'{NAME}' is inaccurate at index 2"]),
+        (
+            (1, "b", 3, 4.0),
+            (1, "b", 3.0, 4),
+            [
+                f"{NAME}[2] should be of type int",
+                f"{NAME}[3] should be of type float",
+                f"'{NAME}' is inaccurate at index 2",
+            ],
+        ),
+    ],
+)
+@patch("code_feedback.Feedback.add_feedback")
+@patch("builtins.open", new_callable=mock_open)
+def test_check_tuple(
+    mock_file, mock_add_feedback, ref_tuple, student_tuple, expected_feedback
+) -> None:
+    """Test that check_tuple reports the first incorrect entry."""
+    result = Feedback.check_tuple(NAME, ref_tuple, student_tuple, report_success=False)
+    assert result == (not expected_feedback)
+    assert [call.args[0] for call in mock_add_feedback.call_args_list] == (
+        expected_feedback
+    )
+
+
+@patch("code_feedback.Feedback.add_feedback")
+@patch("builtins.open", new_callable=mock_open)
+def test_check_list_entry_type(mock_file, mock_add_feedback) -> None:
+    """Test that check_list reports the first entry with the wrong type."""
+    ref = list(range(1000))
+    assert Feedback.check_list(NAME, ref, [True, *ref[1:]], entry_type=int)
+    assert not Feedback.check_list(NAME, ref, [*ref[:999], 1.0], entry_type=int)
+    mock_add_feedback.assert_called_with(f"'{NAME}[999]' has the wrong type")
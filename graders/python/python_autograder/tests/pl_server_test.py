@@ -0,0 +1,335 @@
+import json
+import os
+import pathlib
+import signal
+import subprocess
+import sys
+import time
+from typing import Any
+
+import pl_server
+import pytest
+
+TEST_CODE = """
+from code_feedback import Feedback
+from pl_helpers import name, points
+from pl_unit_test import PLTestCase
+
+
+class Test(PLTestCase):
+    @points(2)
+    @name("x_sq")
+    def test_0(self):
+        if Feedback.check_scalar("x_sq", self.ref.x_sq, self.st.x_sq):
+            Feedback.set_score(1)
+        else:
+            Feedback.set_score(0)
+"""
+
+
+@pytest.fixture(autouse=True)
+def keep_privileges(monkeypatch: pytest.MonkeyPatch) -> None:
+    # There is no `ag` user to run the jobs as outside of the grader image
+    monkeypatch.setattr(pl_server, "drop_privileges", lambda: None)
+
+
+PARALLEL_TEST_CODE = """
+from code_feedback import Feedback
+from pl_helpers import name, points
+from pl_unit_test import PLTestCase
+
+
+class Test(PLTestCase):
+    parallel_tests = {parallel}
+    test_timeout = 1
+    total_iters = 2
+
+    @points(1)
+    @name("x_sq")
+    def test_0(self):
+        Feedback.set_score(1 if self.st.x_sq == self.ref.x_sq else 0)
+
+    @points(2)
+    @name("half")
+    def test_1(self):
+        Feedback.add_feedback("Half right")
+        Feedback.set_score(0.5)
+
+    @points(1)
+    @name("x_sq again")
+    def test_2(self):
+        if self.st.x_sq != self.ref.x_sq:
+            Feedback.finish("Stopping early")
+        while self.st.x_sq == 0:
+            pass
+        Feedback.set_score(1)
+
+    @points(1)
+    @name("always")
+    def test_3(self):
+        Feedback.set_score(1)
+"""
+
+
+def make_job(
+    job_dir: pathlib.Path, student_code: str, test_code: str = TEST_CODE
+) -> None:
+    for name in ("student", "tests", "data"):
+        (job_dir / name).mkdir(parents=True)
+    (job_dir / "student" / "user_code.py").write_text(student_code)
+    (job_dir / "tests" / "setup_code.py").write_text("x = 3\n")
+    (job_dir / "tests" / "ans.py").write_text("x_sq = x**2\n")
+    (job_dir / "tests" / "test.py").write_text(test_code)
+    (job_dir / "data" / "data.json").write_text(
+        json.dumps({
+            "params": {
+                "names_for_user": [{"name": "x"}],
+                "names_from_user": [{"name": "x_sq"}],
+            }
+        })
+    )
+
+
+def read_results(job_dir: pathlib.Path) -> dict[str, Any]:
+    with open(job_dir / "results" / "results.json") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("student_code", ["x_sq = x * x\n", "x_sq = x\n"])
+def test_grade_job_matches_new_interpreter(
+    tmp_path: pathlib.Path, student_code: str
+) -> None:
+    # Grade one copy of the job in a new interpreter, like `run.sh` does
+    make_job(tmp_path / "fresh", student_code)
+    secret_name = pl_server.prepare_job(str(tmp_path / "fresh"))
+    merge_dir = tmp_path / "fresh" / "run"
+    subprocess.run(
+        [sys.executable, str(merge_dir / "pl_main.py")],
+        env={
+            **os.environ,
+            "MERGE_DIR": str(merge_dir),
+            "FILENAMES_DIR": str(merge_dir / "filenames"),
+        },
+        check=True,
+    )
+    pl_server.finish_job(str(tmp_path / "fresh"), secret_name)
+
+    make_job(tmp_path / "warm", student_code)
+    response = pl_server.grade_job(str(tmp_path / "warm"), timeout=60)
+
+    assert response["succeeded"]
+    assert set(response["times"]) == {
+        "setup_ms",
+        "student_exec_ms",
+        "tests_ms",
+        "total_ms",
+    }
+    assert read_results(tmp_path / "warm") == read_results(tmp_path / "fresh")
+
+
+def test_grade_job_timeout(tmp_path: pathlib.Path) -> None:
+    make_job(tmp_path, "import time\ntime.sleep(60)\nx_sq = 9\n")
+    response = pl_server.grade_job(str(tmp_path), timeout=1)
+
+    assert response["timed_out"]
+    assert not response["succeeded"]
+    assert read_results(tmp_path) == pl_server.FALLBACK_RESULT
+
+
+def test_grade_job_left_running(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(
+        pl_server, "kill_user_processes", lambda: calls.append("kill_user_processes")
+    )
+    monkeypatch.setattr(
+        pl_server, "remove_user_files", lambda: calls.append("remove_user_files")
+    )
+    pid_fname = tmp_path / "pid"
+    # Leave a process running in a new session, which keeps the job's pipe open
+    make_job(
+        tmp_path / "job",
+        "import os, time\n"
+        "if os.fork() == 0:\n"
+        "    os.setsid()\n"
+        f"    with open({str(pid_fname)!r}, 'a') as f:\n"
+        "        f.write(f'{os.getpid()}\\n')\n"
+        "    time.sleep(60)\n"
+        "    os._exit(0)\n"
+        "x_sq = x * x\n",
+    )
+
+    start = time.monotonic()
+    response = pl_server.grade_job(str(tmp_path / "job"))
+
+    assert time.monotonic() - start < 30
+    assert response["succeeded"]
+    # The files are only removed once nothing of the job is left running.
+    assert calls == ["kill_user_processes", "remove_user_files"]
+    assert read_results(tmp_path / "job")["score"] == 1
+    # Without an `ag` user, nothing kills the process that left the job's
+    # process group.
+    for pid in pid_fname.read_text().split():
+        os.kill(int(pid), signal.SIGKILL)
+
+
+def test_grade_job_leaves_nothing(tmp_path: pathlib.Path) -> None:
+    make_job(
+        tmp_path,
+        "import os\n"
+        "os.mkdir('leftovers')\n"
+        "with open('leftovers/notes.txt', 'w') as f:\n"
+        "    f.write('secret')\n"
+        "x_sq = x * x\n",
+    )
+    assert pl_server.grade_job(str(tmp_path), timeout=60)["succeeded"]
+
+    assert sorted(os.listdir(tmp_path)) == ["data", "results", "student", "tests"]
+    assert read_results(tmp_path)["score"] == 1
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason="Only root can give files away")
+def test_remove_owned_files(tmp_path: pathlib.Path) -> None:
+    uid = 12345
+    (tmp_path / "owned").mkdir()
+    (tmp_path / "owned" / "file").write_text("")
+    (tmp_path / "owned_file").write_text("")
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "owned_file").write_text("")
+    (tmp_path / "shared" / "file").write_text("")
+    (tmp_path / "owned_link").symlink_to(tmp_path / "shared")
+    for path in ("owned", "owned_file", "shared/owned_file"):
+        os.chown(tmp_path / path, uid, -1)
+    os.chown(tmp_path / "owned_link", uid, -1, follow_symlinks=False)
+
+    pl_server.remove_owned_files(str(tmp_path), uid)
+
+    assert sorted(os.listdir(tmp_path)) == ["shared"]
+    assert os.listdir(tmp_path / "shared") == ["file"]
+
+
+@pytest.mark.parametrize(
+    ("output", "expected"),
+    [
+        (b'{"setup": 1, "tests": 0.5}', {"setup": 1, "tests": 0.5}),
+        (b'{"setup": 1', None),
+        (b"\xff", None),
+        (b"[1, 2]", None),
+        (b'{"setup": "1"}', None),
+        (b'{"setup": true}', None),
+    ],
+)
+def test_parse_times(output: bytes, expected: dict[str, float] | None) -> None:
+    assert pl_server.parse_times(output) == expected
+
+
+def test_grade_job_invalid_times(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(pl_server.pl_main, "main", lambda: "not times")
+    make_job(tmp_path, "x_sq = x * x\n")
+    response = pl_server.grade_job(str(tmp_path), timeout=60)
+
+    assert not response["succeeded"]
+    assert not response["timed_out"]
+    assert read_results(tmp_path) == pl_server.FALLBACK_RESULT
+
+
+@pytest.mark.parametrize("student_code", ["x_sq = x * x\n", "x_sq = x\n"])
+def test_parallel_tests_match_sequential(
+    tmp_path: pathlib.Path, student_code: str
+) -> None:
+    for parallel in (False, True):
+        make_job(
+            tmp_path / str(parallel),
+            student_code,
+            PARALLEL_TEST_CODE.format(parallel=parallel),
+        )
+        assert pl_server.grade_job(str(tmp_path / str(parallel)))["succeeded"]
+
+    assert read_results(tmp_path / "True") == read_results(tmp_path / "False")
+
+
+def test_parallel_tests_timeout(tmp_path: pathlib.Path) -> None:
+    # The feedback and image written before the test times out are discarded
+    test_code = PARALLEL_TEST_CODE.format(parallel=True).replace(
+        "        while self.st.x_sq == 0:\n",
+        '        Feedback.add_feedback("Still running")\n'
+        '        with open("image_x_sq again.png", "w") as f:\n'
+        '            f.write("data:image/png;base64,")\n'
+        "        while self.st.x_sq == 0:\n",
+    )
+    make_job(tmp_path, "x_sq = 0\n", test_code)
+    (tmp_path / "tests" / "setup_code.py").write_text("x = 0\n")
+    assert pl_server.grade_job(str(tmp_path))["succeeded"]
+
+    results = read_results(tmp_path)
+    assert [test["points"] for test in results["tests"]] == [2, 2, 0, 2]
+    assert results["tests"][2]["message"] == (
+        "This test took too long to run (over 1 seconds).\n" * 2
+    )
+    assert "images" not in results["tests"][2]
+
+
+def test_iterations_reuse_question_files(tmp_path: pathlib.Path) -> None:
+    test_code = TEST_CODE.replace(
+        "class Test(PLTestCase):",
+        "import os\n\n\nclass Test(PLTestCase):\n    total_iters = 3\n",
+    ).replace(
+        "    def test_0(self):",
+        "    def test_0(self):\n"
+        "        Feedback.add_feedback(str(self.data['params'].get('seen')))\n"
+        "        Feedback.add_feedback(\n"
+        "            str(sorted(os.listdir(os.environ['FILENAMES_DIR'])))\n"
+        "        )",
+    )
+    make_job(tmp_path, "x_sq = x * x if x < 3 else 0\n", test_code)
+    (tmp_path / "tests" / "setup_code.py").write_text(
+        "x = test_iter_num + 1\ndata['params'].setdefault('seen', []).append(x)\n"
+    )
+    (tmp_path / "tests" / "trailing_code.py").write_text("")
+    assert pl_server.grade_job(str(tmp_path))["succeeded"]
+
+    [result] = read_results(tmp_path)["tests"]
+    assert result["points"] == 4
+    # Changes to `data` by the setup code are kept for the next iteration
+    assert "[1, 2]\n" in result["message"]
+    # The question files are restored after the student code runs
+    assert (
+        "['ans.py', 'data.json', 'setup_code.py', 'test.py']\n" in (result["message"])
+    )
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_profile(tmp_path: pathlib.Path, *, parallel: bool) -> None:
+    test_code = PARALLEL_TEST_CODE.format(parallel=parallel).replace(
+        "    test_timeout = 1\n",
+        "    include_profile = True\n"
+        "    def test_4(self):\n"
+        "        Feedback.call_user(self.st.square, 3)\n",
+    )
+    make_job(tmp_path, "x_sq = x * x\ndef square(y):\n    return y * y\n", test_code)
+    (tmp_path / "data" / "data.json").write_text(
+        json.dumps({
+            "params": {
+                "names_for_user": [{"name": "x"}],
+                "names_from_user": [{"name": "x_sq"}, {"name": "square"}],
+            }
+        })
+    )
+    assert pl_server.grade_job(str(tmp_path))["succeeded"]
+
+    profile = read_results(tmp_path)["profile"]
+    assert profile["execute_code"]["calls"] == 2
+    assert {name: stats["calls"] for name, stats in profile["tests"].items()} == {
+        f"test_{i}": 2 for i in range(5)
+    }
+    assert profile["call_user"]["square"]["calls"] == 2
+    assert set(profile["call_user"]["square"]) == {
+        "calls",
+        "wall_ms",
+        "cpu_ms",
+        "peak_alloc_kb",
+        "max_rss_kb",
+    }